@@ -1,20 +1,67 @@
 import os
+import threading
+import time
+import uuid
 from dataclasses import dataclass, field
-from typing import Annotated, Any, Dict, List, Optional
+from typing import Annotated, Any, AsyncIterator, Dict, Iterator, List, Optional
 
 from dotenv import load_dotenv
-from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.messages import (
+    AIMessage,
+    AIMessageChunk,
+    BaseMessage,
+    HumanMessage,
+)
 from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import RunnableLambda
 from langchain_openai import AzureChatOpenAI
+from langgraph.config import get_stream_writer
 from langgraph.graph import END, StateGraph
 from langgraph.graph.message import add_messages
 
 from integrations import confluence_client, jira_client, zendesk_client
+from tools.context import pack_results
+from tools.embeddings import get_query_embedder
+from tools.federated import (
+    FEDERATED_TOP_K,
+    SOURCE_KBS,
+    FederatedSearch,
+    FederatedSearchResult,
+    PendingSearch,
+)
+from tools.router import (
+    LOCAL_ROUTER_ENABLED,
+    ROUTING_CACHE_ENABLED,
+    LocalRouter,
+    RoutingPlanCache,
+)
+from tools.semantic_cache import SemanticCache
 
 # Load environment variables
 path = os.path.join(os.path.dirname(__file__), ".env")
 load_dotenv(path)
 
+# Systems the router can send a query to, in the order results are presented
+SEARCH_SOURCES = tuple(SOURCE_KBS)
+
+# Off by default: a near-duplicate question can get an answer built for another
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() == "true"
+
+# Search every system while the routing LLM runs, keeping the routed ones
+SPECULATIVE_SEARCH = os.getenv("SPECULATIVE_SEARCH", "false").lower() == "true"
+# Seconds before an uncollected speculative search is abandoned
+SPECULATION_MAX_AGE = 120
+
+# Options of every routed agent search
+SEARCH_OPTIONS = {"hybrid_search": True, "hybrid_search_alpha": 0.7}
+# Speculative searches mostly get discarded, so they are kept cheap: fewer
+# results per system and semantic-only ranking (through the vector search
+# path, without reranking, for KBs in VECTOR_SEARCH_KBS)
+SPECULATIVE_SEARCH_OPTIONS = {"per_source_k": 3, "hybrid_search": False}
+
+# Progress events come from the 'custom' stream, answer tokens from 'messages'
+STREAM_MODES = ["custom", "messages", "values"]
+
 
 def messages_reducer(left: List[Any], right: List[Any]) -> List[Any]:
     """Reducer for messages to append new messages."""
@@ -36,12 +83,23 @@ class AgentState:
     error: Optional[str] = field(default=None)
     thread_id: Optional[str] = field(default=None)
     routing_plan: Optional[Dict[str, Any]] = field(default_factory=dict)
+    search_errors: Dict[str, str] = field(default_factory=dict)
+    cache_provenance: Optional[Dict[str, Any]] = field(default=None)
+    # Key of searches started before routing finished (see _speculate)
+    speculation_id: Optional[str] = field(default=None)
 
 
 class SupportAgent:
     """Elegant support agent for handling tickets, issues, and documentation queries."""
 
-    def __init__(self):
+    def __init__(self, search_timeouts: Optional[Dict[str, float]] = None):
+        """
+        Initialize the agent.
+
+        Args:
+            search_timeouts: Per-source timeouts in seconds, e.g. {'confluence': 20}.
+                Sources not listed use SEARCH_TIMEOUT_SECONDS (default 10).
+        """
         # Try Azure OpenAI first, fallback to regular OpenAI
         try:
             azure_key = os.getenv("AZURE_OPENAI_API_KEY")
@@ -82,6 +140,47 @@ class SupportAgent:
         self.zendesk = zendesk_client.ZendeskClient()
         self.confluence = confluence_client.ConfluenceClient()
 
+        # Near-duplicate questions are answered from the semantic cache
+        self.semantic_cache = None
+        if SEMANTIC_CACHE_ENABLED:
+            try:
+                # Shares query embeddings with the KB searches
+                self.semantic_cache = SemanticCache(get_query_embedder().embed)
+            except Exception as e:
+                print(f"Semantic cache disabled: {e}")
+
+        # Most queries are routed locally; the LLM only decides uncertain ones
+        self.router = None
+        if LOCAL_ROUTER_ENABLED:
+            try:
+                self.router = LocalRouter()
+            except Exception as e:
+                print(f"Local router disabled: {e}")
+
+        # Plans the LLM chose are reused for repeated and paraphrased queries
+        self.routing_cache = None
+        if ROUTING_CACHE_ENABLED:
+            try:
+                embed_fn = get_query_embedder().embed
+            except Exception as e:
+                print(f"Routing cache matching exact queries only: {e}")
+                embed_fn = None
+            self.routing_cache = RoutingPlanCache(embed_fn)
+
+        # Searches started while routing, by AgentState.speculation_id
+        self._speculations: Dict[str, PendingSearch] = {}
+        self._speculations_lock = threading.Lock()
+
+        # Routed systems are searched concurrently and fused into one ranking
+        self.federated = FederatedSearch(
+            tools={
+                "jira": self.jira.search_tool,
+                "zendesk": self.zendesk.search_tool,
+                "confluence": self.confluence.search_tool,
+            },
+            timeouts=search_timeouts,
+        )
+
         # Build the agent workflow
         self.agent = self._build_agent()
 
@@ -90,66 +189,92 @@ class SupportAgent:
         graph = StateGraph(AgentState)
 
         # Add nodes
+        graph.add_node("check_cache", self._check_cache)
         graph.add_node("router", self._route_query)
-        graph.add_node("search_jira", self._search_jira)
-        graph.add_node("search_zendesk", self._search_zendesk)
-        graph.add_node("search_confluence", self._search_confluence)
+        graph.add_node(
+            "search_sources",
+            RunnableLambda(self._search_sources, afunc=self._asearch_sources),
+        )
         graph.add_node("aggregate_results", self._aggregate_results)
         graph.add_node("handle_error", self._handle_error)
 
-        # Add conditional edges from router - LLM decides which systems to query
+        # Serve near-duplicate questions from the semantic cache
         graph.add_conditional_edges(
-            "router",
-            self._route_decision,
+            "check_cache",
+            self._cache_decision,
             {
-                "jira": "search_jira",
-                "zendesk": "search_zendesk",
-                "confluence": "search_confluence",
-                "jira_and_confluence": "search_jira",
-                "zendesk_and_confluence": "search_zendesk",
-                "jira_and_zendesk": "search_jira",
-                "all": "search_jira",
-                "error": "handle_error",
+                "hit": END,
+                "miss": "router",
             },
         )
 
-        # After JIRA, check if we need to continue to Zendesk or Confluence
+        # Add conditional edges from router - LLM decides which systems to query
         graph.add_conditional_edges(
-            "search_jira",
-            self._continue_after_jira,
+            "router",
+            self._route_decision,
             {
-                "to_zendesk": "search_zendesk",
-                "to_confluence": "search_confluence",
-                "to_both": "search_zendesk",
-                "to_aggregate": "aggregate_results",
+                "search": "search_sources",
+                "error": "handle_error",
             },
         )
 
-        # After Zendesk, check if we need to continue to Confluence
+        # All routed systems are searched concurrently and joined here
         graph.add_conditional_edges(
-            "search_zendesk",
-            self._continue_after_zendesk,
+            "search_sources",
+            self._continue_after_search,
             {
-                "to_confluence": "search_confluence",
                 "to_aggregate": "aggregate_results",
+                "error": "handle_error",
             },
         )
 
-        # When going to both (zendesk and confluence), after zendesk we need to go to confluence
-        # This is handled by the _continue_after_zendesk method
-
-        # After Confluence, always aggregate
-        graph.add_edge("search_confluence", "aggregate_results")
-
         # Final edges
         graph.add_edge("aggregate_results", END)
         graph.add_edge("handle_error", END)
 
-        graph.set_entry_point("router")
+        graph.set_entry_point("check_cache")
         return graph.compile()
 
+    def _check_cache(self, state: AgentState) -> AgentState:
+        """Answer from the semantic cache when a similar query was answered."""
+        query = self._get_query(state)
+        cached = None
+        if self.semantic_cache is not None and query:
+            try:
+                cached = self.semantic_cache.lookup(query)
+            except Exception as e:
+                print(f"Semantic cache lookup failed: {e}")
+
+        if cached is None:
+            return AgentState(
+                messages=state.messages,
+                input_query=state.input_query,
+                results=[],
+                output="",
+                error=None,
+                thread_id=state.thread_id,
+                routing_plan={},
+                cache_provenance=None,
+            )
+
+        # Return new AI message - reducer will append it to existing messages
+        return AgentState(
+            messages=[AIMessage(content=cached["output"])],
+            input_query=state.input_query,
+            results=cached["results"],
+            output=cached["output"],
+            error=None,
+            thread_id=state.thread_id,
+            routing_plan=cached["routing_plan"],
+            cache_provenance=cached["provenance"],
+        )
+
+    def _cache_decision(self, state: AgentState) -> str:
+        """Finish early on a semantic cache hit."""
+        return "hit" if state.cache_provenance else "miss"
+
     def _route_query(self, state: AgentState) -> AgentState:
-        """Route the query using LLM to determine which systems to query."""
+        """Choose the systems to query, locally when confident, else with the LLM."""
         # Extract query from messages or use input_query
         if state.messages and len(state.messages) > 0:
             last_message = state.messages[-1]
@@ -160,43 +285,20 @@ class SupportAgent:
         else:
             query = state.input_query
 
-        # TEMPORARY: Hardcoded routing for testing multi-system queries
-        if "jira" in query.lower() and "zendesk" in query.lower():
-            routing_plan = {
-                "jira": True,
-                "zendesk": True,
-                "confluence": False,
-                "reasoning": "Test: both jira and zendesk mentioned",
-            }
-        elif "jira" in query.lower() and "confluence" in query.lower():
-            routing_plan = {
-                "jira": True,
-                "zendesk": False,
-                "confluence": True,
-                "reasoning": "Test: both jira and confluence mentioned",
-            }
-        elif "zendesk" in query.lower() and "confluence" in query.lower():
-            routing_plan = {
-                "jira": False,
-                "zendesk": True,
-                "confluence": True,
-                "reasoning": "Test: both zendesk and confluence mentioned",
-            }
-        elif "compare" in query.lower() or (
-            "jira" in query.lower()
-            and "zendesk" in query.lower()
-            and "confluence" in query.lower()
-        ):
-            routing_plan = {
-                "jira": True,
-                "zendesk": True,
-                "confluence": True,
-                "reasoning": "Test: compare or all systems mentioned",
-            }
-        else:
-            # Use LLM routing for other cases
+        decision = self.router.route(query) if self.router is not None else None
+        speculation_id = None
+        routing_plan = None
+        if decision is not None:
+            routing_plan = decision.plan
+        elif self.routing_cache is not None:
+            routing_plan = self.routing_cache.get(query)
+        if routing_plan is None:
+            # Ask the LLM when the local router isn't confident and the plan
+            # isn't cached; only then is there latency to search through
+            speculation_id = self._speculate(query)
             routing_plan = self._llm_routing(query)
 
+        self._emit({"type": "routing", "routing_plan": routing_plan})
         return AgentState(
             messages=state.messages,
             input_query=state.input_query,
@@ -205,10 +307,11 @@ class SupportAgent:
             error=None,
             thread_id=state.thread_id,
             routing_plan=routing_plan,
+            speculation_id=speculation_id,
         )
 
     def _llm_routing(self, query: str) -> Dict[str, Any]:
-        """Use LLM to determine routing plan."""
+        """Use LLM to determine routing plan (callers check routing_cache first)."""
         # Use LLM to determine routing plan with more explicit instructions
         routing_prompt = ChatPromptTemplate.from_template(
             """You are a routing assistant for a support system. Analyze the user's query and determine which systems need to be searched.
@@ -266,6 +369,12 @@ Example responses:
                 "reasoning": routing_plan.get("reasoning", ""),
             }
 
+            # The local router learns from the LLM's decisions
+            if self.router is not None:
+                self.router.record(query, routing_plan)
+            if self.routing_cache is not None:
+                self.routing_cache.set(query, routing_plan)
+
             return routing_plan
         except Exception as e:
             # Fallback: use keyword-based routing if LLM routing fails
@@ -312,172 +421,146 @@ Example responses:
         }
 
     def _route_decision(self, state: AgentState) -> str:
-        """Determine which system to route to based on LLM routing plan."""
+        """Determine whether the routing plan selected any system to search."""
         if state.error:
             return "error"
 
         routing_plan = state.routing_plan or {}
 
-        jira = routing_plan.get("jira", False)
-        zendesk = routing_plan.get("zendesk", False)
-        confluence = routing_plan.get("confluence", False)
-
-        # Determine the routing path based on what needs to be searched
-        if jira and zendesk and confluence:
-            return "all"
-        elif jira and zendesk:
-            return "jira_and_zendesk"
-        elif jira and confluence:
-            return "jira_and_confluence"
-        elif zendesk and confluence:
-            return "zendesk_and_confluence"
-        elif jira:
-            return "jira"
-        elif zendesk:
-            return "zendesk"
-        elif confluence:
-            return "confluence"
-        else:
-            return "error"
-
-    def _continue_after_jira(self, state: AgentState) -> str:
-        """Determine next step after JIRA search."""
-        routing_plan = state.routing_plan or {}
+        if any(routing_plan.get(source, False) for source in SEARCH_SOURCES):
+            return "search"
+        return "error"
 
-        zendesk = routing_plan.get("zendesk", False)
-        confluence = routing_plan.get("confluence", False)
+    def _continue_after_search(self, state: AgentState) -> str:
+        """Determine next step after the concurrent search."""
+        if state.error:
+            return "error"
+        return "to_aggregate"
 
-        if zendesk and confluence:
-            return "to_both"
-        elif zendesk:
-            return "to_zendesk"
-        elif confluence:
-            return "to_confluence"
-        else:
-            return "to_aggregate"
+    def _get_query(self, state: AgentState) -> str:
+        """Extract the user query from the last human message or input_query."""
+        query = state.input_query
+        if state.messages and len(state.messages) > 0:
+            last_message = state.messages[-1]
+            if isinstance(last_message, HumanMessage):
+                query = last_message.content
+        return query
 
-    def _continue_after_zendesk(self, state: AgentState) -> str:
-        """Determine next step after Zendesk search."""
+    def _routed_sources(self, state: AgentState) -> List[str]:
+        """Systems selected by the routing plan, in presentation order."""
         routing_plan = state.routing_plan or {}
-
-        confluence = routing_plan.get("confluence", False)
-
-        # Always go to confluence if it was in the original routing plan
-        if confluence:
-            return "to_confluence"
-        else:
-            return "to_aggregate"
-
-    def _search_jira(self, state: AgentState) -> AgentState:
-        """Search JIRA issues using hybrid search."""
-        try:
-            query = state.input_query
-            if state.messages and len(state.messages) > 0:
-                last_message = state.messages[-1]
-                if isinstance(last_message, HumanMessage):
-                    query = last_message.content
-
-            results = self.jira.search_tickets(
-                content=query, hybrid_search=True, hybrid_search_alpha=0.7
+        return [s for s in SEARCH_SOURCES if routing_plan.get(s, False)]
+
+    def _search_sources(self, state: AgentState) -> AgentState:
+        """Search every routed system concurrently and fuse the rankings."""
+        pending = self._take_speculation(state.speculation_id)
+        if pending is not None:
+            outcome = self.federated.collect(
+                pending,
+                sources=self._routed_sources(state),
+                top_k=FEDERATED_TOP_K,
+                on_result=self._search_progress,
             )
-
-            # Merge with existing results if any (for consistency)
-            merged_results = state.results + results
-
-            return AgentState(
-                messages=state.messages,
-                input_query=state.input_query,
-                results=merged_results,
-                output="",
-                error=None,
-                thread_id=state.thread_id,
-                routing_plan=state.routing_plan,
-            )
-        except Exception as e:
-            # If JIRA search fails, return existing results
-            return AgentState(
-                messages=state.messages,
-                input_query=state.input_query,
-                results=state.results,
-                output="",
-                error=f"JIRA search failed: {str(e)}",
-                thread_id=state.thread_id,
-                routing_plan=state.routing_plan,
+        else:
+            outcome = self.federated.search(
+                self._get_query(state),
+                sources=self._routed_sources(state),
+                top_k=FEDERATED_TOP_K,
+                on_result=self._search_progress,
+                **SEARCH_OPTIONS,
             )
-
-    def _search_zendesk(self, state: AgentState) -> AgentState:
-        """Search Zendesk tickets using hybrid search."""
-        try:
-            query = state.input_query
-            if state.messages and len(state.messages) > 0:
-                last_message = state.messages[-1]
-                if isinstance(last_message, HumanMessage):
-                    query = last_message.content
-
-            results = self.zendesk.search_tickets(
-                content=query, hybrid_search=True, hybrid_search_alpha=0.7
+        return self._search_state(state, outcome)
+
+    async def _asearch_sources(self, state: AgentState) -> AgentState:
+        """Async version of _search_sources used by ainvoke/astream."""
+        pending = self._take_speculation(state.speculation_id)
+        if pending is not None:
+            outcome = await self.federated.acollect(
+                pending,
+                sources=self._routed_sources(state),
+                top_k=FEDERATED_TOP_K,
+                on_result=self._search_progress,
             )
-
-            # Merge with existing results if any
-            merged_results = state.results + results
-
-            return AgentState(
-                messages=state.messages,
-                input_query=state.input_query,
-                results=merged_results,
-                output="",
-                error=None,
-                thread_id=state.thread_id,
-                routing_plan=state.routing_plan,
+        else:
+            outcome = await self.federated.asearch(
+                self._get_query(state),
+                sources=self._routed_sources(state),
+                top_k=FEDERATED_TOP_K,
+                on_result=self._search_progress,
+                **SEARCH_OPTIONS,
             )
-        except Exception as e:
-            # If Zendesk search fails, return existing results
-            return AgentState(
-                messages=state.messages,
-                input_query=state.input_query,
-                results=state.results,
-                output="",
-                error=f"Zendesk search failed: {str(e)}",
-                thread_id=state.thread_id,
-                routing_plan=state.routing_plan,
+        return self._search_state(state, outcome)
+
+    def _speculate(self, query: str) -> Optional[str]:
+        """
+        Start searching every system before routing has decided.
+
+        The routing LLM call and the searches then overlap; sources the
+        router rejects are cancelled or their results discarded. The searches
+        use SPECULATIVE_SEARCH_OPTIONS, so a turn that reuses them answers
+        from a cheaper search than SEARCH_OPTIONS.
+        """
+        if not SPECULATIVE_SEARCH or not query:
+            return None
+        now = time.monotonic()
+        with self._speculations_lock:
+            # Abandon searches whose turn never reached search_sources
+            for key, pending in list(self._speculations.items()):
+                if now - pending.started > SPECULATION_MAX_AGE:
+                    pending.cancel()
+                    del self._speculations[key]
+            speculation_id = uuid.uuid4().hex
+            self._speculations[speculation_id] = self.federated.start(
+                query, **SPECULATIVE_SEARCH_OPTIONS
             )
+        return speculation_id
+
+    def _take_speculation(
+        self, speculation_id: Optional[str]
+    ) -> Optional[PendingSearch]:
+        """Claim the searches started for a turn, if any."""
+        if speculation_id is None:
+            return None
+        with self._speculations_lock:
+            return self._speculations.pop(speculation_id, None)
+
+    def _search_progress(self, source: str, outcome: Any) -> None:
+        """Report one system's search as soon as it finishes."""
+        failed = isinstance(outcome, BaseException)
+        self._emit(
+            {
+                "type": "search",
+                "source": source,
+                "results": 0 if failed else len(outcome),
+                "error": (str(outcome) or type(outcome).__name__) if failed else None,
+            }
+        )
 
-    def _search_confluence(self, state: AgentState) -> AgentState:
-        """Search Confluence documentation using hybrid search."""
-        try:
-            query = state.input_query
-            if state.messages and len(state.messages) > 0:
-                last_message = state.messages[-1]
-                if isinstance(last_message, HumanMessage):
-                    query = last_message.content
-
-            results = self.confluence.search_pages(
-                content=query, hybrid_search=True, hybrid_search_alpha=0.7
+    def _search_state(
+        self, state: AgentState, outcome: FederatedSearchResult
+    ) -> AgentState:
+        """Build the post-search state from a federated search outcome."""
+        for source, message in outcome.errors.items():
+            print(f"{source} search failed: {message}")
+
+        # Only fail the turn when every routed system failed
+        error = None
+        if len(outcome.errors) == len(self._routed_sources(state)):
+            error = "; ".join(
+                f"{source} search failed: {message}"
+                for source, message in outcome.errors.items()
             )
 
-            # Merge with existing results if any
-            merged_results = state.results + results
-
-            return AgentState(
-                messages=state.messages,
-                input_query=state.input_query,
-                results=merged_results,
-                output="",
-                error=None,
-                thread_id=state.thread_id,
-                routing_plan=state.routing_plan,
-            )
-        except Exception as e:
-            # If Confluence search fails, return existing results
-            return AgentState(
-                messages=state.messages,
-                input_query=state.input_query,
-                results=state.results,
-                output="",
-                error=f"Confluence search failed: {str(e)}",
-                thread_id=state.thread_id,
-                routing_plan=state.routing_plan,
-            )
+        return AgentState(
+            messages=state.messages,
+            input_query=state.input_query,
+            results=outcome.results,
+            output="",
+            error=error,
+            thread_id=state.thread_id,
+            routing_plan=state.routing_plan,
+            search_errors=outcome.errors,
+        )
 
     def _aggregate_results(self, state: AgentState) -> AgentState:
         """Aggregate and format search results."""
@@ -509,14 +592,11 @@ Example responses:
                 error=None,
                 thread_id=state.thread_id,
                 routing_plan=state.routing_plan,
+                search_errors=state.search_errors,
             )
 
         # Get query from messages or input_query
-        query = state.input_query
-        if state.messages and len(state.messages) > 0:
-            last_message = state.messages[-1]
-            if isinstance(last_message, HumanMessage):
-                query = last_message.content
+        query = self._get_query(state)
 
         # Create comprehensive prompt
         system_prompt = """You are an expert support agent. Analyze the search results and provide a comprehensive response.
@@ -562,25 +642,43 @@ Example responses:
             routing_info += (
                 f"\nConfluence searched: {state.routing_plan.get('confluence', False)}"
             )
+        for source, message in state.search_errors.items():
+            routing_info += f"\n{source} search returned no results ({message})"
 
         prompt = ChatPromptTemplate.from_template(
             f"{system_prompt}\n\nQuery: {{query}}\n\nResults: {{results}}{routing_info}"
         )
 
-        try:
-            response = self.llm.invoke(
-                prompt.format(query=query, results=state.results)
+        # Only the useful fields of the best results, within the token budget
+        context = pack_results(state.results)
+        if context.dropped:
+            print(
+                f"Context: {context.included} results ({context.tokens} tokens), "
+                f"{context.dropped} left out by the token budget"
             )
 
-            # Return new AI message - reducer will append it to existing messages
+        try:
+            response = self.llm.invoke(prompt.format(query=query, results=context.text))
+
+            if self.semantic_cache is not None and not state.search_errors:
+                try:
+                    self.semantic_cache.add(
+                        query, response.content, state.results, state.routing_plan
+                    )
+                except Exception as e:
+                    print(f"Semantic cache update failed: {e}")
+
+            # Return new AI message - reducer will append it to existing messages.
+            # Keeping the LLM's message id stops streams from repeating it whole.
             return AgentState(
-                messages=[AIMessage(content=response.content)],
+                messages=[AIMessage(content=response.content, id=response.id)],
                 input_query=state.input_query,
                 results=state.results,
                 output=response.content,
                 error=None,
                 thread_id=state.thread_id,
                 routing_plan=state.routing_plan,
+                search_errors=state.search_errors,
             )
         except Exception as e:
             return AgentState(
@@ -591,10 +689,14 @@ Example responses:
                 error=f"Failed to generate response: {str(e)}",
                 thread_id=state.thread_id,
                 routing_plan=state.routing_plan,
+                search_errors=state.search_errors,
             )
 
     def _handle_error(self, state: AgentState) -> AgentState:
         """Handle errors gracefully."""
+        pending = self._take_speculation(state.speculation_id)
+        if pending is not None:
+            pending.cancel()
         error_msg = state.error or "Unknown error occurred"
         error_output = f"I encountered an issue: {error_msg}. Please try rephrasing your query or contact support."
 
@@ -607,8 +709,89 @@ Example responses:
             error=None,
             thread_id=state.thread_id,
             routing_plan=state.routing_plan,
+            search_errors=state.search_errors,
         )
 
+    def _emit(self, event: Dict[str, Any]) -> None:
+        """Send a progress event to stream_mode='custom' consumers, if any."""
+        try:
+            get_stream_writer()(event)
+        except Exception:
+            # Not running inside the graph (e.g. a node called directly)
+            pass
+
+    def _stream_event(
+        self, mode: str, chunk: Any, final: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        """Turn one LangGraph stream item into a client event (None to skip)."""
+        if mode == "custom":
+            return chunk
+        if mode == "messages":
+            message, metadata = chunk
+            # Only the answer is streamed; the routing LLM call is internal
+            if (
+                metadata.get("langgraph_node") == "aggregate_results"
+                and isinstance(message, AIMessageChunk)
+                and message.content
+            ):
+                return {"type": "token", "content": message.content}
+            return None
+        final.clear()
+        final.update(chunk)
+        return None
+
+    def _done_event(self, final: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "type": "done",
+            "output": final.get("output") or "No response generated",
+            "routing_plan": final.get("routing_plan") or {},
+            "search_errors": final.get("search_errors") or {},
+            "cache_provenance": final.get("cache_provenance"),
+        }
+
+    async def astream(self, question: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Answer a question, yielding progress events as they happen.
+
+        Events are dicts with a 'type':
+            routing: {'routing_plan'} once the systems to search are chosen
+            search: {'source', 'results', 'error'} as each system finishes
+            token: {'content'} for each piece of the answer as the LLM writes it
+            done: {'output', 'routing_plan', 'search_errors', 'cache_provenance'}
+
+        Cached answers and error messages are not tokenized; they arrive
+        whole in the final 'done' event.
+        """
+        final: Dict[str, Any] = {}
+        try:
+            async for mode, chunk in self.agent.astream(
+                {"input_query": question}, stream_mode=STREAM_MODES
+            ):
+                event = self._stream_event(mode, chunk, final)
+                if event is not None:
+                    yield event
+        except Exception as e:
+            final = {
+                "output": f"Agent error: {str(e)}. Please try again or contact support."
+            }
+        yield self._done_event(final)
+
+    def stream_query(self, question: str) -> Iterator[Dict[str, Any]]:
+        """Synchronous version of astream."""
+        final: Dict[str, Any] = {}
+        try:
+            for mode, chunk in self.agent.stream(
+                {"input_query": question}, stream_mode=STREAM_MODES
+            ):
+                event = self._stream_event(mode, chunk, final)
+                if event is not None:
+                    yield event
+        except Exception as e:
+            final = {
+                "output": f"Agent error: {str(e)}. Please try again or contact support."
+            }
+        yield self._done_event(final)
+
     def query(self, question: str) -> str:
         """Main entry point for the support agent."""
         try:
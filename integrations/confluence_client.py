@@ -1,11 +1,19 @@
 """Confluence integration via MindsDB."""
 
-from typing import Dict, List, Union
-
-import mindsdb_sdk
+from typing import Dict, Iterator, List, Optional, Union
 
 from models.confluence_page import ConfluencePage
-from tools.search import SemanticSearchTool
+from tools.columns import (
+    DATASOURCE_COLUMNS,
+    FULL,
+    Columns,
+    render_columns,
+    resolve_columns,
+)
+from tools.connection import get_pool
+from tools.executor import run_blocking
+from tools.query_builder import compile_select
+from tools.search import RAW_DATA_PAGE_SIZE, SemanticSearchTool
 
 
 class ConfluenceClient:
@@ -13,11 +21,21 @@ class ConfluenceClient:
 
     def __init__(self):
         """Initialize MindsDB connection."""
-        self.server = mindsdb_sdk.connect()
-        self.search_tool = SemanticSearchTool(kb_name="confluence_kb")
+        self.pool = get_pool()
+        self.search_tool = SemanticSearchTool(kb_name="confluence_kb", pool=self.pool)
+
+    @staticmethod
+    def _columns(columns: Columns) -> Optional[List[str]]:
+        """Resolve a columns= argument against the lean pages projection."""
+        default = DATASOURCE_COLUMNS[("confluence_datasource", "pages")]
+        return resolve_columns(columns, default)
 
     def get_pages(
-        self, space_key: str = "SOP", limit: int = 100, as_models: bool = False
+        self,
+        space_key: str = "SOP",
+        limit: int = 100,
+        as_models: bool = False,
+        columns: Columns = None,
     ) -> List[Union[Dict, ConfluencePage]]:
         """
         Get pages from Confluence via MindsDB.
@@ -26,16 +44,21 @@ class ConfluenceClient:
             space_key: Space key (default: SOP)
             limit: Maximum number of pages
             as_models: If True, return ConfluencePage objects instead of dicts
+            columns: Columns to return (default: metadata without the page body,
+                'full' for all)
 
         Returns:
             List of pages
         """
-        query = f"""
-        SELECT * FROM confluence_datasource.pages
-        WHERE spaceKey = '{space_key}'
-        LIMIT {limit}
-        """
-        results = self.server.query(query).fetch()
+        query = compile_select(
+            "confluence_datasource",
+            "pages",
+            filters={"spaceKey": space_key},
+            columns=self._columns(columns),
+            limit=limit,
+        ).sql
+        with self.pool.connection() as server:
+            results = server.query(query).fetch()
 
         if results is not None and len(results) > 0:
             if as_models:
@@ -53,14 +76,17 @@ class ConfluenceClient:
         return []
 
     def get_page(
-        self, page_id: str, as_model: bool = False
+        self, page_id: str, as_model: bool = False, columns: Columns = FULL
     ) -> Union[Dict, ConfluencePage]:
-        """Get a specific page by ID."""
-        query = f"""
-        SELECT * FROM confluence_datasource.pages
-        WHERE id = '{page_id}'
-        """
-        results = self.server.query(query).fetch()
+        """Get a specific page by ID (all columns, including the body, by default)."""
+        query = compile_select(
+            "confluence_datasource",
+            "pages",
+            filters={"id": page_id},
+            columns=self._columns(columns),
+        ).sql
+        with self.pool.connection() as server:
+            results = server.query(query).fetch()
 
         if results is not None and len(results) > 0:
             if hasattr(results, "iloc"):
@@ -83,6 +109,7 @@ class ConfluenceClient:
         hybrid_search: bool = True,
         hybrid_search_alpha: float = 0.5,
         top_k: int = 5,
+        columns: Columns = None,
     ) -> List[Dict]:
         """
         Search Confluence pages using hybrid search.
@@ -93,6 +120,7 @@ class ConfluenceClient:
             hybrid_search: Enable hybrid search
             hybrid_search_alpha: Balance between semantic and keyword relevance
             top_k: Maximum number of results
+            columns: Columns to return (default: lean KB projection, 'full' for all)
 
         Returns:
             List of matching pages
@@ -103,6 +131,26 @@ class ConfluenceClient:
             top_k=top_k,
             hybrid_search=hybrid_search,
             hybrid_search_alpha=hybrid_search_alpha,
+            columns=columns,
+        )
+
+    async def asearch_pages(
+        self,
+        content: str = None,
+        filters: Dict = None,
+        hybrid_search: bool = True,
+        hybrid_search_alpha: float = 0.5,
+        top_k: int = 5,
+        columns: Columns = None,
+    ) -> List[Dict]:
+        """Async version of search_pages."""
+        return await self.search_tool.asearch(
+            content=content,
+            filters=filters,
+            top_k=top_k,
+            hybrid_search=hybrid_search,
+            hybrid_search_alpha=hybrid_search_alpha,
+            columns=columns,
         )
 
     def search_pages_by_space(
@@ -133,43 +181,97 @@ class ConfluenceClient:
         return self.search_pages(content=content, filters=filters)
 
     def query_pages(
-        self, filters: Dict = None, as_models: bool = False
+        self, filters: Dict = None, as_models: bool = False, columns: Columns = FULL
     ) -> List[Union[Dict, ConfluencePage]]:
         """
         Query Confluence pages from the datasource with filters.
 
+        Loads every match at once; use iter_pages to stream large tables.
+
         Args:
             filters: Filters to apply (e.g., {'spaceKey': 'SOP', 'status': 'current'})
             as_models: If True, return ConfluencePage objects instead of dicts
+            columns: Columns to return (default: all, including the page body)
 
         Returns:
             List of matching pages
         """
         results = self.search_tool.query_raw_data(
-            datasource="confluence_datasource", table="pages", filters=filters
+            datasource="confluence_datasource",
+            table="pages",
+            filters=filters,
+            columns=columns,
         )
 
         if as_models:
             return [ConfluencePage(**row) for row in results]
         return results
 
+    async def aquery_pages(
+        self, filters: Dict = None, as_models: bool = False, columns: Columns = FULL
+    ) -> List[Union[Dict, ConfluencePage]]:
+        """Async version of query_pages, run on the shared search executor."""
+        return await run_blocking(
+            self.query_pages, filters=filters, as_models=as_models, columns=columns
+        )
+
+    def iter_pages(
+        self,
+        filters: Dict = None,
+        as_models: bool = False,
+        columns: Columns = None,
+        page_size: int = RAW_DATA_PAGE_SIZE,
+        batches: bool = False,
+    ) -> Iterator[Union[Dict, ConfluencePage, List[Union[Dict, ConfluencePage]]]]:
+        """
+        Stream Confluence pages from the datasource page by page.
+
+        Args:
+            filters: Filters to apply (e.g., {'spaceKey': 'SOP', 'status': 'current'})
+            as_models: If True, yield ConfluencePage objects instead of dicts
+            columns: Columns to return (default: metadata without the page body,
+                'full' for all)
+            page_size: Pages fetched per round-trip
+            batches: If True, yield one list per round-trip
+
+        Yields:
+            Pages, or lists of them when batches is True
+        """
+        for batch in self.search_tool.iter_raw_data(
+            datasource="confluence_datasource",
+            table="pages",
+            filters=filters,
+            columns=columns,
+            page_size=page_size,
+        ):
+            if as_models:
+                batch = [ConfluencePage(**row) for row in batch]
+            if batches:
+                yield batch
+            else:
+                yield from batch
+
     def refresh_data(self) -> None:
         """Refresh Confluence data from source."""
         query = "REFRESH confluence_datasource"
-        self.server.query(query)
+        with self.pool.connection() as server:
+            server.query(query)
         print("✓ Refreshed Confluence datasource")
 
     def get_recent_pages(
-        self, days: int = 7, as_models: bool = False
+        self, days: int = 7, as_models: bool = False, columns: Columns = None
     ) -> List[Union[Dict, ConfluencePage]]:
-        """Get recently updated pages."""
+        """Get recently updated pages (without bodies unless columns='full')."""
         query = f"""
-        SELECT * FROM confluence_datasource.pages
-        WHERE version_createdAt >= NOW() - INTERVAL '{days}' DAY
+        SELECT {render_columns(self._columns(columns))} FROM confluence_datasource.pages
+        WHERE version_createdAt >= NOW() - INTERVAL '{int(days)}' DAY
         ORDER BY version_createdAt DESC
         """
-        results = self.server.query(query).fetch()
+        with self.pool.connection() as server:
+            results = server.query(query).fetch()
 
+        if hasattr(results, "to_dict"):
+            results = results.to_dict(orient="records")
         if as_models:
             return [ConfluencePage(**row) for row in results]
         return results
@@ -177,10 +279,12 @@ class ConfluenceClient:
     def insert_data(self) -> None:
         """Insert Confluence data into knowledge base."""
         try:
-            confluence_kb = self.server.knowledge_bases.get("confluence_kb")
-            confluence_kb.insert_query(
-                self.server.databases.confluence_datasource.tables.pages
-            )
+            with self.pool.connection() as server:
+                confluence_kb = server.knowledge_bases.get("confluence_kb")
+                confluence_kb.insert_query(
+                    server.databases.confluence_datasource.tables.pages
+                )
+            self.search_tool.invalidate_cache()
             print("✓ Inserted data into confluence_kb")
         except Exception as e:
             print(f"Error inserting data: {e}")
@@ -1,18 +1,20 @@
-from typing import Dict, List
-
-import mindsdb_sdk
+from typing import Dict, Iterator, List, Union
 
 from models.jira_issue import JiraIssue
-from tools.search import SemanticSearchTool
+from tools.columns import FULL, Columns
+from tools.connection import get_pool
+from tools.executor import run_blocking
+from tools.search import RAW_DATA_PAGE_SIZE, SemanticSearchTool
 
 
 class JiraClient:
     """Client for interacting with JIRA API via MindsDB Knowledge Base."""
 
     def __init__(self):
-        self.server = mindsdb_sdk.connect()
-        self.jira_kb = self.server.knowledge_bases.get("jira_kb")
-        self.search_tool = SemanticSearchTool(kb_name="jira_kb")
+        self.pool = get_pool()
+        with self.pool.connection() as server:
+            self.jira_kb = server.knowledge_bases.get("jira_kb")
+        self.search_tool = SemanticSearchTool(kb_name="jira_kb", pool=self.pool)
 
     def search_tickets(
         self,
@@ -21,6 +23,7 @@ class JiraClient:
         hybrid_search: bool = True,
         hybrid_search_alpha: float = 0.5,
         top_k: int = 5,
+        columns: Columns = None,
     ) -> List[Dict]:
         """
         Search JIRA tickets using hybrid search.
@@ -31,6 +34,7 @@ class JiraClient:
             hybrid_search: Enable hybrid search
             hybrid_search_alpha: Balance between semantic and keyword relevance
             top_k: Maximum number of results
+            columns: Columns to return (default: lean KB projection, 'full' for all)
 
         Returns:
             List of matching JIRA tickets
@@ -41,6 +45,26 @@ class JiraClient:
             top_k=top_k,
             hybrid_search=hybrid_search,
             hybrid_search_alpha=hybrid_search_alpha,
+            columns=columns,
+        )
+
+    async def asearch_tickets(
+        self,
+        content: str = None,
+        filters: Dict = None,
+        hybrid_search: bool = True,
+        hybrid_search_alpha: float = 0.5,
+        top_k: int = 5,
+        columns: Columns = None,
+    ) -> List[Dict]:
+        """Async version of search_tickets."""
+        return await self.search_tool.asearch(
+            content=content,
+            filters=filters,
+            top_k=top_k,
+            hybrid_search=hybrid_search,
+            hybrid_search_alpha=hybrid_search_alpha,
+            columns=columns,
         )
 
     def search_tickets_by_status(
@@ -88,11 +112,61 @@ class JiraClient:
             filters.update(additional_filters)
         return self.search_tickets(content=content, filters=filters)
 
-    def query_tickets(self, query: dict = None) -> List[JiraIssue]:
-        table = self.server.databases.jira_datasource.tables.issues
+    def query_tickets(
+        self, query: dict = None, columns: Columns = FULL
+    ) -> List[JiraIssue]:
+        """
+        Query JIRA issues from the datasource with equality filters.
 
-        df = table.filter(**query).fetch() if query else table.fetch()
+        Loads every match at once; use iter_tickets to stream large tables.
 
-        records = df.to_dict(orient="records")
+        Args:
+            query: Filters to apply (e.g., {'status': 'Done'})
+            columns: Columns to return (default: all, including the description)
+
+        Returns:
+            List of matching issues
+        """
+        records = self.search_tool.query_raw_data(
+            datasource="jira_datasource", table="issues", filters=query, columns=columns
+        )
 
         return [JiraIssue(**record) for record in records]
+
+    async def aquery_tickets(
+        self, query: dict = None, columns: Columns = FULL
+    ) -> List[JiraIssue]:
+        """Async version of query_tickets, run on the shared search executor."""
+        return await run_blocking(self.query_tickets, query, columns)
+
+    def iter_tickets(
+        self,
+        query: dict = None,
+        columns: Columns = None,
+        page_size: int = RAW_DATA_PAGE_SIZE,
+        batches: bool = False,
+    ) -> Iterator[Union[JiraIssue, List[JiraIssue]]]:
+        """
+        Stream JIRA issues from the datasource page by page.
+
+        Args:
+            query: Filters to apply (e.g., {'status': 'Done'})
+            columns: Columns to return (default: all but description, 'full' for all)
+            page_size: Issues fetched per round-trip
+            batches: If True, yield one list of issues per page
+
+        Yields:
+            JiraIssue objects, or lists of them when batches is True
+        """
+        for page in self.search_tool.iter_raw_data(
+            datasource="jira_datasource",
+            table="issues",
+            filters=query,
+            columns=columns,
+            page_size=page_size,
+        ):
+            issues = [JiraIssue(**record) for record in page]
+            if batches:
+                yield issues
+            else:
+                yield from issues
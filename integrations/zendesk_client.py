@@ -1,19 +1,21 @@
 """Zendesk API client."""
 
-from typing import Dict, List
+from typing import Dict, Iterator, List, Union
 
-import mindsdb_sdk
-
-from tools.search import SemanticSearchTool
+from tools.columns import FULL, Columns
+from tools.connection import get_pool
+from tools.executor import run_blocking
+from tools.search import RAW_DATA_PAGE_SIZE, SemanticSearchTool
 
 
 class ZendeskClient:
     """Client for interacting with Zendesk API via MindsDB Knowledge Base."""
 
     def __init__(self, database="zendesk_datasource"):
-        self.server = mindsdb_sdk.connect()
-        self.kb = self.server.knowledge_bases.get("zendesk_kb")
-        self.search_tool = SemanticSearchTool(kb_name="zendesk_kb")
+        self.pool = get_pool()
+        with self.pool.connection() as server:
+            self.kb = server.knowledge_bases.get("zendesk_kb")
+        self.search_tool = SemanticSearchTool(kb_name="zendesk_kb", pool=self.pool)
 
     def search_tickets(
         self,
@@ -22,6 +24,7 @@ class ZendeskClient:
         hybrid_search: bool = True,
         hybrid_search_alpha: float = 0.5,
         top_k: int = 5,
+        columns: Columns = None,
     ) -> List[Dict]:
         """
         Search Zendesk tickets using hybrid search.
@@ -32,6 +35,7 @@ class ZendeskClient:
             hybrid_search: Enable hybrid search
             hybrid_search_alpha: Balance between semantic and keyword relevance
             top_k: Maximum number of results
+            columns: Columns to return (default: lean KB projection, 'full' for all)
 
         Returns:
             List of matching Zendesk tickets
@@ -42,6 +46,26 @@ class ZendeskClient:
             top_k=top_k,
             hybrid_search=hybrid_search,
             hybrid_search_alpha=hybrid_search_alpha,
+            columns=columns,
+        )
+
+    async def asearch_tickets(
+        self,
+        content: str = None,
+        filters: Dict = None,
+        hybrid_search: bool = True,
+        hybrid_search_alpha: float = 0.5,
+        top_k: int = 5,
+        columns: Columns = None,
+    ) -> List[Dict]:
+        """Async version of search_tickets."""
+        return await self.search_tool.asearch(
+            content=content,
+            filters=filters,
+            top_k=top_k,
+            hybrid_search=hybrid_search,
+            hybrid_search_alpha=hybrid_search_alpha,
+            columns=columns,
         )
 
     def search_tickets_by_status(
@@ -99,12 +123,60 @@ class ZendeskClient:
         return self.search_tickets(content=content, filters=filters)
 
     # def query_tickets(self, query: dict = None) -> List[ZendeskTicket]:
-    def query_tickets(self, query: dict = None):
-        table = self.server.databases.zendesk_datasource.tables.tickets
+    def query_tickets(self, query: dict = None, columns: Columns = FULL):
+        """
+        Query Zendesk tickets from the datasource with equality filters.
 
-        df = table.filter(**query).fetch() if query else table.fetch()
+        Loads every match at once; use iter_tickets to stream large tables.
 
-        records = df.to_dict(orient="records")
+        Args:
+            query: Filters to apply (e.g., {'status': 'open'})
+            columns: Columns to return (default: all, including the description)
+
+        Returns:
+            List of matching ticket records
+        """
+        records = self.search_tool.query_raw_data(
+            datasource="zendesk_datasource",
+            table="tickets",
+            filters=query,
+            columns=columns,
+        )
 
         # return [ZendeskTicket(**record) for record in records]
         return records
+
+    async def aquery_tickets(self, query: dict = None, columns: Columns = FULL):
+        """Async version of query_tickets, run on the shared search executor."""
+        return await run_blocking(self.query_tickets, query, columns)
+
+    def iter_tickets(
+        self,
+        query: dict = None,
+        columns: Columns = None,
+        page_size: int = RAW_DATA_PAGE_SIZE,
+        batches: bool = False,
+    ) -> Iterator[Union[Dict, List[Dict]]]:
+        """
+        Stream Zendesk tickets from the datasource page by page.
+
+        Args:
+            query: Filters to apply (e.g., {'status': 'open'})
+            columns: Columns to return (default: all but description, 'full' for all)
+            page_size: Tickets fetched per round-trip
+            batches: If True, yield one list of tickets per page
+
+        Yields:
+            Ticket records, or lists of them when batches is True
+        """
+        for page in self.search_tool.iter_raw_data(
+            datasource="zendesk_datasource",
+            table="tickets",
+            filters=query,
+            columns=columns,
+            page_size=page_size,
+        ):
+            if batches:
+                yield page
+            else:
+                yield from page
@@ -1,6 +1,6 @@
 from typing import List, Optional
 
-from fastmcp import FastMCP
+from fastmcp import Context, FastMCP
 
 from integrations import confluence_client, jira_client, zendesk_client
 from models.common import Filter
@@ -14,49 +14,83 @@ confluence_client = confluence_client.ConfluenceClient()
 
 
 @mcp.tool
-def fetch_releavant_jira_issues(content: str, filters: dict = None):
+async def fetch_releavant_jira_issues(content: str, filters: dict = None):
     """Given a content, fetches the releavant JIRA issue chunks ranked based on relevance. You can use the relavant IDs after fetching to get the full issue details if needed."""
-    res = jira_client.search_tickets(content=content, filters=filters)
+    res = await jira_client.asearch_tickets(content=content, filters=filters)
     return res
 
 
 @mcp.tool
-def query_jira_issues(query: dict) -> List[JiraIssue]:
+async def query_jira_issues(query: dict) -> List[JiraIssue]:
     """Fetches the JIRA issues based on the deterministic conditions"""
-    res = jira_client.query_tickets(query=query)
+    res = await jira_client.aquery_tickets(query=query)
     return res
 
 
 @mcp.tool
-def fetch_releavant_zendesk_tickets(content: str, filters: dict = None):
+async def fetch_releavant_zendesk_tickets(content: str, filters: dict = None):
     """Given a content, fetches the releavant Zendesk ticket chunks ranked based on relevance. You can use the relavant IDs after fetching to get the full ticket details if needed."""
-    res = zendesk_client.search_tickets(content=content, filters=filters)
+    res = await zendesk_client.asearch_tickets(content=content, filters=filters)
     return res
 
 
 @mcp.tool
 # def query_zendesk_tickets(query: dict) -> List[ZendeskTicket]:
-def query_zendesk_tickets(query: dict):
+async def query_zendesk_tickets(query: dict):
     """Fetches the Zendesk tickets based on the deterministic conditions"""
-    res = zendesk_client.query_tickets(query=query)
+    res = await zendesk_client.aquery_tickets(query=query)
     return res
 
 
 @mcp.tool
-def fetch_releavant_confluence_pages(
+async def fetch_releavant_confluence_pages(
     content: str, filters: Optional[Filter] = Filter(filters={})
 ):
     """Given a content, fetches the relevant Confluence page chunks ranked based on relevance. You can use the relevant IDs after fetching to get the full page details if needed."""
-    res = confluence_client.search_pages(content=content, filters=filters.filters)
+    res = await confluence_client.asearch_pages(
+        content=content, filters=filters.filters
+    )
     return res
 
 
 @mcp.tool
-def query_confluence_pages(query: dict) -> List[ConfluencePage]:
+async def query_confluence_pages(query: dict) -> List[ConfluencePage]:
     """Fetches the Confluence pages based on the deterministic conditions"""
-    res = confluence_client.query_pages(filters=query, as_models=True)
+    res = await confluence_client.aquery_pages(filters=query, as_models=True)
     return res
 
 
+@mcp.tool
+async def ask_support_agent(question: str, ctx: Context) -> dict:
+    """Answers a support question by routing it to JIRA, Zendesk and Confluence and summarizing what was found. While it works, the chosen systems and each finished search are sent as log messages and the answer text is streamed as progress notifications; the complete answer is returned at the end."""
+    # Imported on first use so the search tools work without an LLM configured
+    from agent import support_agent
+
+    tokens = 0
+    async for event in support_agent.astream(question):
+        if event["type"] == "routing":
+            plan = event["routing_plan"]
+            systems = [
+                source
+                for source in ("jira", "zendesk", "confluence")
+                if plan.get(source)
+            ]
+            await ctx.info(
+                f"Searching {', '.join(systems)}: {plan.get('reasoning', '')}"
+            )
+        elif event["type"] == "search":
+            status = event["error"] or f"{event['results']} results"
+            await ctx.info(f"{event['source']} search finished ({status})")
+        elif event["type"] == "token":
+            tokens += 1
+            await ctx.report_progress(progress=tokens, message=event["content"])
+        else:
+            return {
+                "answer": event["output"],
+                "routing_plan": event["routing_plan"],
+                "search_errors": event["search_errors"],
+            }
+
+
 if __name__ == "__main__":
     mcp.run(transport="sse")
@@ -12,5 +12,8 @@ load_dotenv()
 agent = SupportAgent()
 
 # Export for LangGraph server
-# The graph will automatically handle messages and thread_id from the state
+# The graph will automatically handle messages and thread_id from the state.
+# Stream with stream_mode=["custom", "messages-tuple"] to receive the routing
+# plan and per-source search completions ('custom') followed by the answer
+# tokens from the aggregate_results node ('messages-tuple').
 support_agent = agent.agent
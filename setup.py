@@ -1,24 +1,201 @@
 import argparse
 import os
+from functools import partial
 
 from dotenv import load_dotenv
 
-from utils import setup_datasource, setup_jobs, setup_kb
+from utils import pgvector_indexes, setup_datasource, setup_jobs, setup_kb
+from utils.setup_graph import Step, print_summary, run_steps
 
 # Load environment variables from .env files
 # Try root .env first, then fall back to utils/confluence/.env
 if os.path.exists(".env"):
     load_dotenv(".env")
 
+# (knowledge base, datasource, table, create KB, create datasource)
+KB_SOURCES = [
+    (
+        "confluence_kb",
+        "confluence_datasource",
+        "pages",
+        setup_kb.create_confluence_kb,
+        setup_datasource.setup_confluence_datasource,
+    ),
+    (
+        "jira_kb",
+        "jira_datasource",
+        "issues",
+        setup_kb.create_jira_kb,
+        setup_datasource.setup_jira_datasource,
+    ),
+    (
+        "zendesk_kb",
+        "zendesk_datasource",
+        "tickets",
+        setup_kb.create_zendesk_kb,
+        setup_datasource.setup_zendesk_datasource,
+    ),
+]
+
+
+def create_kb_step(kb_name, create_kb, api_key, azure_config, resume) -> None:
+    """Create a KB with pgvector storage (on resume, only if it is missing)."""
+    if resume and setup_kb.kb_exists(kb_name):
+        print(f"✓ Keeping existing {kb_name}")
+        return
+    create_kb(api_key, azure_config, use_pgvector=True)
+
+
+def reconcile_datasource_step(outcomes: dict, name: str) -> None:
+    outcomes[name] = setup_datasource.reconcile_datasource(name)
+
+
+def reconcile_kb_step(outcomes: dict, kb_name, api_key, azure_config) -> None:
+    """Keep an unchanged KB; recreate it if its config or vector storage changed."""
+    # A recreated pgvector datasource may point at a database without the vectors
+    moved = outcomes.get("pgvector_datasource") == "recreated"
+    setup_kb.reconcile_kb(kb_name, api_key, azure_config, force=moved)
+
+
+def example_search() -> None:
+    results = setup_kb.search_confluence_kb("authentication")
+    print(f"✓ Found {len(results)} results")
+
+
+def build_steps(args, api_key: str, azure_config: dict = None) -> list:
+    """
+    Build the step graph for a setup or refresh run.
+
+    Each knowledge base has its own chain (datasource -> create -> load), so
+    one KB failing doesn't stop the others; pgvector setup precedes every
+    KB creation. In reconcile mode datasources and KBs are only recreated
+    when their config differs from the desired state, and the loads are
+    incremental.
+    """
+    if args.mode == "refresh":
+        steps = [Step("agent", setup_kb.create_mindsdb_agent)]
+        for kb_name, datasource, table, _, _ in KB_SOURCES:
+            steps.append(
+                Step(
+                    f"refresh_{kb_name}",
+                    partial(
+                        setup_kb.refresh_kb, kb_name, datasource, table, args.resume
+                    ),
+                )
+            )
+        return steps
+
+    reconcile = args.mode == "reconcile"
+    # Reconcile outcome ('created', 'recreated' or 'kept') per datasource
+    outcomes = {}
+
+    steps = []
+    if reconcile:
+        steps.append(
+            Step(
+                "pgvector_datasource",
+                partial(reconcile_datasource_step, outcomes, "pgvector_datasource"),
+            )
+        )
+    elif not args.resume:
+        steps += [
+            Step("drop_kbs", setup_kb.drop_all_kbs),
+            Step(
+                "drop_datasources",
+                setup_datasource.drop_all_datasources,
+                ["drop_kbs"],
+            ),
+            Step(
+                "pgvector_datasource",
+                setup_datasource.setup_pgvector_datasource,
+                ["drop_datasources"],
+            ),
+        ]
+
+    for kb_name, datasource, table, create_kb, setup_source in KB_SOURCES:
+        create_deps = []
+        create = partial(
+            create_kb_step, kb_name, create_kb, api_key, azure_config, args.resume
+        )
+        if reconcile:
+            steps.append(
+                Step(
+                    datasource, partial(reconcile_datasource_step, outcomes, datasource)
+                )
+            )
+            create_deps = ["pgvector_datasource", datasource]
+            create = partial(
+                reconcile_kb_step, outcomes, kb_name, api_key, azure_config
+            )
+        elif not args.resume:
+            # Keep the datasources of an interrupted run when resuming
+            steps.append(Step(datasource, setup_source, ["drop_datasources"]))
+            create_deps = ["pgvector_datasource", datasource]
+        steps.append(Step(f"create_{kb_name}", create, create_deps))
+        steps.append(
+            Step(
+                f"load_{kb_name}",
+                partial(
+                    setup_kb.insert_kb_data,
+                    kb_name,
+                    datasource,
+                    table,
+                    resume=args.resume,
+                ),
+                [f"create_{kb_name}"],
+            )
+        )
+        # Built once the rows are in; IF NOT EXISTS keeps existing indexes
+        steps.append(
+            Step(
+                f"index_{kb_name}",
+                partial(pgvector_indexes.ensure_kb_indexes, kb_name),
+                [f"load_{kb_name}"],
+            )
+        )
+
+    steps += [
+        Step(
+            "search_params",
+            pgvector_indexes.set_default_search_params,
+            ["pgvector_datasource"] if reconcile or not args.resume else [],
+        ),
+        Step(
+            "agent",
+            setup_kb.create_mindsdb_agent,
+            [f"create_{kb_name}" for kb_name, *_ in KB_SOURCES],
+        ),
+        Step("example_search", example_search, ["load_confluence_kb"]),
+        Step(
+            "refresh_jobs",
+            setup_jobs.add_refresh_kb_jobs,
+            [f"load_{kb_name}" for kb_name, *_ in KB_SOURCES],
+        ),
+    ]
+    return steps
+
 
 def main():
     """Main entry point."""
     parser = argparse.ArgumentParser(description="Setup or refresh Confluence KB")
     parser.add_argument(
         "--mode",
-        choices=["setup", "refresh"],
+        choices=["setup", "refresh", "reconcile"],
         default="setup",
-        help="Operation mode: setup (full setup) or refresh (update existing KB)",
+        help="Operation mode: setup (full setup), refresh (update existing KB) or "
+        "reconcile (only recreate datasources and KBs whose config changed)",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue an interrupted run from the last ingestion checkpoint "
+        "instead of dropping and reloading the knowledge bases",
+    )
+    parser.add_argument(
+        "--parallel",
+        action="store_true",
+        help="Set up and load the knowledge bases concurrently "
+        "(inserts share one embedding rate limiter)",
     )
     args = parser.parse_args()
 
@@ -40,54 +217,22 @@ def main():
         }
         print("Using Azure OpenAI for embeddings")
 
-    if args.mode == "setup":
-        print("=" * 60)
-        print("Setting up Confluence KB...")
-        print("=" * 60)
-
-        # Start Docker containers first
-        # setup_docker_containers()
-
-        setup_kb.drop_all_kbs()
-        setup_datasource.drop_all_datasources()
-
-        # Setup pgvector datasource
-        setup_datasource.setup_pgvector_datasource()
-
-        # Setup datasources
-        setup_datasource.setup_confluence_datasource()
-        setup_datasource.setup_jira_datasource()
-        setup_datasource.setup_zendesk_datasource()
-
-        # Create KB with pgvector storage
-        setup_kb.create_confluence_kb(api_key, azure_config, use_pgvector=True)
-        setup_kb.create_zendesk_kb(api_key, azure_config, use_pgvector=True)
-        setup_kb.create_jira_kb(api_key, azure_config, use_pgvector=True)
-
-        # Insert data
-        setup_kb.insert_kb_data("confluence_kb", "confluence_datasource", "pages")
-        setup_kb.insert_kb_data("jira_kb", "jira_datasource", "issues")
-        setup_kb.insert_kb_data("zendesk_kb", "zendesk_datasource", "tickets")
-
-        # Create agent with Azure config
-        setup_kb.create_mindsdb_agent()
-
-        # Example search
-        results = setup_kb.search_confluence_kb("authentication")
-        print(f"✓ Found {len(results)} results")
-
-        setup_jobs.add_refresh_kb_jobs()
-
-    elif args.mode == "refresh":
-        print("=" * 60)
-        print("Refreshing Confluence KB...")
-        print("=" * 60)
-        # Create agent with Azure config
-        setup_kb.create_mindsdb_agent()
-        # Refresh datasource and update KB
-        setup_kb.refresh_kb("jira_kb", "jira_datasource", "issues")
-        setup_kb.refresh_kb("zendesk_kb", "zendesk_datasource", "tickets")
-        setup_kb.refresh_kb("confluence_kb", "confluence_datasource", "pages")
+    print("=" * 60)
+    print(
+        {
+            "setup": "Setting up knowledge bases...",
+            "refresh": "Refreshing...",
+            "reconcile": "Reconciling knowledge bases...",
+        }[args.mode]
+    )
+    print("=" * 60)
+
+    steps = build_steps(args, api_key, azure_config)
+    workers = len(KB_SOURCES) + 1 if args.parallel else 1
+    results = run_steps(steps, max_workers=workers)
+    print_summary(results)
+    if any(result.status != "ok" for result in results.values()):
+        raise SystemExit(1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,47 @@
+"""Shared fakes for tests that talk to a MindsDB server."""
+
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+
+class FakeServer:
+    """Records every query and answers it with the rows ``answer(sql)`` returns."""
+
+    def __init__(self, answer=None):
+        self.answer = answer or (lambda sql: [])
+        self.queries = []
+
+    def query(self, sql):
+        self.queries.append(sql)
+        rows = self.answer(sql)
+        return SimpleNamespace(fetch=lambda: pd.DataFrame(rows))
+
+
+class FakePool:
+    """Connection pool handing out a single fake server."""
+
+    def __init__(self, server):
+        self.server = server
+
+    @contextmanager
+    def connection(self):
+        yield self.server
+
+
+@pytest.fixture
+def fake_server():
+    """Factory for fake servers: ``fake_server(answer)``."""
+    return FakeServer
+
+
+@pytest.fixture
+def fake_pool():
+    """Factory for pools over a fresh fake server: ``fake_pool(answer)``."""
+
+    def make(answer=None):
+        return FakePool(FakeServer(answer))
+
+    return make
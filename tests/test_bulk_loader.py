@@ -0,0 +1,98 @@
+"""Tests for the adaptive knowledge base bulk loader."""
+
+import os
+import sys
+import time
+
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import utils.bulk_loader as bulk_loader
+from utils.bulk_loader import BulkLoader, TokenBucket, is_rate_limited, prefetch
+
+
+def test_batches_grow_while_inserts_are_fast():
+    sizes = []
+    loader = BulkLoader(insert=lambda batch: sizes.append(len(batch)), batch_size=2)
+
+    stats = loader.load(range(30))
+
+    assert sizes[:4] == [2, 3, 4, 6]
+    assert sum(sizes) == stats.rows == 30
+    assert stats.failed == 0
+
+
+def test_rate_limited_batches_shrink_and_are_retried(monkeypatch):
+    monkeypatch.setattr(bulk_loader.time, "sleep", lambda seconds: None)
+    calls = []
+
+    def insert(batch):
+        calls.append(list(batch))
+        if len(calls) == 1:
+            raise RuntimeError("429 Too Many Requests")
+
+    committed = []
+    loader = BulkLoader(insert=insert, batch_size=8, max_batch_size=8)
+    stats = loader.load(range(8), on_success=committed.extend)
+
+    assert calls[0] == list(range(8))
+    assert calls[1] == list(range(4))
+    assert committed == list(range(8))
+    assert stats.retries == 1
+
+
+def test_batches_are_given_up_after_max_retries(monkeypatch):
+    monkeypatch.setattr(bulk_loader.time, "sleep", lambda seconds: None)
+
+    def insert(batch):
+        if 0 in batch:
+            raise ValueError("bad row")
+
+    loader = BulkLoader(insert=insert, batch_size=1, max_batch_size=1, max_retries=2)
+    stats = loader.load(range(3))
+
+    assert stats.failed == 1
+    assert stats.rows == 2
+    assert stats.retries == 2
+
+
+def test_token_bucket_paces_requests():
+    bucket = TokenBucket(rate=100, capacity=10)
+
+    started = time.monotonic()
+    bucket.acquire(10)
+    bucket.acquire(5)
+
+    assert time.monotonic() - started >= 0.04
+    assert is_rate_limited(RuntimeError("Rate limit reached"))
+    assert not is_rate_limited(RuntimeError("connection reset"))
+
+
+def test_prefetch_reads_ahead_by_a_bounded_number_of_pages():
+    read = []
+
+    def pages():
+        for i in range(10):
+            read.append(i)
+            yield [i]
+
+    stream = prefetch(pages(), depth=2)
+    assert next(stream) == [0]
+    time.sleep(0.05)
+
+    # One page handed out, two buffered, one blocked waiting for space
+    assert len(read) <= 4
+    assert list(stream) == [[i] for i in range(1, 10)]
+
+
+def test_prefetch_reraises_reader_errors():
+    def pages():
+        yield [1]
+        raise ConnectionError("source went away")
+
+    stream = prefetch(pages())
+    assert next(stream) == [1]
+    with pytest.raises(ConnectionError):
+        next(stream)
@@ -0,0 +1,70 @@
+"""Tests for query column projections."""
+
+import asyncio
+import os
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from integrations.confluence_client import ConfluenceClient
+from integrations.jira_client import JiraClient
+from integrations.zendesk_client import ZendeskClient
+from tools.columns import FULL, KB_COLUMNS, render_columns, resolve_columns
+from tools.search import SemanticSearchTool
+
+
+def test_resolve_defaults_full_and_explicit_lists():
+    assert resolve_columns(None, KB_COLUMNS) == KB_COLUMNS
+    assert resolve_columns(FULL, KB_COLUMNS) is None
+    assert resolve_columns("*", KB_COLUMNS) is None
+    assert resolve_columns("title", KB_COLUMNS) == ["title"]
+    assert resolve_columns(("id", "title"), None) == ["id", "title"]
+
+
+def test_render_quotes_identifiers():
+    assert render_columns(None) == "*"
+    assert render_columns(["id", "title"]) == "id, title"
+    assert "`" in render_columns(["odd name"])
+
+
+BODY_FIELDS = {"description", "body_storage_value"}
+
+
+def answer_with(row):
+    """The server returns the body columns only for SELECT *."""
+
+    def answer(sql):
+        if sql.upper().startswith("SELECT *"):
+            return [row]
+        return [{k: v for k, v in row.items() if k not in BODY_FIELDS}]
+
+    return answer
+
+
+def client(client_class, kb_name, pool):
+    instance = client_class.__new__(client_class)
+    instance.search_tool = SemanticSearchTool(kb_name=kb_name, pool=pool)
+    return instance
+
+
+def test_detail_queries_return_body_fields(fake_pool):
+    jira_row = {"id": "1", "key": "PAY-1", "description": "Steps"}
+    zendesk_row = {"id": 7, "subject": "401", "description": "Hi"}
+    page_row = {
+        "id": "9",
+        "status": "current",
+        "title": "Keys",
+        "spaceId": "1",
+        "body_storage_value": "<p>Rotate</p>",
+    }
+    jira = client(JiraClient, "jira_kb", fake_pool(answer_with(jira_row)))
+    zendesk = client(ZendeskClient, "zendesk_kb", fake_pool(answer_with(zendesk_row)))
+    confluence = client(
+        ConfluenceClient, "confluence_kb", fake_pool(answer_with(page_row))
+    )
+
+    assert jira.query_tickets({"status": "Done"})[0].description == "Steps"
+    assert zendesk.query_tickets({"status": "open"})[0]["description"] == "Hi"
+    page = asyncio.run(confluence.aquery_pages({"title": "Keys"}, as_models=True))[0]
+    assert page.body_storage_value == "<p>Rotate</p>"
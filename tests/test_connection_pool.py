@@ -0,0 +1,148 @@
+"""Tests for the shared MindsDB connection pool."""
+
+import os
+import sys
+import threading
+
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from tools import connection
+from tools.connection import MindsDBConnectionPool, get_pool
+
+
+class FakeServer:
+    def __init__(self, number):
+        self.number = number
+        self.healthy = True
+        self.checks = 0
+
+    def query(self, sql):
+        assert sql == "SELECT 1"
+        self.checks += 1
+        if not self.healthy:
+            raise ConnectionError("server went away")
+        return type("Query", (), {"fetch": lambda self: None})()
+
+
+@pytest.fixture
+def servers(monkeypatch):
+    """Every server the pool connects, in connection order."""
+    created = []
+
+    def connect(url, **kwargs):
+        created.append(FakeServer(len(created)))
+        return created[-1]
+
+    monkeypatch.setattr(connection.mindsdb_sdk, "connect", connect)
+    return created
+
+
+def test_connections_are_created_lazily_and_reused_lifo(servers):
+    pool = MindsDBConnectionPool(size=3)
+    assert servers == []
+
+    with pool.connection() as first:
+        with pool.connection() as second:
+            assert first is not second
+    assert len(servers) == 2
+
+    # The most recently returned connection is handed out first
+    with pool.connection() as server:
+        assert server is first
+    with pool.connection() as server:
+        assert server is first
+    assert len(servers) == 2
+    # Fresh connections aren't health-checked
+    assert [server.checks for server in servers] == [0, 0]
+
+
+def test_exhausted_pool_times_out_until_a_connection_returns(servers):
+    pool = MindsDBConnectionPool(size=1, timeout=0.05)
+
+    with pool.connection():
+        with pytest.raises(TimeoutError, match="pool size 1"):
+            with pool.connection():
+                pass
+
+    released = threading.Event()
+
+    def hold():
+        with pool.connection():
+            released.wait(1)
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    pool.timeout = 1
+    threading.Timer(0.05, released.set).start()
+    with pool.connection() as server:
+        assert server is servers[0]
+    holder.join()
+
+
+def test_idle_connections_failing_the_keepalive_are_replaced(servers):
+    pool = MindsDBConnectionPool(size=2, keepalive=0)
+    with pool.connection():
+        pass
+
+    with pool.connection() as server:
+        assert server is servers[0]
+    assert servers[0].checks == 1
+
+    servers[0].healthy = False
+    with pool.connection() as server:
+        assert server is servers[1]
+    # The dead connection isn't returned to the pool
+    with pool.connection() as server:
+        assert server is servers[1]
+    assert len(servers) == 2
+
+
+def test_connections_whose_use_raised_are_checked_before_reuse(servers, monkeypatch):
+    pool = MindsDBConnectionPool(size=1, keepalive=3600)
+
+    with pytest.raises(RuntimeError):
+        with pool.connection():
+            raise RuntimeError("query failed")
+
+    servers[0].healthy = False
+    with pool.connection() as server:
+        assert server is servers[1]
+
+    # A failed connect gives the slot back
+    def refuse(url, **kwargs):
+        raise ConnectionError("refused")
+
+    monkeypatch.setattr(connection.mindsdb_sdk, "connect", refuse)
+    pool.close()
+    with pytest.raises(ConnectionError):
+        with pool.connection():
+            pass
+    pool.timeout = 0.05
+    with pytest.raises(ConnectionError):
+        with pool.connection():
+            pass
+
+
+def test_pool_size_must_be_positive():
+    with pytest.raises(ValueError):
+        MindsDBConnectionPool(size=0)
+
+
+def test_get_pool_returns_one_pool_per_process(servers, monkeypatch):
+    monkeypatch.setattr(connection, "_pool", None)
+
+    pools = []
+    threads = [
+        threading.Thread(target=lambda: pools.append(get_pool())) for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({id(pool) for pool in pools}) == 1
+    assert get_pool() is pools[0]
+    assert servers == []
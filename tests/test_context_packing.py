@@ -0,0 +1,70 @@
+"""Tests for token-budgeted context packing."""
+
+import os
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from tools.context import Tokenizer, html_to_text, pack_results
+
+# Character estimate; no BPE download needed
+TOKENIZER = Tokenizer(encoding=None)
+
+
+def test_confluence_storage_html_becomes_text():
+    storage = (
+        "<h2>Reset MFA</h2><p>Open <strong>Settings</strong> &amp; click "
+        '<ac:link><ri:page ri:content-title="MFA" /></ac:link> reset.</p>'
+        "<ul><li>Step one</li><li>Step two</li></ul>"
+    )
+
+    text = html_to_text(storage)
+
+    assert "<" not in text
+    assert "Settings & click" in text
+    assert text.splitlines()[0] == "Reset MFA"
+    assert "Step one\nStep two" in text
+
+
+def test_unused_fields_are_stripped():
+    row = {
+        "id": "42",
+        "chunk_id": "42:description:0",
+        "chunk_content": "Login fails after password reset",
+        "metadata": '{"status": "open", "url": "https://z/42", "_chunk_index": 0}',
+        "distance": 0.12,
+        "relevance": 0.9,
+        "fused_score": 0.016,
+        "source": "zendesk",
+        "score": 1.0,
+        "assignee_id": None,
+    }
+
+    text = pack_results([row], tokenizer=TOKENIZER).text
+
+    assert text.startswith("[1] ")
+    for kept in ("id: 42", "status: open", "url: https://z/42", "source: zendesk"):
+        assert kept in text
+    for dropped in ("chunk_id", "distance", "fused_score", "_chunk_index", "assignee"):
+        assert dropped not in text
+    assert text.endswith("Login fails after password reset")
+
+
+def test_budget_is_filled_in_rank_order():
+    big = {"id": "1", "chunk_content": "x" * 4000}
+    small = [{"id": str(i), "chunk_content": f"short note {i}"} for i in range(2, 6)]
+
+    packed = pack_results(
+        [big] + small, budget=120, chunk_tokens=100, tokenizer=TOKENIZER
+    )
+
+    # The truncated first result fits, then as many of the rest as possible
+    assert packed.text.startswith("[1] id: 1\n" + "x" * 10)
+    assert "…" in packed.text
+    assert packed.tokens <= 120
+    assert packed.included + packed.dropped == 5
+    assert packed.dropped > 0
+
+    unbounded = pack_results([big] + small, budget=10_000, tokenizer=TOKENIZER)
+    assert unbounded.included == 5
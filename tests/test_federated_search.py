@@ -0,0 +1,144 @@
+"""Tests for cross-KB result fusion."""
+
+import asyncio
+import os
+import sys
+import time
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from tools.federated import FederatedSearch, fuse_results, normalize_scores
+
+
+def test_normalize_prefers_relevance_then_distance():
+    assert normalize_scores([{"relevance": 0.9}, {"relevance": 0.3}]) == [1.0, 0.0]
+    # Smaller distance means more similar
+    assert normalize_scores([{"distance": 0.1}, {"distance": 0.9}]) == [1.0, 0.0]
+
+
+def test_rrf_interleaves_sources_and_tags_results():
+    fused = fuse_results(
+        {
+            "jira": [{"id": "J1", "relevance": 0.9}, {"id": "J2", "relevance": 0.5}],
+            "zendesk": [{"id": "Z1", "relevance": 0.4}],
+        },
+        top_k=3,
+    )
+
+    assert [row["id"] for row in fused][:2] in (["J1", "Z1"], ["Z1", "J1"])
+    assert fused[-1]["id"] == "J2"
+    assert {row["source"] for row in fused} == {"jira", "zendesk"}
+
+
+def test_chunks_of_the_same_document_are_deduplicated():
+    fused = fuse_results(
+        {
+            "confluence": [
+                {"id": "P1", "chunk_id": "P1:0", "relevance": 0.9},
+                {"id": "P1", "chunk_id": "P1:1", "relevance": 0.8},
+                {"id": "P2", "chunk_id": "P2:0", "relevance": 0.1},
+            ]
+        }
+    )
+
+    assert [row["chunk_id"] for row in fused] == ["P1:0", "P2:0"]
+
+
+def test_score_fusion_respects_weights_and_top_k():
+    fused = fuse_results(
+        {
+            "jira": [{"id": "J1", "relevance": 0.9}, {"id": "J2", "relevance": 0.1}],
+            "zendesk": [{"id": "Z1", "relevance": 0.9}, {"id": "Z2", "relevance": 0.1}],
+        },
+        top_k=1,
+        method="score",
+        weights={"zendesk": 2.0},
+    )
+
+    assert [row["id"] for row in fused] == ["Z1"]
+
+
+class FakeTool:
+    """Search tool that answers after a delay, or fails."""
+
+    def __init__(self, delay, fail=False):
+        self.delay, self.fail = delay, fail
+
+    def _result(self):
+        if self.fail:
+            raise RuntimeError("unavailable")
+        return [{"id": str(self.delay), "relevance": 0.5}]
+
+    def search(self, **kwargs):
+        time.sleep(self.delay)
+        return self._result()
+
+    async def asearch(self, **kwargs):
+        await asyncio.sleep(self.delay)
+        return self._result()
+
+
+def federated():
+    return FederatedSearch(
+        tools={
+            "jira": FakeTool(0.2),
+            "zendesk": FakeTool(0.0, fail=True),
+            "confluence": FakeTool(5.0),
+        },
+        timeouts={"confluence": 0.3},
+    )
+
+
+def test_sources_are_reported_as_they_finish():
+    finished = []
+    outcome = federated().search(
+        "login", on_result=lambda source, result: finished.append(source)
+    )
+
+    assert finished == ["zendesk", "jira", "confluence"]
+    assert set(outcome.errors) == {"zendesk", "confluence"}
+    assert outcome.errors["confluence"] == "timed out after 0.3s"
+    assert [row["source"] for row in outcome.results] == ["jira"]
+
+
+def test_async_sources_are_reported_as_they_finish():
+    finished = []
+    outcome = asyncio.run(
+        federated().asearch(
+            "login", on_result=lambda source, result: finished.append(source)
+        )
+    )
+
+    assert finished == ["zendesk", "jira", "confluence"]
+    assert outcome.errors["confluence"] == "timed out after 0.3s"
+    assert [row["source"] for row in outcome.results] == ["jira"]
+
+
+def test_started_searches_keep_only_the_collected_sources():
+    search = FederatedSearch(
+        tools={
+            "jira": FakeTool(0.1),
+            "zendesk": FakeTool(0.1),
+            "confluence": FakeTool(5.0),
+        }
+    )
+    pending = search.start("login")
+    time.sleep(0.15)
+
+    started = time.monotonic()
+    outcome = search.collect(pending, sources=["jira"])
+
+    # jira finished while the caller was busy, the others are discarded
+    assert time.monotonic() - started < 0.1
+    assert [row["source"] for row in outcome.results] == ["jira"]
+    assert outcome.errors == {}
+
+
+def test_async_collect_of_started_searches():
+    search = federated()
+    pending = search.start("login")
+    outcome = asyncio.run(search.acollect(pending, sources=["jira", "confluence"]))
+
+    assert [row["source"] for row in outcome.results] == ["jira"]
+    assert outcome.errors == {"confluence": "timed out after 0.3s"}
@@ -0,0 +1,52 @@
+"""Tests for the incremental ingestion manifest."""
+
+import os
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.kb_manifest import KBManifest, row_hash
+
+
+def test_row_hash_only_covers_ingested_columns():
+    row = {"id": 1, "subject": "Login fails", "views": 10}
+    columns = ["id", "subject"]
+
+    assert row_hash(row, columns) == row_hash({**row, "views": 11}, columns)
+    assert row_hash(row, columns) != row_hash({**row, "subject": "Login ok"}, columns)
+    assert row_hash({"id": 1, "subject": float("nan")}, columns) == row_hash(
+        {"id": 1}, columns
+    )
+
+
+def test_manifest_records_forgets_and_clears_per_kb(tmp_path):
+    manifest = KBManifest(path=str(tmp_path / "manifest.sqlite"))
+
+    manifest.record("jira_kb", [("1", "a", None), ("2", "b", None)])
+    manifest.record("zendesk_kb", [("1", "c", "2024-01-01")])
+    manifest.record("jira_kb", [("2", "b2", None)])
+    manifest.forget("jira_kb", ["1"])
+
+    assert manifest.hashes("jira_kb") == {"2": "b2"}
+    manifest.clear("jira_kb")
+    assert manifest.count("jira_kb") == 0
+    assert manifest.count("zendesk_kb") == 1
+
+
+def test_checkpoints_keep_the_key_type_and_completion(tmp_path):
+    manifest = KBManifest(path=str(tmp_path / "manifest.sqlite"))
+
+    assert manifest.checkpoint("zendesk_kb") is None
+    manifest.start_load("zendesk_kb")
+    manifest.advance("zendesk_kb", 1200, rows=50)
+
+    checkpoint = manifest.checkpoint("zendesk_kb")
+    assert checkpoint["last_key"] == 1200
+    assert checkpoint["rows"] == 50
+    assert not checkpoint["completed"]
+
+    manifest.finish_load("zendesk_kb", rows=80)
+    assert manifest.checkpoint("zendesk_kb")["completed"]
+    manifest.clear("zendesk_kb")
+    assert manifest.checkpoint("zendesk_kb") is None
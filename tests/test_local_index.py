@@ -0,0 +1,136 @@
+"""Tests for the in-process KB vector mirror."""
+
+import json
+import os
+import re
+import sys
+
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from tools.kb_layouts import KB_LAYOUTS, KB_STORAGE_TABLES
+from tools.local_index import LocalVectorIndex
+from tools.search import SemanticSearchTool
+
+CHUNKS = {
+    "1:body:0": ("reset your password", [1.0, 0.0, 0.0], {"spaceId": "SOP"}),
+    "2:body:0": ("configure two factor", [0.0, 1.0, 0.0], {"spaceId": "SOP"}),
+    "3:body:0": ("vacation policy", [0.0, 0.0, 1.0], {"spaceId": "HR"}),
+}
+
+
+class Storage:
+    """Answers the signature and chunk queries against the storage table."""
+
+    def __init__(self):
+        self.chunks = dict(CHUNKS)
+        self.fetched = []
+
+    def __call__(self, sql):
+        rows = []
+        if "md5(" in sql:
+            for chunk_id, (content, vector, meta) in self.chunks.items():
+                signature = json.dumps([content, vector, meta])
+                rows.append({"id": chunk_id, "signature": signature})
+        else:
+            for chunk_id in re.findall(r"'([^']+)'", sql.split("IN (", 1)[1]):
+                content, vector, meta = self.chunks[chunk_id]
+                self.fetched.append(chunk_id)
+                rows.append(
+                    {
+                        "id": chunk_id,
+                        "content": content,
+                        "embeddings": json.dumps(vector),
+                        "metadata": json.dumps(meta),
+                    }
+                )
+        return rows
+
+
+def embed(text):
+    return [2.0, 0.1, 0.0] if "password" in text else [0.0, 0.1, 2.0]
+
+
+@pytest.fixture
+def make_index(tmp_path, fake_pool):
+    def make(**kwargs):
+        return LocalVectorIndex(
+            "confluence_kb",
+            embed_fn=embed,
+            pool=fake_pool(Storage()),
+            path=str(tmp_path),
+            **kwargs,
+        )
+
+    return make
+
+
+def test_search_ranks_and_prefilters(make_index):
+    index = make_index()
+    index.sync()
+
+    results = index.search("password help", top_k=2, hybrid_search=False)
+    assert [row["chunk_id"] for row in results] == ["1:body:0", "2:body:0"]
+    assert results[0]["id"] == "1:body:0"
+    assert results[0]["distance"] < results[1]["distance"]
+
+    results = index.search("vacation", filters={"spaceId": "SOP"}, top_k=5)
+    assert {row["metadata"]["spaceId"] for row in results} == {"SOP"}
+
+    like = {"spaceId": {"operator": "LIKE", "value": "h%"}}
+    assert [r["chunk_id"] for r in index.search("x", filters=like)] == ["3:body:0"]
+
+
+def test_unsupported_filters_and_stale_mirrors_fall_back(make_index):
+    index = make_index(max_age=60)
+    # Not synced yet (a background sync starts)
+    assert index.search("password") is None
+
+    index.sync()
+    ranged = {"createdAt": {"operator": "RANGE", "gte": "2024-01-01"}}
+    assert index.search("password", filters=ranged) is None
+    assert index.search("password", columns=["title"]) is None
+
+    index.mark_stale()
+    assert index.search("password") is None
+
+
+def test_sync_is_incremental_and_persisted(make_index):
+    index = make_index()
+    index.sync()
+    storage = index.pool.server.answer
+    storage.fetched.clear()
+
+    storage.chunks["2:body:0"] = ("configure 2fa", [0.0, 1.0, 0.0], {"spaceId": "SOP"})
+    del storage.chunks["3:body:0"]
+    index.sync()
+
+    assert storage.fetched == ["2:body:0"]
+    reloaded = make_index()
+    assert reloaded.is_fresh()
+    assert reloaded._snapshot.chunk_ids == ["1:body:0", "2:body:0"]
+    assert reloaded._snapshot.contents[1] == "configure 2fa"
+
+
+def test_search_tool_serves_from_the_mirror(make_index, fake_pool):
+    index = make_index()
+    index.sync()
+    tool = SemanticSearchTool(
+        kb_name="confluence_kb", pool=fake_pool(), cache=None, local_index=index
+    )
+
+    results = tool.search("password", top_k=1)
+
+    assert results[0]["chunk_content"] == "reset your password"
+    assert index.hits == 1
+
+
+def test_storage_tables_follow_the_kb_layouts():
+    assert KB_STORAGE_TABLES == {
+        "confluence_kb": ("pgvector_datasource", "pages"),
+        "jira_kb": ("pgvector_datasource", "jira_content"),
+        "zendesk_kb": ("pgvector_datasource", "zendesk_tickets"),
+    }
+    assert set(KB_STORAGE_TABLES) == set(KB_LAYOUTS)
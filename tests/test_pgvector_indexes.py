@@ -0,0 +1,117 @@
+"""Tests for pgvector index management."""
+
+import os
+import sys
+
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils import pgvector_indexes
+from utils.pgvector_indexes import (
+    ann_index_sql,
+    ensure_kb_indexes,
+    ivfflat_lists,
+    metadata_index_sql,
+)
+
+
+def native(sql):
+    """Native Postgres statement inside a pgvector_datasource (...) query."""
+    return sql.split("(", 1)[1].rsplit(")", 1)[0]
+
+
+def statements(server):
+    return [native(sql) for sql in server.queries]
+
+
+def probes(dims=1536, column_type="vector", rows=5000, version="0.8.0"):
+    """Answers the dimension/type/count/version probes; other SQL gets no rows."""
+    answers = {
+        "vector_dims": dims,
+        "format_type": column_type,
+        "count(*)": rows,
+        "extversion": version,
+    }
+
+    def answer(sql):
+        for probe, value in answers.items():
+            if native(sql).startswith(f"SELECT {probe}"):
+                return [] if value is None else [[value]]
+        return []
+
+    return answer
+
+
+@pytest.fixture
+def connect(fake_server, monkeypatch):
+    """Points mindsdb_sdk.connect at a fake server answering the probes."""
+
+    def patch(**answers):
+        server = fake_server(probes(**answers))
+        monkeypatch.setattr(pgvector_indexes.mindsdb_sdk, "connect", lambda: server)
+        return server
+
+    return patch
+
+
+def test_index_sql():
+    assert "USING hnsw (embeddings vector_cosine_ops) WITH (m = 16" in (
+        ann_index_sql("pages", "hnsw")
+    )
+    assert "lists = 50" in ann_index_sql("pages", "ivfflat", rows=50_000)
+    assert "USING hnsw ((embeddings::halfvec(3072)) halfvec_cosine_ops)" in (
+        ann_index_sql("pages", "hnsw", dims=3072)
+    )
+    assert "(embeddings::halfvec(3072)) halfvec_cosine_ops" in (
+        ann_index_sql("pages", "ivfflat", rows=50_000, dims=3072)
+    )
+    assert ivfflat_lists(10) == 1
+    assert ivfflat_lists(4_000_000) == 2000
+
+    assert metadata_index_sql("jira_content", "status").endswith(
+        "ON jira_content ((metadata->>'status'))"
+    )
+    assert "text_pattern_ops" in metadata_index_sql("pages", "title")
+
+
+def test_ensure_kb_indexes_fixes_dimension_and_creates_hnsw(connect):
+    server = connect()
+
+    ensure_kb_indexes("zendesk_kb", "hnsw")
+
+    sql = "\n".join(statements(server))
+    assert "zendesk_tickets_status_idx" in sql
+    assert "ALTER COLUMN embeddings TYPE vector(1536)" in sql
+    assert "DROP INDEX IF EXISTS zendesk_tickets_embeddings_ivfflat_idx" in sql
+    assert "DROP INDEX IF EXISTS zendesk_tickets_embeddings_hnsw_idx" not in sql
+    assert statements(server)[-1].startswith(
+        "CREATE INDEX IF NOT EXISTS zendesk_tickets_embeddings_hnsw_idx"
+    )
+
+
+def test_ensure_kb_indexes_uses_halfvec_above_2000_dimensions(connect):
+    server = connect(dims=3072)
+
+    ensure_kb_indexes("confluence_kb", "hnsw")
+
+    sql = statements(server)
+    assert "ALTER COLUMN embeddings TYPE vector(3072)" in "\n".join(sql)
+    assert sql[-1].startswith("CREATE INDEX IF NOT EXISTS pages_embeddings_hnsw_idx")
+    assert "((embeddings::halfvec(3072)) halfvec_cosine_ops)" in sql[-1]
+
+
+def test_ensure_kb_indexes_skips_unindexable_tables(connect):
+    for answers in (
+        {"dims": None},
+        {"dims": 5000},
+        {"dims": 3072, "version": "0.6.2"},
+    ):
+        server = connect(**answers)
+
+        ensure_kb_indexes("confluence_kb", "hnsw")
+
+        # Metadata indexes are still created
+        assert any("pages_spaceid_idx" in sql for sql in statements(server))
+        assert not any("USING hnsw" in sql for sql in statements(server))
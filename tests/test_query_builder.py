@@ -0,0 +1,101 @@
+"""Tests for the knowledge base SQL query builder."""
+
+import os
+import sys
+
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from mindsdb_sql_parser import parse_sql
+
+from tools.query_builder import (
+    compile_search,
+    compile_select,
+    quote_literal,
+    template_cache_info,
+)
+
+
+def test_quotes_and_backslashes_are_escaped():
+    query = compile_search("jira_kb", content="customer's path C:\\", top_k=5)
+
+    parsed = parse_sql(query.sql)
+    assert parsed.where.args[1].value == "customer's path C:\\"
+    assert quote_literal("it's") == "'it''s'"
+    assert quote_literal(True) == "true"
+    assert quote_literal(None) == "NULL"
+
+
+def test_backslashes_reach_mindsdb_unchanged():
+    for content in (
+        "C:\\Users\\admin",
+        "regex \\d+ and \\\\server",
+        "escaped \\' quote",
+        "\\\\' OR 1=1 --",
+    ):
+        query = compile_search("jira_kb", content=content, top_k=5)
+        condition = parse_sql(query.sql).where
+        assert condition.args[1].value == content
+
+
+def test_all_operators_and_or_groups_compile():
+    query = compile_search(
+        "zendesk_kb",
+        content="refund",
+        filters={
+            "status": "open",
+            "tags": {"operator": "LIKE", "value": "%billing%"},
+            "created_at": {
+                "operator": "BETWEEN",
+                "start": "2024-01-01",
+                "end": "2024-02-01",
+            },
+            "priority": {"operator": "IN", "values": ["high", "urgent"]},
+            "assignee_id": {"operator": "NOT_NULL"},
+            "score": {"operator": "RANGE", "gte": 1, "lt": 5},
+            "$or": [{"brand_id": 1}, {"type": "incident", "via": None}],
+        },
+        top_k=5,
+        hybrid_search=True,
+        hybrid_search_alpha=0.7,
+    )
+
+    assert query.sql == (
+        "SELECT * FROM zendesk_kb WHERE content = 'refund'"
+        " AND ((brand_id = 1) OR (type = 'incident' AND via IS NULL))"
+        " AND assignee_id IS NOT NULL"
+        " AND created_at BETWEEN '2024-01-01' AND '2024-02-01'"
+        " AND priority IN ('high', 'urgent')"
+        " AND score >= 1 AND score < 5"
+        " AND status = 'open' AND tags LIKE '%billing%'"
+        " AND hybrid_search = true AND hybrid_search_alpha = 0.7 LIMIT 5"
+    )
+    parse_sql(query.sql)
+
+
+def test_equivalent_filters_share_one_template():
+    before = template_cache_info().hits
+    first = compile_search("jira_kb", content="a", filters={"x": 1, "y": 2})
+    second = compile_search("jira_kb", content="b", filters={"y": 3, "x": 4})
+
+    assert first.template == second.template
+    assert template_cache_info().hits > before
+    assert (
+        compile_search("jira_kb", filters={"y": 2, "x": 1}).sql
+        == compile_search("jira_kb", filters={"x": 1, "y": 2}).sql
+    )
+
+
+def test_select_projects_columns_and_rejects_unknown_operators():
+    query = compile_select(
+        "confluence_datasource", "pages", {"spaceKey": "SOP"}, ["id", "title"], 10
+    )
+
+    assert query.sql == (
+        "SELECT id, title FROM confluence_datasource.pages"
+        " WHERE spaceKey = 'SOP' LIMIT 10"
+    )
+    with pytest.raises(ValueError):
+        compile_search("jira_kb", filters={"a": {"operator": "REGEXP", "value": "x"}})
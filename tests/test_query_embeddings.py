@@ -0,0 +1,170 @@
+"""Tests for the query embedding cache and the precomputed-vector search path."""
+
+import os
+import sys
+import threading
+import time
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from tools.cache import InMemoryResultCache, make_cache_key
+from tools.columns import KB_COLUMNS
+from tools.embeddings import QueryEmbeddingCache
+from tools.query_builder import compile_vector_search, vector_filters_supported
+from tools.search import VECTOR_CACHE_PREFIX, SemanticSearchTool
+
+
+class CountingEmbedder:
+    def __init__(self, delay=0.0):
+        self.calls = []
+        self.delay = delay
+
+    def __call__(self, text):
+        self.calls.append(text)
+        time.sleep(self.delay)
+        return [float(len(text)), 1.0, 0.5]
+
+
+def test_same_normalized_text_is_embedded_once():
+    embed = CountingEmbedder()
+    cache = QueryEmbeddingCache(embed, "openai/test", path=None)
+
+    first = cache.embed("Reset  Password")
+    second = cache.embed("reset password")
+
+    assert embed.calls == ["Reset  Password"]
+    assert first is second
+    assert cache.stats() == {"hits": 1, "misses": 1, "size": 1}
+
+
+def test_concurrent_fan_out_shares_one_call():
+    embed = CountingEmbedder(delay=0.05)
+    cache = QueryEmbeddingCache(embed, "openai/test", path=None)
+
+    threads = [threading.Thread(target=cache.embed, args=("sso",)) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert embed.calls == ["sso"]
+
+
+def test_disk_persistence_is_per_model(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite")
+    QueryEmbeddingCache(CountingEmbedder(), "openai/a", path=path).embed("vpn")
+
+    embed = CountingEmbedder()
+    QueryEmbeddingCache(embed, "openai/a", path=path).embed("vpn")
+    assert embed.calls == []
+
+    QueryEmbeddingCache(embed, "openai/b", path=path).embed("vpn")
+    assert embed.calls == ["vpn"]
+
+
+def test_compile_vector_search_escapes_for_postgres():
+    sql = compile_vector_search(
+        "jira_content", [0.5, 0.25], {"status": "won't fix", "priority": None}, 3
+    )
+
+    assert "embeddings <=> '[0.5,0.25]' AS distance FROM jira_content" in sql
+    assert "(metadata->>'priority') IS NULL" in sql
+    assert "(metadata->>'status') = 'won''t fix'" in sql
+    assert sql.endswith("ORDER BY distance LIMIT 3")
+    assert not vector_filters_supported({"created": {"operator": ">", "value": 1}})
+
+    # Above 2000 dimensions the search orders by the halfvec index expression
+    sql = compile_vector_search("pages", [0.5] * 3072, top_k=3)
+    assert "(embeddings::halfvec(3072)) <=> '[" in sql
+    assert "]'::halfvec(3072) AS distance FROM pages" in sql
+
+
+def storage(dims=3):
+    """Answers the dimension probe and pgvector searches on the storage table."""
+
+    def answer(sql):
+        if "vector_dims(" in sql:
+            return [[dims]]
+        return [
+            {
+                "id": "7:description:0",
+                "content": "reset steps",
+                "metadata": '{"_original_doc_id": "7", "status": "open"}',
+                "distance": 0.2,
+            }
+        ]
+
+    return answer
+
+
+def vector_tool(pool, embed=None, cache=None):
+    return SemanticSearchTool(
+        kb_name="zendesk_kb",
+        pool=pool,
+        cache=cache if cache is not None else InMemoryResultCache(),
+        vector_search=True,
+        embedder=QueryEmbeddingCache(
+            embed or CountingEmbedder(), "openai/test", path=None
+        ),
+    )
+
+
+def test_vector_search_path_embeds_locally_and_queries_pgvector(fake_pool):
+    embed = CountingEmbedder()
+    pool = fake_pool(storage())
+    tool = vector_tool(pool, embed)
+
+    results = tool.search(
+        "reset", filters={"status": "open"}, top_k=2, hybrid_search=False
+    )
+
+    assert embed.calls == ["reset"]
+    assert "vector_dims(embeddings) FROM zendesk_tickets" in pool.server.queries[0]
+    assert pool.server.queries[1].startswith("SELECT * FROM pgvector_datasource (")
+    assert results[0]["id"] == "7"
+    assert results[0]["metadata"]["status"] == "open"
+
+    # Filters pgvector can't express go through the KB, which embeds itself
+    ranged = {"created_at": {"operator": "RANGE", "gte": "2024-01-01"}}
+    tool.search("reset", filters=ranged, hybrid_search=False)
+    assert "FROM zendesk_kb" in pool.server.queries[-1]
+    # So do hybrid searches, which need its keyword blending and reranking
+    tool.search("reset", hybrid_search=True)
+    assert "hybrid_search = true" in pool.server.queries[-1]
+    assert embed.calls == ["reset"]
+
+
+def test_vector_path_is_opt_in_and_cached_under_its_own_key(fake_pool):
+    assert not SemanticSearchTool(kb_name="jira_kb", pool=fake_pool()).vector_search
+
+    pool = fake_pool(storage())
+    cache = InMemoryResultCache()
+    tool = vector_tool(pool, cache=cache)
+    tool.search("reset", hybrid_search=False)
+    tool.search("reset", hybrid_search=False)
+    assert len(pool.server.queries) == 2
+
+    semantic_key = make_cache_key(
+        "zendesk_kb", "reset", None, 5, False, 0.5, KB_COLUMNS
+    )
+    assert cache.get(semantic_key) is None
+    assert cache.get(VECTOR_CACHE_PREFIX + semantic_key) is not None
+
+
+def test_vector_path_falls_back_to_the_kb(fake_pool):
+    # The local model doesn't match the KB's (e.g. 3-small vs 3-large)
+    pool = fake_pool(storage(dims=3072))
+    tool = vector_tool(pool)
+    assert tool.search("reset", hybrid_search=False)
+    assert "FROM zendesk_kb" in pool.server.queries[-1]
+    assert not tool.vector_search
+
+    def broken(text):
+        raise RuntimeError("Missing credentials")
+
+    pool = fake_pool(storage())
+    tool = vector_tool(pool, embed=broken)
+    assert tool.search("reset", hybrid_search=False)
+    assert pool.server.queries == [pool.server.queries[-1]]
+    assert "FROM zendesk_kb" in pool.server.queries[-1]
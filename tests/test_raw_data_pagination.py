@@ -0,0 +1,64 @@
+"""Tests for paginated datasource reads."""
+
+import os
+import re
+import sys
+
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from tools.search import SemanticSearchTool
+
+ROWS = [{"id": i, "subject": f"ticket {i}"} for i in range(1, 26)]
+
+
+def paginate(sql):
+    """Answers keyset (id > N) and offset pages of ROWS."""
+    after = re.search(r"id > (\d+)", sql)
+    offset = re.search(r"OFFSET (\d+)", sql)
+    limit = int(re.search(r"LIMIT (\d+)", sql).group(1))
+    start = int(offset.group(1)) if offset else 0
+    rows = [row for row in ROWS if not after or row["id"] > int(after.group(1))]
+    return rows[start : start + limit]
+
+
+@pytest.fixture
+def tool(fake_pool):
+    return SemanticSearchTool(
+        kb_name="zendesk_kb", pool=fake_pool(paginate), cache=None
+    )
+
+
+def test_keyset_pagination_adds_the_key_column(tool):
+    pages = list(
+        tool.iter_raw_data(
+            "zendesk_datasource", "tickets", columns=["subject"], page_size=10
+        )
+    )
+
+    assert [len(page) for page in pages] == [10, 10, 5]
+    assert [row["id"] for page in pages for row in page] == list(range(1, 26))
+    assert tool.pool.server.queries[1] == (
+        "SELECT subject, id FROM zendesk_datasource.tickets"
+        " WHERE id > 10 ORDER BY id LIMIT 10"
+    )
+
+
+def test_offset_pagination_without_a_key(tool):
+    pages = list(
+        tool.iter_raw_data(
+            "zendesk_datasource", "tickets", columns="full", page_size=10, key=None
+        )
+    )
+
+    assert [len(page) for page in pages] == [10, 10, 5]
+    assert tool.pool.server.queries[-1].endswith("LIMIT 10 OFFSET 20")
+
+
+def test_pages_are_fetched_lazily(tool):
+    first = next(tool.iter_raw_data("zendesk_datasource", "tickets", page_size=10))
+
+    assert len(first) == 10
+    assert len(tool.pool.server.queries) == 1
@@ -0,0 +1,71 @@
+"""Tests for the local query router."""
+
+import os
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from tools.router import LocalRouter, keyword_route
+
+
+def routed(plan):
+    return sorted(
+        source for source in ("jira", "zendesk", "confluence") if plan[source]
+    )
+
+
+def test_named_systems_and_compare_are_certain():
+    decision = keyword_route("Any Jira issues or Zendesk tickets about 401 errors?")
+    assert routed(decision.plan) == ["jira", "zendesk"]
+    assert decision.confidence == 1.0
+
+    decision = keyword_route("compare login failures")
+    assert routed(decision.plan) == ["confluence", "jira", "zendesk"]
+
+
+def test_topic_words_are_a_hint_and_whole_words_only():
+    decision = keyword_route("Is there a policy for refunds?")
+    assert routed(decision.plan) == ["confluence"]
+    assert decision.confidence < 1.0
+
+    # A single topic word is too weak to skip the routing LLM
+    router = LocalRouter(log_path=None)
+    assert decision.confidence < router.threshold
+    assert router.route("Is there a policy for refunds?") is None
+
+    # 'debugging' must not match 'bug', 'docker' must not match 'doc'
+    assert keyword_route("debugging docker builds") is None
+
+
+def test_classifier_takes_over_after_enough_llm_decisions(tmp_path):
+    log_path = str(tmp_path / "routing_log.jsonl")
+    router = LocalRouter(log_path=log_path, min_examples=4)
+    query = "payments webhook returns 500 after deploy"
+    assert router.route(query) is None
+
+    plan = {"jira": True, "zendesk": False, "confluence": False}
+    for example in (
+        "payments webhook fails after deploy",
+        "webhook returns 500 for payments",
+        "500 errors from payments service",
+        "payments deploy broke webhook retries",
+    ):
+        router.record(example, plan)
+
+    decision = router.route(query)
+    assert decision.method == "classifier"
+    assert routed(decision.plan) == ["jira"]
+
+    # Logged decisions are reloaded on restart
+    restarted = LocalRouter(log_path=log_path, min_examples=4)
+    assert routed(restarted.route(query).plan) == ["jira"]
+    assert router.stats()["llm"] == 1
+
+
+def test_disagreeing_neighbours_defer_to_the_llm():
+    router = LocalRouter(log_path=None, min_examples=2)
+    router.record("sso login loop", {"jira": True, "zendesk": False})
+    router.record("sso login loop again", {"jira": False, "zendesk": True})
+
+    assert router.route("sso login loop") is None
@@ -0,0 +1,66 @@
+"""Tests for the routing plan cache."""
+
+import os
+import sys
+import time
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from tools.router import RoutingPlanCache
+
+PLAN = {"jira": True, "zendesk": False, "confluence": False, "reasoning": "bugs"}
+
+VECTORS = {
+    "payment api returns 401": [1.0, 0.0, 0.0],
+    "401 from the payment api": [0.99, 0.1, 0.0],
+    "refund policy": [0.0, 1.0, 0.0],
+}
+
+
+def embed(text):
+    return VECTORS[text]
+
+
+def test_normalized_queries_hit_exactly():
+    cache = RoutingPlanCache()
+    cache.set("Payment API returns 401", PLAN)
+
+    assert cache.get("  payment api   RETURNS 401 ") == PLAN
+    assert cache.get("refund policy") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_paraphrases_hit_by_embedding():
+    cache = RoutingPlanCache(embed, similarity=0.95)
+    cache.set("payment api returns 401", PLAN)
+
+    assert cache.get("401 from the payment api") == PLAN
+    assert cache.get("refund policy") is None
+    assert cache.stats()["similar_hits"] == 1
+
+
+def test_lru_eviction_and_ttl():
+    cache = RoutingPlanCache(max_entries=2)
+    cache.set("a", PLAN)
+    cache.set("b", PLAN)
+    cache.get("a")
+    cache.set("c", PLAN)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == PLAN
+    assert cache.stats()["evictions"] == 1
+
+    expiring = RoutingPlanCache(ttl=0.05)
+    expiring.set("a", PLAN)
+    time.sleep(0.1)
+    assert expiring.get("a") is None
+
+
+def test_cached_plans_are_copies():
+    cache = RoutingPlanCache()
+    cache.set("a", PLAN)
+    cache.get("a")["jira"] = False
+
+    assert cache.get("a")["jira"] is True
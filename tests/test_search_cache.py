@@ -0,0 +1,96 @@
+"""Tests for the knowledge base search result caches."""
+
+import os
+import sys
+import time
+
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from tools.cache import (
+    DEFAULT_CACHE_TTL,
+    KB_CACHE_TTLS,
+    REFRESH_CADENCES,
+    InMemoryResultCache,
+    SqliteResultCache,
+    cadence_seconds,
+    make_cache_key,
+)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def cache(request, tmp_path):
+    if request.param == "memory":
+        return InMemoryResultCache(max_entries=2)
+    return SqliteResultCache(path=str(tmp_path / "cache.sqlite"), max_entries=2)
+
+
+def test_ttls_follow_the_refresh_cadences():
+    assert cadence_seconds("30 minutes") == 30 * 60
+    assert cadence_seconds("5 minutes") == 5 * 60
+    assert cadence_seconds("1 day") == 24 * 60 * 60
+    assert cadence_seconds("hour") == 60 * 60
+    assert cadence_seconds("every tuesday") == DEFAULT_CACHE_TTL
+
+    for kb_name, cadence in REFRESH_CADENCES.items():
+        assert KB_CACHE_TTLS[kb_name] == cadence_seconds(cadence)
+
+
+def test_cache_key_is_normalized():
+    key = make_cache_key("jira_kb", "  Payment   API ", {"b": 1, "a": 2}, 5, True, 0.5)
+    same = make_cache_key("jira_kb", "payment api", {"a": 2, "b": 1}, 5, True, 0.5)
+    other = make_cache_key("jira_kb", "payment api", {"a": 2, "b": 1}, 10, True, 0.5)
+
+    assert key == same
+    assert key != other
+
+
+def test_hit_and_miss_counters(cache):
+    assert cache.get("q1") is None
+
+    cache.set("q1", "jira_kb", [{"id": "1"}], ttl=60)
+
+    assert cache.get("q1") == [{"id": "1"}]
+    assert cache.stats() == {"hits": 1, "misses": 1, "evictions": 0, "size": 1}
+
+
+def test_expired_entries_are_misses(cache):
+    cache.set("q1", "jira_kb", [{"id": "1"}], ttl=0.01)
+    time.sleep(0.02)
+
+    assert cache.get("q1") is None
+
+
+def test_least_recently_used_entry_is_evicted(cache):
+    cache.set("q1", "jira_kb", [{"id": "1"}], ttl=60)
+    time.sleep(0.01)
+    cache.set("q2", "jira_kb", [{"id": "2"}], ttl=60)
+    time.sleep(0.01)
+    cache.get("q1")
+    time.sleep(0.01)
+    cache.set("q3", "jira_kb", [{"id": "3"}], ttl=60)
+
+    assert cache.get("q2") is None
+    assert cache.get("q1") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_invalidate_only_drops_one_kb(cache):
+    cache.set("q1", "jira_kb", [{"id": "1"}], ttl=60)
+    cache.set("q2", "zendesk_kb", [{"id": "2"}], ttl=60)
+
+    cache.invalidate("jira_kb")
+
+    assert cache.get("q1") is None
+    assert cache.get("q2") == [{"id": "2"}]
+
+
+def test_cached_rows_are_not_shared_with_callers(cache):
+    results = [{"id": "1"}]
+    cache.set("q1", "jira_kb", results, ttl=60)
+    results[0]["source"] = "jira"
+    cache.get("q1")[0]["fused_score"] = 1.0
+
+    assert cache.get("q1") == [{"id": "1"}]
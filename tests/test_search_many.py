@@ -0,0 +1,59 @@
+"""Tests for batched knowledge base searches."""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from tools.search import SemanticSearchTool
+
+
+def echo(sql):
+    """Answers each KB search with one row naming its content; 'boom' fails."""
+    content = sql.split("content = '", 1)[1].split("'", 1)[0]
+    if content == "boom":
+        raise RuntimeError("KB unavailable")
+    return [{"id": content, "chunk_content": f"about {content}"}]
+
+
+@pytest.fixture
+def direct_tool(fake_pool):
+    return SemanticSearchTool(kb_name="jira_kb", pool=fake_pool(echo), direct=True)
+
+
+def test_results_follow_query_order_and_duplicates_run_once(direct_tool):
+    tool = direct_tool
+
+    results = tool.search_many(["vpn", "sso", "vpn", "mfa"], hybrid_search=False)
+
+    assert [rows[0]["id"] for rows in results] == ["vpn", "sso", "vpn", "mfa"]
+    assert len(tool.pool.server.queries) == 3
+    # Callers get their own lists even for duplicate queries
+    assert results[0] is not results[2]
+
+    results = asyncio.run(tool.asearch_many(["mfa", "vpn", "mfa"]))
+    assert [rows[0]["id"] for rows in results] == ["mfa", "vpn", "mfa"]
+
+
+def test_a_failing_query_raises_its_error(direct_tool):
+    tool = direct_tool
+
+    with pytest.raises(RuntimeError, match="KB unavailable"):
+        tool.search_many(["vpn", "boom", "sso"])
+    with pytest.raises(RuntimeError, match="KB unavailable"):
+        asyncio.run(tool.asearch_many(["vpn", "boom"]))
+
+
+def test_direct_tool_skips_cache_mirror_and_vector_path(direct_tool):
+    tool = direct_tool
+    assert tool.cache is None
+    assert tool.local_index is None
+    assert not tool.vector_search
+
+    tool.search_many(["vpn"])
+    tool.search_many(["vpn"])
+    assert len(tool.pool.server.queries) == 2
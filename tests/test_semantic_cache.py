@@ -0,0 +1,76 @@
+"""Tests for the semantic answer cache."""
+
+import os
+import sys
+import time
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from tools.semantic_cache import SemanticCache, invalidate_answers, query_identifiers
+
+VECTORS = {
+    "reset my password": [1.0, 0.0, 0.0],
+    "how do i reset my password": [0.99, 0.1, 0.0],
+    "payment api returns 401": [0.0, 1.0, 0.0],
+    "status of ticket 123": [0.0, 0.0, 1.0],
+    "status of ticket 124": [0.0, 0.01, 1.0],
+    "what is the status of ticket 123?": [0.0, 0.02, 1.0],
+}
+
+
+def embed(query):
+    return VECTORS[query]
+
+
+def test_similar_query_hits_with_provenance():
+    cache = SemanticCache(embed, threshold=0.95)
+    cache.add("reset my password", "Use the reset link", [{"id": "1"}], {"jira": True})
+
+    hit = cache.lookup("how do i reset my password")
+
+    assert hit["output"] == "Use the reset link"
+    assert hit["results"] == [{"id": "1"}]
+    assert hit["routing_plan"] == {"jira": True}
+    assert hit["provenance"]["matched_query"] == "reset my password"
+    assert hit["provenance"]["similarity"] >= 0.95
+
+
+def test_dissimilar_query_misses():
+    cache = SemanticCache(embed, threshold=0.95)
+    cache.add("reset my password", "Use the reset link", [])
+
+    assert cache.lookup("payment api returns 401") is None
+    assert cache.stats() == {"hits": 0, "misses": 1, "size": 1}
+
+
+def test_entries_are_bounded_by_size_and_age():
+    cache = SemanticCache(embed, max_entries=1, max_age=0.05)
+    cache.add("reset my password", "first", [])
+    cache.add("payment api returns 401", "second", [])
+
+    assert cache.lookup("reset my password") is None
+    assert cache.lookup("payment api returns 401")["output"] == "second"
+
+    time.sleep(0.06)
+    assert cache.lookup("payment api returns 401") is None
+
+
+def test_queries_about_different_identifiers_never_match():
+    assert query_identifiers("Is PAY-123 fixed in v2.4.1?") == {"pay-123", "v2.4.1"}
+
+    cache = SemanticCache(embed, threshold=0.95)
+    cache.add("status of ticket 123", "Ticket 123 is open", [])
+
+    assert cache.lookup("status of ticket 124") is None
+    hit = cache.lookup("what is the status of ticket 123?")
+    assert hit["output"] == "Ticket 123 is open"
+
+
+def test_kb_updates_drop_cached_answers():
+    cache = SemanticCache(embed)
+    cache.add("reset my password", "Use the reset link", [])
+
+    invalidate_answers()
+
+    assert cache.lookup("reset my password") is None
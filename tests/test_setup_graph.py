@@ -0,0 +1,64 @@
+"""Tests for the setup step runner."""
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.setup_graph import Step, run_steps
+
+
+def test_sequential_runs_in_dependency_order():
+    order = []
+    steps = [
+        Step("load", lambda: order.append("load"), ["create"]),
+        Step("create", lambda: order.append("create"), ["pgvector"]),
+        Step("pgvector", lambda: order.append("pgvector")),
+    ]
+
+    results = run_steps(steps)
+
+    assert order == ["pgvector", "create", "load"]
+    assert {result.status for result in results.values()} == {"ok"}
+
+
+def test_independent_steps_run_concurrently():
+    barrier = threading.Barrier(3, timeout=2)
+    steps = [Step(f"load_{i}", barrier.wait) for i in range(3)]
+
+    started = time.monotonic()
+    results = run_steps(steps, max_workers=3)
+
+    assert all(result.status == "ok" for result in results.values())
+    assert time.monotonic() - started < 2
+
+
+def test_failures_only_skip_dependent_steps():
+    def fail():
+        raise ValueError("Missing Jira credentials")
+
+    steps = [
+        Step("jira_datasource", fail),
+        Step("create_jira_kb", lambda: None, ["jira_datasource"]),
+        Step("load_jira_kb", lambda: None, ["create_jira_kb"]),
+        Step("create_zendesk_kb", lambda: None),
+    ]
+
+    results = run_steps(steps, max_workers=2)
+
+    assert results["jira_datasource"].status == "failed"
+    assert results["create_jira_kb"].status == "skipped"
+    assert results["load_jira_kb"].status == "skipped"
+    assert results["create_zendesk_kb"].status == "ok"
+
+
+def test_cycles_and_unknown_dependencies_are_rejected():
+    with pytest.raises(ValueError):
+        run_steps([Step("a", lambda: None, ["missing"])])
+    with pytest.raises(ValueError):
+        run_steps([Step("a", lambda: None, ["b"]), Step("b", lambda: None, ["a"])])
@@ -0,0 +1,125 @@
+"""Tests for the KB refresh jobs and their status report."""
+
+import os
+import subprocess
+import sys
+from datetime import datetime, timedelta, timezone
+
+# Add parent directory to path for imports
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from utils import setup_jobs
+from utils.setup_jobs import refresh_job_query
+
+
+def job_tables(jobs=None, runs=None):
+    """Answers mindsdb.jobs / jobs_history queries from rows keyed by job name."""
+
+    def answer(sql):
+        for table, by_name in (("jobs_history", runs or {}), ("jobs", jobs or {})):
+            if f"mindsdb.{table} " in sql:
+                name = sql.split("name = '", 1)[1].split("'", 1)[0]
+                return by_name.get(name, [])
+        return []
+
+    return answer
+
+
+def statements(server):
+    return [sql.strip() for sql in server.queries]
+
+
+def test_watermarked_jobs_only_select_changed_rows():
+    sql = refresh_job_query("zendesk_kb")
+
+    assert "CREATE JOB zendesk_refresh_job (" in sql
+    assert "insert into zendesk_kb" in sql
+    assert "from zendesk_datasource.tickets where updated_at > LAST;" in sql
+    assert sql.rstrip().endswith("EVERY 30 minutes;")
+
+    # The updated column is selected even when the KB doesn't ingest it
+    sql = refresh_job_query("confluence_kb")
+    assert "body_storage_value, version_createdAt from" in sql
+    assert "from confluence_datasource.pages where version_createdAt > LAST;" in sql
+    assert sql.rstrip().endswith("EVERY 1 day;")
+
+
+def test_sources_without_updated_column_are_fully_reinserted():
+    sql = refresh_job_query("jira_kb")
+
+    assert "select id, key, project_id," in sql
+    assert "summary, description from jira_datasource.issues;" in sql
+    assert "LAST" not in sql
+    assert (
+        refresh_job_query("jira_kb", "5 minutes").rstrip().endswith("EVERY 5 minutes;")
+    )
+
+
+def test_cadences_come_from_env():
+    script = (
+        "from tools.cache import KB_CACHE_TTLS\n"
+        "from utils.setup_jobs import refresh_job_query\n"
+        "print(refresh_job_query('jira_kb').split('EVERY')[1].strip())\n"
+        "print(KB_CACHE_TTLS['jira_kb'], KB_CACHE_TTLS['zendesk_kb'])\n"
+    )
+    env = {**os.environ, "JIRA_REFRESH_EVERY": "5 minutes"}
+    env.pop("ZENDESK_REFRESH_EVERY", None)
+    output = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.splitlines()
+
+    assert output[-2:] == ["5 minutes;", "300 1800"]
+
+
+def test_jobs_are_recreated(fake_server, monkeypatch, capsys):
+    server = fake_server(job_tables())
+    monkeypatch.setattr(setup_jobs.mindsdb_sdk, "connect", lambda: server)
+
+    setup_jobs.add_refresh_kb_jobs()
+
+    drops = [sql for sql in statements(server) if sql.startswith("DROP JOB")]
+    creates = [sql for sql in statements(server) if sql.startswith("CREATE JOB")]
+    assert drops == [
+        "DROP JOB IF EXISTS confluence_refresh_job",
+        "DROP JOB IF EXISTS jira_refresh_job",
+        "DROP JOB IF EXISTS zendesk_refresh_job",
+    ]
+    assert len(creates) == 3
+    assert "jira_refresh_job re-inserts every row" in capsys.readouterr().out
+
+
+def test_status_reports_runs_and_lag(fake_server, monkeypatch, capsys):
+    finished = datetime.now(timezone.utc) - timedelta(hours=1, minutes=5)
+    server = fake_server(
+        job_tables(
+            jobs={"jira_refresh_job": [{"next_run_at": "2024-01-01 10:30:00"}]},
+            runs={
+                "jira_refresh_job": [
+                    {"run_start": "10:00", "run_end": "10:01", "error": "timeout"},
+                    {
+                        "run_start": "09:30",
+                        "run_end": finished.isoformat(),
+                        "error": None,
+                    },
+                ]
+            },
+        )
+    )
+    monkeypatch.setattr(setup_jobs.mindsdb_sdk, "connect", lambda: server)
+
+    setup_jobs.job_status(history=2)
+
+    out = capsys.readouterr().out
+    assert "jira_refresh_job (every 30 minutes)" in out
+    assert "next run: 2024-01-01 10:30:00" in out
+    assert "10:00 -> 10:01  error: timeout" in out
+    assert "lag: 1h05m ago since last successful run" in out
+    # Jobs that don't exist are reported, not skipped
+    assert out.count("not scheduled") == 2
+    assert "LIMIT 2" in statements(server)[-1]
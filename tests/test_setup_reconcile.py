@@ -0,0 +1,100 @@
+"""Tests for the config diffs behind setup.py --mode reconcile."""
+
+import os
+import sys
+from types import SimpleNamespace
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.setup_datasource import datasource_config_diff
+from utils.setup_kb import (
+    KB_LAYOUTS,
+    desired_kb_params,
+    kb_config_diff,
+    reranking_diff,
+)
+
+
+def existing_kb(desired, storage_table="pages", **overrides):
+    """A KnowledgeBase-like object as the server would report it."""
+    storage = None
+    if storage_table:
+        storage = SimpleNamespace(
+            name=storage_table, db=SimpleNamespace(name="pgvector_datasource")
+        )
+    kb = {
+        # Keys come back masked and aren't part of the comparison
+        "embedding_model": {**desired["embedding_model"], "api_key": "******"},
+        "reranking_model": {**desired["reranking_model"], "api_key": "******"},
+        "metadata_columns": list(desired["metadata_columns"]),
+        "content_columns": list(desired["content_columns"]),
+        "id_column": desired["id_column"],
+        "storage": storage,
+    }
+    kb.update(overrides)
+    return SimpleNamespace(**kb)
+
+
+def test_unchanged_kb_is_kept():
+    desired = desired_kb_params("confluence_kb", "sk-new-key")
+    kb = existing_kb(desired)
+
+    assert kb_config_diff(kb, desired, "pages") == []
+    assert reranking_diff(kb, desired) == []
+
+
+def test_embedding_model_columns_and_storage_changes_are_detected():
+    desired = desired_kb_params("confluence_kb", "sk-test")
+
+    model = {**desired["embedding_model"], "model_name": "text-embedding-ada-002"}
+    assert kb_config_diff(existing_kb(desired, embedding_model=model), desired, "pages")
+
+    columns = KB_LAYOUTS["confluence_kb"]["metadata_columns"][:-1]
+    assert kb_config_diff(
+        existing_kb(desired, metadata_columns=columns), desired, "pages"
+    )
+
+    assert kb_config_diff(existing_kb(desired, storage_table="old"), desired, "pages")
+    assert kb_config_diff(existing_kb(desired, storage_table=None), desired, "pages")
+
+
+def test_embedding_model_as_json_string():
+    desired = desired_kb_params("jira_kb", "sk-test")
+    azure = desired_kb_params(
+        "jira_kb", None, {"api_key": "az", "endpoint": "https://example"}
+    )
+    kb = existing_kb(
+        desired,
+        storage_table="jira_content",
+        embedding_model='{"provider": "openai", "model_name": "text-embedding-3-small"}',
+    )
+
+    assert kb_config_diff(kb, desired, "jira_content") == []
+    assert kb_config_diff(kb, azure, "jira_content")
+
+
+def test_reranking_change_does_not_recreate():
+    desired = desired_kb_params("zendesk_kb", "sk-test")
+    model = {**desired["reranking_model"], "model_name": "gpt-4.1"}
+    kb = existing_kb(desired, storage_table="zendesk_tickets", reranking_model=model)
+
+    assert kb_config_diff(kb, desired, "zendesk_tickets") == []
+    assert reranking_diff(kb, desired)
+
+
+def test_datasource_diff_ignores_masked_secrets():
+    args = {"host": "db", "port": "5432", "user": "mindsdb", "password": "secret"}
+    db = SimpleNamespace(
+        engine="pgvector",
+        params='{"host": "db", "port": 5432, "user": "mindsdb", "password": "******"}',
+    )
+
+    assert datasource_config_diff(db, "pgvector", args) == []
+    assert datasource_config_diff(db, "postgres", args)
+    assert datasource_config_diff(db, "pgvector", {**args, "host": "other"})
+    assert datasource_config_diff(
+        SimpleNamespace(engine="pgvector", params={**args, "password": "old"}),
+        "pgvector",
+        args,
+    )
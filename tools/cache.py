@@ -0,0 +1,271 @@
+"""Result caches for knowledge base searches."""
+
+import os
+import pickle
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from tools.query_builder import compile_search
+
+# How often each KB's refresh job runs (MindsDB EVERY syntax); read here so
+# the jobs in utils/setup_jobs.py and the cache TTLs share one setting
+REFRESH_CADENCES = {
+    "jira_kb": os.getenv("JIRA_REFRESH_EVERY", "30 minutes"),
+    "zendesk_kb": os.getenv("ZENDESK_REFRESH_EVERY", "30 minutes"),
+    "confluence_kb": os.getenv("CONFLUENCE_REFRESH_EVERY", "1 day"),
+}
+DEFAULT_CACHE_TTL = 30 * 60
+
+_CADENCE = re.compile(r"^\s*(\d+)?\s*(second|minute|hour|day|week)s?\s*$", re.I)
+_CADENCE_SECONDS = {
+    "second": 1,
+    "minute": 60,
+    "hour": 60 * 60,
+    "day": 24 * 60 * 60,
+    "week": 7 * 24 * 60 * 60,
+}
+
+
+def cadence_seconds(cadence: str) -> float:
+    """'30 minutes' -> 1800; cadences that can't be read get DEFAULT_CACHE_TTL."""
+    match = _CADENCE.match(cadence or "")
+    if match is None:
+        return DEFAULT_CACHE_TTL
+    count, unit = match.groups()
+    return int(count or 1) * _CADENCE_SECONDS[unit.lower()]
+
+
+# Keep cached results no longer than one refresh of their KB
+KB_CACHE_TTLS = {
+    kb_name: cadence_seconds(cadence) for kb_name, cadence in REFRESH_CADENCES.items()
+}
+
+SEARCH_CACHE_BACKEND = os.getenv("SEARCH_CACHE_BACKEND", "memory")
+SEARCH_CACHE_PATH = os.getenv(
+    "SEARCH_CACHE_PATH", os.path.join(".cache", "search_cache.sqlite")
+)
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "1024"))
+
+
+def make_cache_key(
+    kb_name: str,
+    content: Optional[str],
+    filters: Optional[Dict],
+    top_k: int,
+    hybrid_search: bool,
+    hybrid_search_alpha: float,
+    columns: Optional[List[str]] = None,
+) -> str:
+    """
+    Build a canonical cache key for a knowledge base search.
+
+    The key is the compiled SQL of the search with its content lower-cased and
+    whitespace collapsed. The query builder sorts filters, so equivalent
+    searches share one entry.
+    """
+    normalized_content = " ".join((content or "").lower().split())
+    return compile_search(
+        kb_name,
+        content=normalized_content,
+        filters=filters,
+        top_k=top_k,
+        hybrid_search=hybrid_search,
+        hybrid_search_alpha=hybrid_search_alpha,
+        columns=columns,
+    ).sql
+
+
+class ResultCache:
+    """Base class for search result caches with TTL expiry and LRU eviction."""
+
+    def __init__(self, max_entries: int = SEARCH_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        """Return cached results for key, or None when missing or expired."""
+        raise NotImplementedError
+
+    def set(
+        self, key: str, kb_name: str, results: List[Dict[str, Any]], ttl: float
+    ) -> None:
+        """Store results for key, expiring after ttl seconds."""
+        raise NotImplementedError
+
+    def invalidate(self, kb_name: Optional[str] = None) -> None:
+        """Drop cached results for one knowledge base, or all of them."""
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss/eviction counters and the current size."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self),
+        }
+
+
+class InMemoryResultCache(ResultCache):
+    """Per-process LRU cache."""
+
+    def __init__(self, max_entries: int = SEARCH_CACHE_MAX_ENTRIES):
+        super().__init__(max_entries)
+        # key -> (kb_name, expires_at, results)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= time.time():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return [dict(row) for row in entry[2]]
+
+    def set(
+        self, key: str, kb_name: str, results: List[Dict[str, Any]], ttl: float
+    ) -> None:
+        with self._lock:
+            self._entries[key] = (
+                kb_name,
+                time.time() + ttl,
+                [dict(row) for row in results],
+            )
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, kb_name: Optional[str] = None) -> None:
+        with self._lock:
+            if kb_name is None:
+                self._entries.clear()
+                return
+            for key in [k for k, v in self._entries.items() if v[0] == kb_name]:
+                del self._entries[key]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SqliteResultCache(ResultCache):
+    """On-disk LRU cache shared by every process pointing at the same file."""
+
+    def __init__(
+        self, path: str = SEARCH_CACHE_PATH, max_entries: int = SEARCH_CACHE_MAX_ENTRIES
+    ):
+        super().__init__(max_entries)
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS search_cache (
+                key TEXT PRIMARY KEY,
+                kb_name TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                results BLOB NOT NULL
+            )
+            """)
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT expires_at, results FROM search_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[0] <= now:
+                if row is not None:
+                    self._conn.execute("DELETE FROM search_cache WHERE key = ?", (key,))
+                    self._conn.commit()
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE search_cache SET last_access = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            self.hits += 1
+            return pickle.loads(row[1])
+
+    def set(
+        self, key: str, kb_name: str, results: List[Dict[str, Any]], ttl: float
+    ) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO search_cache VALUES (?, ?, ?, ?, ?)",
+                (key, kb_name, now + ttl, now, pickle.dumps(list(results))),
+            )
+            overflow = self._count() - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    """
+                    DELETE FROM search_cache WHERE key IN (
+                        SELECT key FROM search_cache ORDER BY last_access LIMIT ?
+                    )
+                    """,
+                    (overflow,),
+                )
+                self.evictions += overflow
+            self._conn.commit()
+
+    def invalidate(self, kb_name: Optional[str] = None) -> None:
+        with self._lock:
+            if kb_name is None:
+                self._conn.execute("DELETE FROM search_cache")
+            else:
+                self._conn.execute(
+                    "DELETE FROM search_cache WHERE kb_name = ?", (kb_name,)
+                )
+            self._conn.commit()
+
+    def _count(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM search_cache").fetchone()[0]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._count()
+
+
+_result_cache: Optional[ResultCache] = None
+_result_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> Optional[ResultCache]:
+    """
+    Return the process-wide search result cache.
+
+    The backend is chosen by SEARCH_CACHE_BACKEND: 'memory' (default), 'sqlite'
+    (stored at SEARCH_CACHE_PATH) or 'none' to disable caching.
+    """
+    global _result_cache
+    if SEARCH_CACHE_BACKEND == "none":
+        return None
+    if _result_cache is None:
+        with _result_cache_lock:
+            if _result_cache is None:
+                if SEARCH_CACHE_BACKEND == "sqlite":
+                    _result_cache = SqliteResultCache()
+                elif SEARCH_CACHE_BACKEND == "memory":
+                    _result_cache = InMemoryResultCache()
+                else:
+                    raise ValueError(
+                        f"Unknown SEARCH_CACHE_BACKEND: {SEARCH_CACHE_BACKEND}"
+                    )
+    return _result_cache
@@ -0,0 +1,86 @@
+"""Column projections for knowledge base and datasource queries."""
+
+from typing import List, Optional, Sequence, Union
+
+from mindsdb_sql_parser.ast import Identifier
+
+# Pass as columns= to select every column, e.g. for detail views
+FULL = "full"
+
+Columns = Optional[Union[str, Sequence[str]]]
+
+# Columns returned by knowledge base searches unless a caller asks for more
+KB_COLUMNS = ["id", "chunk_id", "chunk_content", "metadata", "relevance", "distance"]
+
+# Lean datasource projections: every model field except the large text bodies
+DATASOURCE_COLUMNS = {
+    ("confluence_datasource", "pages"): [
+        "id",
+        "status",
+        "title",
+        "spaceId",
+        "parentId",
+        "authorId",
+        "createdAt",
+        "version_createdAt",
+        "version_number",
+        "_links_webui",
+        "_links_tinyui",
+    ],
+    ("jira_datasource", "issues"): [
+        "id",
+        "key",
+        "project_id",
+        "project_key",
+        "project_name",
+        "summary",
+        "priority",
+        "creator",
+        "assignee",
+        "status",
+    ],
+    ("zendesk_datasource", "tickets"): [
+        "id",
+        "subject",
+        "priority",
+        "status",
+        "assignee_id",
+        "requester_id",
+        "brand_id",
+        "created_at",
+        "updated_at",
+        "type",
+        "tags",
+        "url",
+    ],
+}
+
+
+def resolve_columns(
+    columns: Columns, default: Optional[Sequence[str]]
+) -> Optional[List[str]]:
+    """
+    Resolve a columns= argument to an explicit column list.
+
+    Args:
+        columns: None for the default projection, FULL (or '*') for every
+            column, or an explicit list of column names
+        default: Default projection, or None to select every column
+
+    Returns:
+        List of column names, or None meaning every column
+    """
+    if columns is None:
+        return list(default) if default is not None else None
+    if isinstance(columns, str):
+        if columns in (FULL, "*"):
+            return None
+        return [columns]
+    return list(columns)
+
+
+def render_columns(columns: Optional[Sequence[str]]) -> str:
+    """Render a column list as a quoted SQL select list ('*' when None)."""
+    if not columns:
+        return "*"
+    return ", ".join(Identifier(column).to_string() for column in columns)
@@ -0,0 +1,146 @@
+"""Shared pool of MindsDB connections."""
+
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+import mindsdb_sdk
+
+MINDSDB_URL = os.getenv("MINDSDB_URL", "http://127.0.0.1:47334")
+POOL_SIZE = int(os.getenv("MINDSDB_POOL_SIZE", "8"))
+# Idle connections older than this are health-checked before being reused
+POOL_KEEPALIVE = float(os.getenv("MINDSDB_POOL_KEEPALIVE", "60"))
+POOL_TIMEOUT = float(os.getenv("MINDSDB_POOL_TIMEOUT", "30"))
+
+
+class _PooledConnection:
+    """A MindsDB server handle plus the bookkeeping the pool needs."""
+
+    def __init__(self, server):
+        self.server = server
+        self.last_used = time.monotonic()
+        self.suspect = False
+
+
+class MindsDBConnectionPool:
+    """
+    Thread-safe pool of reusable MindsDB connections.
+
+    Connections are created lazily up to ``size``. A connection that sat idle
+    longer than ``keepalive`` seconds, or whose last use raised, is
+    health-checked with ``SELECT 1`` before it is handed out again and replaced
+    with a fresh one if the check fails.
+    """
+
+    def __init__(
+        self,
+        url: str = MINDSDB_URL,
+        size: int = POOL_SIZE,
+        keepalive: float = POOL_KEEPALIVE,
+        timeout: float = POOL_TIMEOUT,
+        **connect_kwargs,
+    ):
+        """
+        Initialize the pool.
+
+        Args:
+            url: MindsDB HTTP API URL
+            size: Maximum number of open connections
+            keepalive: Idle seconds after which a connection is re-checked
+            timeout: Seconds to wait for a free connection before failing
+            connect_kwargs: Extra arguments for mindsdb_sdk.connect (login, password)
+        """
+        if size < 1:
+            raise ValueError("Pool size must be at least 1")
+
+        self.url = url
+        self.size = size
+        self.keepalive = keepalive
+        self.timeout = timeout
+        self._connect_kwargs = connect_kwargs
+        self._idle: "queue.LifoQueue[_PooledConnection]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def _connect(self) -> _PooledConnection:
+        server = mindsdb_sdk.connect(self.url, **self._connect_kwargs)
+        return _PooledConnection(server)
+
+    @staticmethod
+    def _is_healthy(conn: _PooledConnection) -> bool:
+        try:
+            conn.server.query("SELECT 1").fetch()
+            return True
+        except Exception:
+            return False
+
+    def _checkout(self) -> _PooledConnection:
+        if not self._slots.acquire(timeout=self.timeout):
+            raise TimeoutError(
+                f"No MindsDB connection available within {self.timeout:g}s "
+                f"(pool size {self.size})"
+            )
+
+        try:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+
+            idle_for = time.monotonic() - conn.last_used
+            if (conn.suspect or idle_for > self.keepalive) and not self._is_healthy(
+                conn
+            ):
+                print("Reconnecting stale MindsDB connection")
+                return self._connect()
+            conn.suspect = False
+            return conn
+        except Exception:
+            self._slots.release()
+            raise
+
+    def _checkin(self, conn: _PooledConnection, failed: bool = False) -> None:
+        conn.last_used = time.monotonic()
+        conn.suspect = failed
+        self._idle.put(conn)
+        self._slots.release()
+
+    @contextmanager
+    def connection(self) -> Iterator:
+        """
+        Borrow a MindsDB server handle for the duration of a ``with`` block.
+
+        Yields:
+            A connected mindsdb_sdk server
+        """
+        conn = self._checkout()
+        failed = True
+        try:
+            yield conn.server
+            failed = False
+        finally:
+            self._checkin(conn, failed=failed)
+
+    def close(self) -> None:
+        """Drop all idle connections so the next checkout reconnects."""
+        while True:
+            try:
+                self._idle.get_nowait()
+            except queue.Empty:
+                break
+
+
+_pool: Optional[MindsDBConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> MindsDBConnectionPool:
+    """Return the process-wide connection pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = MindsDBConnectionPool()
+    return _pool
@@ -0,0 +1,188 @@
+"""Pack search results into a token-budgeted prompt context."""
+
+import html
+import json
+import os
+import re
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+# Tokens of search results sent to the answering LLM
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "6000"))
+# Tokens kept from any single chunk before the rest is cut
+CONTEXT_CHUNK_TOKENS = int(os.getenv("CONTEXT_CHUNK_TOKENS", "600"))
+# Encoding of the answering model (gpt-4.1 / gpt-4o)
+CONTEXT_TOKENIZER = os.getenv("CONTEXT_TOKENIZER", "o200k_base")
+# Don't bother adding a result when fewer tokens than this are left
+MIN_RESULT_TOKENS = 40
+
+# Ranking and storage internals the answer never needs
+DROPPED_FIELDS = {
+    "chunk_id",
+    "distance",
+    "relevance",
+    "score",
+    "fused_score",
+    "embeddings",
+    "metadata",
+}
+# Metadata starting with '_' is KB bookkeeping, except the Confluence links
+KEPT_PRIVATE_FIELDS = {"_links_webui", "_links_tinyui"}
+# Fields holding the body text of a result
+TEXT_FIELDS = ("chunk_content", "content", "body_storage_value", "description")
+
+_BLOCK_TAG = re.compile(
+    r"<\s*(br|/p|/li|/h[1-6]|/tr|/div|/pre|/blockquote|/ac:task)[^>]*>", re.I
+)
+_TAG = re.compile(r"<[^>]+>")
+_SPACES = re.compile(r"[ \t\r\f\v]+")
+
+
+def html_to_text(value: str) -> str:
+    """
+    Convert Confluence storage HTML (or any HTML) to plain text.
+
+    Block-level tags become line breaks, every other tag (including ac:/ri:
+    macros) is dropped and entities are unescaped. Plain text passes through
+    with whitespace collapsed.
+    """
+    if "<" in value and ">" in value:
+        value = _BLOCK_TAG.sub("\n", value)
+        value = _TAG.sub(" ", value)
+    value = html.unescape(value)
+    lines = (_SPACES.sub(" ", line).strip() for line in value.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+class Tokenizer:
+    """
+    Token counting with tiktoken, or a 4-characters-per-token estimate when the
+    encoding isn't available (e.g. offline without a cached BPE file).
+    """
+
+    def __init__(self, encoding: Optional[str] = CONTEXT_TOKENIZER):
+        self._encoding = None
+        if encoding:
+            try:
+                import tiktoken
+
+                self._encoding = tiktoken.get_encoding(encoding)
+            except Exception as e:
+                print(f"Estimating tokens ({encoding} unavailable: {e})")
+
+    def count(self, text: str) -> int:
+        if self._encoding is not None:
+            return len(self._encoding.encode(text, disallowed_special=()))
+        return (len(text) + 3) // 4
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Cut text to at most max_tokens, marking the cut with an ellipsis."""
+        if self.count(text) <= max_tokens:
+            return text
+        if self._encoding is not None:
+            tokens = self._encoding.encode(text, disallowed_special=())
+            return self._encoding.decode(tokens[: max(0, max_tokens - 1)]) + "…"
+        return text[: max(0, max_tokens - 1) * 4] + "…"
+
+
+_tokenizer: Optional[Tokenizer] = None
+_tokenizer_lock = threading.Lock()
+
+
+def get_tokenizer() -> Tokenizer:
+    """Return the process-wide tokenizer (loaded once)."""
+    global _tokenizer
+    if _tokenizer is None:
+        with _tokenizer_lock:
+            if _tokenizer is None:
+                _tokenizer = Tokenizer()
+    return _tokenizer
+
+
+@dataclass
+class PackedContext:
+    """Prompt text for the results that fit, plus what was left out."""
+
+    text: str
+    included: int
+    dropped: int
+    tokens: int
+
+
+def _fields(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Flatten a result row and keep only fields worth showing the LLM."""
+    metadata = row.get("metadata")
+    if isinstance(metadata, str):
+        try:
+            metadata = json.loads(metadata)
+        except json.JSONDecodeError:
+            metadata = None
+    merged = dict(metadata) if isinstance(metadata, dict) else {}
+    merged.update(row)
+
+    fields = {}
+    for key, value in merged.items():
+        if key in DROPPED_FIELDS or key in TEXT_FIELDS:
+            continue
+        if key.startswith("_") and key not in KEPT_PRIVATE_FIELDS:
+            continue
+        # NaN != NaN; skip empty DataFrame values
+        if value is None or value != value or value == "":
+            continue
+        fields[key] = value
+    return fields
+
+
+def _body(row: Dict[str, Any]) -> str:
+    for field in TEXT_FIELDS:
+        value = row.get(field)
+        if isinstance(value, str) and value.strip():
+            return html_to_text(value)
+    return ""
+
+
+def pack_results(
+    results: List[Dict[str, Any]],
+    budget: int = CONTEXT_TOKEN_BUDGET,
+    chunk_tokens: int = CONTEXT_CHUNK_TOKENS,
+    tokenizer: Optional[Tokenizer] = None,
+) -> PackedContext:
+    """
+    Render ranked results into compact prompt text within a token budget.
+
+    Each result becomes a header line of its useful fields (source, ids,
+    titles, links, status...) followed by its body as plain text, cut to
+    chunk_tokens. Results are added greedily in rank order; one that doesn't
+    fit is skipped so smaller, lower-ranked results can still use the room.
+
+    Args:
+        results: Ranked search results (e.g. FederatedSearchResult.results)
+        budget: Maximum tokens for the packed text
+        chunk_tokens: Maximum body tokens per result
+        tokenizer: Token counter (default: the shared tiktoken tokenizer)
+
+    Returns:
+        PackedContext with the text and how many results made it in
+    """
+    tokenizer = tokenizer or get_tokenizer()
+    blocks, used, dropped = [], 0, 0
+    for row in results:
+        if budget - used < MIN_RESULT_TOKENS:
+            dropped += 1
+            continue
+        fields = _fields(row)
+        header = f"[{len(blocks) + 1}] " + " | ".join(
+            f"{key}: {value}" for key, value in fields.items()
+        )
+        body = tokenizer.truncate(_body(row), chunk_tokens)
+        block = f"{header}\n{body}" if body else header
+        cost = tokenizer.count(block) + 1  # separating newline
+        if used + cost > budget:
+            dropped += 1
+            continue
+        blocks.append(block)
+        used += cost
+    return PackedContext(
+        text="\n\n".join(blocks), included=len(blocks), dropped=dropped, tokens=used
+    )
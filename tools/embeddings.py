@@ -0,0 +1,206 @@
+"""Embedding model matching the one the knowledge bases are built with."""
+
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "2048"))
+# sqlite file that keeps query embeddings across restarts (empty: memory only)
+QUERY_EMBEDDING_CACHE_PATH = os.getenv("QUERY_EMBEDDING_CACHE_PATH", "")
+
+
+def get_embeddings() -> Embeddings:
+    """
+    Create the embedding model configured for the knowledge bases.
+
+    Mirrors setup.py: Azure OpenAI (AZURE_DEPLOYMENT, default
+    text-embedding-3-large) when AZURE_OPENAI_API_KEY and AZURE_ENDPOINT are
+    set, otherwise OpenAI text-embedding-3-small.
+
+    Returns:
+        A LangChain embeddings instance
+    """
+    azure_key = os.getenv("AZURE_OPENAI_API_KEY")
+    azure_endpoint = os.getenv("AZURE_ENDPOINT")
+
+    if azure_key and azure_endpoint:
+        from langchain_openai import AzureOpenAIEmbeddings
+
+        return AzureOpenAIEmbeddings(
+            azure_deployment=os.getenv("AZURE_DEPLOYMENT", "text-embedding-3-large"),
+            azure_endpoint=azure_endpoint,
+            api_version=os.getenv("AZURE_API_VERSION", "2024-02-01"),
+            api_key=azure_key,
+        )
+
+    from langchain_openai import OpenAIEmbeddings
+
+    return OpenAIEmbeddings(
+        model="text-embedding-3-small", api_key=os.getenv("OPENAI_API_KEY")
+    )
+
+
+def embedding_model_name() -> str:
+    """Identify the model get_embeddings() returns (part of cache keys)."""
+    if os.getenv("AZURE_OPENAI_API_KEY") and os.getenv("AZURE_ENDPOINT"):
+        deployment = os.getenv("AZURE_DEPLOYMENT", "text-embedding-3-large")
+        return f"azure_openai/{deployment}"
+    return "openai/text-embedding-3-small"
+
+
+def normalize_query(text: str) -> str:
+    """Case- and whitespace-insensitive form of a query used as the cache key."""
+    return " ".join(text.lower().split())
+
+
+class QueryEmbeddingCache:
+    """
+    LRU cache of query embeddings keyed on (model, normalized text).
+
+    Concurrent requests for the same text share one embedding call, so a
+    query fanned out to several knowledge bases is embedded once. With a
+    path, embeddings are also kept in sqlite and survive restarts.
+    """
+
+    def __init__(
+        self,
+        embed_fn: Callable[[str], List[float]],
+        model: str,
+        max_entries: int = QUERY_EMBEDDING_CACHE_SIZE,
+        path: Optional[str] = QUERY_EMBEDDING_CACHE_PATH,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            embed_fn: Function returning the embedding of a string
+            model: Model identifier; entries of other models are never served
+            max_entries: Maximum embeddings kept in memory and on disk
+            path: sqlite file for persistence (None or empty for memory only)
+        """
+        self.embed_fn = embed_fn
+        self.model = model
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._inflight: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+        self._conn = None
+        if path:
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS query_embeddings (
+                    model TEXT NOT NULL,
+                    text TEXT NOT NULL,
+                    vector BLOB NOT NULL,
+                    PRIMARY KEY (model, text)
+                )
+                """)
+            self._conn.commit()
+
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        # Caller holds the lock
+        self._entries[key] = vector
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _load(self, key: str) -> Optional[np.ndarray]:
+        if self._conn is None:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT vector FROM query_embeddings WHERE model = ? AND text = ?",
+                (self.model, key),
+            ).fetchone()
+        return np.frombuffer(row[0], dtype=np.float32) if row else None
+
+    def _store(self, key: str, vector: np.ndarray) -> None:
+        if self._conn is None:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO query_embeddings VALUES (?, ?, ?)",
+                (self.model, key, vector.tobytes()),
+            )
+            # Oldest rows go first once the file outgrows the memory cache
+            self._conn.execute(
+                """
+                DELETE FROM query_embeddings WHERE rowid IN (
+                    SELECT rowid FROM query_embeddings ORDER BY rowid DESC
+                    LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def embed(self, text: str) -> np.ndarray:
+        """
+        Return the embedding of text, computing it at most once per key.
+
+        Returns:
+            float32 vector (read-only; copy before modifying)
+        """
+        key = normalize_query(text)
+        while True:
+            with self._lock:
+                vector = self._entries.get(key)
+                if vector is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return vector
+                inflight = self._inflight.get(key)
+                if inflight is None:
+                    self._inflight[key] = threading.Event()
+                    break
+            # Another thread is embedding the same text; if it fails we retry
+            inflight.wait()
+
+        try:
+            vector = self._load(key)
+            if vector is None:
+                vector = np.asarray(self.embed_fn(text), dtype=np.float32)
+                self._store(key, vector)
+                hit = False
+            else:
+                hit = True
+            vector.setflags(write=False)
+            with self._lock:
+                self._remember(key, vector)
+                if hit:
+                    self.hits += 1
+                else:
+                    self.misses += 1
+            return vector
+        finally:
+            with self._lock:
+                self._inflight.pop(key).set()
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and the number of cached embeddings."""
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+
+_embedder: Optional[QueryEmbeddingCache] = None
+_embedder_lock = threading.Lock()
+
+
+def get_query_embedder() -> QueryEmbeddingCache:
+    """Return the process-wide query embedding cache for the KB embedding model."""
+    global _embedder
+    if _embedder is None:
+        with _embedder_lock:
+            if _embedder is None:
+                _embedder = QueryEmbeddingCache(
+                    get_embeddings().embed_query, embedding_model_name()
+                )
+    return _embedder
@@ -0,0 +1,44 @@
+"""Bounded thread pool for running blocking MindsDB calls concurrently."""
+
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+# MindsDB calls are network bound; extra workers wait on the connection pool
+SEARCH_WORKERS = int(os.getenv("SEARCH_WORKERS", "16"))
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Return the process-wide executor, creating it on first use."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=SEARCH_WORKERS, thread_name_prefix="kb-search"
+                )
+    return _executor
+
+
+async def run_blocking(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Await a blocking call without tying up the event loop.
+
+    Args:
+        func: Blocking callable, e.g. SemanticSearchTool.search
+        args: Positional arguments for func
+        kwargs: Keyword arguments for func
+
+    Returns:
+        Whatever func returns
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_executor(), functools.partial(func, *args, **kwargs)
+    )
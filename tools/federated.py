@@ -0,0 +1,391 @@
+"""Federated search across the Jira, Zendesk and Confluence knowledge bases."""
+
+import asyncio
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from tools.executor import get_executor
+from tools.search import SemanticSearchTool
+
+# Knowledge base behind each source, in the order results are presented
+SOURCE_KBS = {
+    "jira": "jira_kb",
+    "zendesk": "zendesk_kb",
+    "confluence": "confluence_kb",
+}
+
+# Seconds to wait for a single knowledge base before answering without it
+DEFAULT_SEARCH_TIMEOUT = float(os.getenv("SEARCH_TIMEOUT_SECONDS", "10"))
+FEDERATED_TOP_K = int(os.getenv("FEDERATED_TOP_K", "8"))
+
+# Standard RRF damping constant (Cormack et al.)
+RRF_K = 60
+
+# Called with (source, results or exception) as each source finishes
+SourceCallback = Callable[[str, Any], None]
+
+
+@dataclass
+class PendingSearch:
+    """Per-source searches that are running but haven't been collected yet."""
+
+    futures: Dict[str, Future]
+    started: float = field(default_factory=time.monotonic)
+
+    def cancel(self) -> None:
+        """Give up on every source (already running searches still finish)."""
+        for future in self.futures.values():
+            future.cancel()
+
+
+@dataclass
+class FederatedSearchResult:
+    """Globally ranked results plus the sources that failed or timed out."""
+
+    results: List[Dict[str, Any]] = field(default_factory=list)
+    errors: Dict[str, str] = field(default_factory=dict)
+
+
+def normalize_scores(results: List[Dict[str, Any]]) -> List[float]:
+    """
+    Map a source's results onto comparable [0, 1] scores.
+
+    Uses the reranker 'relevance' column when present, otherwise converts
+    'distance' to a similarity, then min-max scales within the source.
+    """
+    raw = []
+    for row in results:
+        relevance = row.get("relevance")
+        distance = row.get("distance")
+        # NaN != NaN, so the self-comparisons skip missing DataFrame values
+        if relevance is not None and relevance == relevance:
+            raw.append(float(relevance))
+        elif distance is not None and distance == distance:
+            raw.append(1.0 / (1.0 + float(distance)))
+        else:
+            raw.append(0.0)
+
+    if not raw:
+        return []
+    low, high = min(raw), max(raw)
+    if high == low:
+        return [1.0 if high > 0 else 0.0 for _ in raw]
+    return [(score - low) / (high - low) for score in raw]
+
+
+def fuse_results(
+    per_source: Dict[str, List[Dict[str, Any]]],
+    top_k: int = FEDERATED_TOP_K,
+    method: str = "rrf",
+    weights: Optional[Dict[str, float]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Fuse per-source result lists into one globally ranked, deduplicated list.
+
+    Args:
+        per_source: Results for each source, e.g. {'jira': [...], 'zendesk': [...]}
+        top_k: Number of fused results to return
+        method: 'rrf' (reciprocal rank fusion) or 'score' (weighted normalized score)
+        weights: Optional per-source weight multipliers (default 1.0)
+
+    Returns:
+        Results tagged with 'source', 'score' and 'fused_score', best first.
+        Only the best chunk of each document is kept.
+    """
+    if method not in ("rrf", "score"):
+        raise ValueError(f"Unknown fusion method: {method}")
+
+    weights = weights or {}
+    best: Dict[tuple, Dict[str, Any]] = {}
+    for source, results in per_source.items():
+        weight = weights.get(source, 1.0)
+        scored = sorted(
+            zip(normalize_scores(results), results), key=lambda pair: -pair[0]
+        )
+        for rank, (score, row) in enumerate(scored, start=1):
+            if method == "rrf":
+                fused = weight / (RRF_K + rank)
+            else:
+                fused = weight * score
+
+            doc_key = (source, str(row.get("id", row.get("chunk_id", rank))))
+            if doc_key in best and best[doc_key]["fused_score"] >= fused:
+                continue
+            best[doc_key] = {
+                **row,
+                "source": source,
+                "score": round(score, 4),
+                "fused_score": fused,
+            }
+
+    ranked = sorted(best.values(), key=lambda row: -row["fused_score"])
+    return ranked[:top_k]
+
+
+class FederatedSearch:
+    """Query several knowledge bases concurrently and fuse their rankings."""
+
+    def __init__(
+        self,
+        tools: Optional[Dict[str, SemanticSearchTool]] = None,
+        timeouts: Optional[Dict[str, float]] = None,
+        method: str = "rrf",
+        weights: Optional[Dict[str, float]] = None,
+    ):
+        """
+        Initialize the federated search.
+
+        Args:
+            tools: Search tool per source (default: one per entry in SOURCE_KBS)
+            timeouts: Per-source timeouts in seconds (default SEARCH_TIMEOUT_SECONDS)
+            method: Fusion method, 'rrf' or 'score'
+            weights: Optional per-source weight multipliers
+        """
+        self.tools = tools or {
+            source: SemanticSearchTool(kb_name=kb_name)
+            for source, kb_name in SOURCE_KBS.items()
+        }
+        self.timeouts = {source: DEFAULT_SEARCH_TIMEOUT for source in self.tools}
+        self.timeouts.update(timeouts or {})
+        self.method = method
+        self.weights = weights
+
+    def _sources(self, sources: Optional[List[str]]) -> List[str]:
+        if sources is None:
+            return list(self.tools)
+        unknown = [source for source in sources if source not in self.tools]
+        if unknown:
+            raise ValueError(f"Unknown sources: {unknown}")
+        return [source for source in self.tools if source in sources]
+
+    @staticmethod
+    def _notify(on_result: Optional[SourceCallback], source: str, outcome) -> None:
+        if on_result is None:
+            return
+        try:
+            on_result(source, outcome)
+        except Exception as e:
+            print(f"Search progress callback failed: {e}")
+
+    def _fuse(self, outcomes: Dict[str, Any], top_k: int) -> FederatedSearchResult:
+        per_source: Dict[str, List[Dict[str, Any]]] = {}
+        errors: Dict[str, str] = {}
+        for source, outcome in outcomes.items():
+            if isinstance(outcome, TimeoutError):
+                timeout = self.timeouts.get(source, DEFAULT_SEARCH_TIMEOUT)
+                errors[source] = f"timed out after {timeout:g}s"
+            elif isinstance(outcome, BaseException):
+                errors[source] = str(outcome)
+            else:
+                per_source[source] = outcome
+
+        return FederatedSearchResult(
+            results=fuse_results(per_source, top_k, self.method, self.weights),
+            errors=errors,
+        )
+
+    def search(
+        self,
+        content: str,
+        sources: Optional[List[str]] = None,
+        filters: Dict = None,
+        top_k: int = FEDERATED_TOP_K,
+        per_source_k: int = 5,
+        hybrid_search: bool = True,
+        hybrid_search_alpha: float = 0.5,
+        on_result: Optional[SourceCallback] = None,
+    ) -> FederatedSearchResult:
+        """
+        Search the selected knowledge bases concurrently and fuse the results.
+
+        Args:
+            content: Search content query
+            sources: Sources to search (default: all)
+            filters: Metadata filters applied to every source
+            top_k: Number of fused results to return
+            per_source_k: Results fetched from each source before fusion
+            hybrid_search: Enable hybrid search (semantic + keyword)
+            hybrid_search_alpha: Balance between semantic (1.0) and keyword (0.0) relevance
+            on_result: Called with (source, results or exception) as soon as
+                each source finishes, e.g. to report progress while streaming
+
+        Returns:
+            FederatedSearchResult with the fused results and per-source errors
+        """
+        pending = self.start(
+            content,
+            sources=sources,
+            filters=filters,
+            per_source_k=per_source_k,
+            hybrid_search=hybrid_search,
+            hybrid_search_alpha=hybrid_search_alpha,
+        )
+        return self.collect(pending, top_k=top_k, on_result=on_result)
+
+    def start(
+        self,
+        content: str,
+        sources: Optional[List[str]] = None,
+        filters: Dict = None,
+        per_source_k: int = 5,
+        hybrid_search: bool = True,
+        hybrid_search_alpha: float = 0.5,
+    ) -> PendingSearch:
+        """
+        Start searching the selected knowledge bases without waiting for them.
+
+        Lets a caller overlap the searches with other work (e.g. routing)
+        and later collect only the sources it still needs. Arguments are
+        the same as for search.
+
+        Returns:
+            PendingSearch to pass to collect or acollect
+        """
+        started = time.monotonic()
+        futures = {
+            source: get_executor().submit(
+                self.tools[source].search,
+                content=content,
+                filters=filters,
+                top_k=per_source_k,
+                hybrid_search=hybrid_search,
+                hybrid_search_alpha=hybrid_search_alpha,
+            )
+            for source in self._sources(sources)
+        }
+        return PendingSearch(futures, started)
+
+    def _pending_sources(
+        self, pending: PendingSearch, sources: Optional[List[str]]
+    ) -> List[str]:
+        """Sources to collect, cancelling the started ones no longer wanted."""
+        if sources is None:
+            return list(pending.futures)
+        missing = [source for source in sources if source not in pending.futures]
+        if missing:
+            raise ValueError(f"Sources were not started: {missing}")
+        for source, future in pending.futures.items():
+            if source not in sources:
+                future.cancel()
+        return [source for source in pending.futures if source in sources]
+
+    def collect(
+        self,
+        pending: PendingSearch,
+        sources: Optional[List[str]] = None,
+        top_k: int = FEDERATED_TOP_K,
+        on_result: Optional[SourceCallback] = None,
+    ) -> FederatedSearchResult:
+        """
+        Wait for started searches and fuse their results.
+
+        Timeouts count from when the searches were started. Started sources
+        left out of sources are cancelled and their results discarded.
+
+        Args:
+            pending: Searches returned by start
+            sources: Sources to keep (default: every started source)
+            top_k: Number of fused results to return
+            on_result: Called with (source, results or exception) as each finishes
+
+        Returns:
+            FederatedSearchResult with the fused results and per-source errors
+        """
+        sources = self._pending_sources(pending, sources)
+
+        # Collect sources in the order they finish so progress can be reported
+        outcomes: Dict[str, Any] = {}
+        waiting = {pending.futures[source]: source for source in sources}
+        while waiting:
+            elapsed = time.monotonic() - pending.started
+            deadlines = {
+                future: self.timeouts.get(source, DEFAULT_SEARCH_TIMEOUT) - elapsed
+                for future, source in waiting.items()
+            }
+            done, _ = wait(
+                waiting,
+                timeout=max(0.0, min(deadlines.values())),
+                return_when=FIRST_COMPLETED,
+            )
+            for future in list(waiting):
+                if future in done:
+                    try:
+                        outcome = future.result()
+                    except Exception as e:
+                        outcome = e
+                elif deadlines[future] <= 0:
+                    future.cancel()
+                    outcome = TimeoutError()
+                else:
+                    continue
+                source = waiting.pop(future)
+                outcomes[source] = outcome
+                self._notify(on_result, source, outcome)
+
+        return self._fuse({source: outcomes[source] for source in sources}, top_k)
+
+    async def acollect(
+        self,
+        pending: PendingSearch,
+        sources: Optional[List[str]] = None,
+        top_k: int = FEDERATED_TOP_K,
+        on_result: Optional[SourceCallback] = None,
+    ) -> FederatedSearchResult:
+        """Async version of collect."""
+        sources = self._pending_sources(pending, sources)
+
+        async def wait_source(source: str) -> Any:
+            timeout = self.timeouts.get(source, DEFAULT_SEARCH_TIMEOUT)
+            remaining = max(0.0, timeout - (time.monotonic() - pending.started))
+            try:
+                outcome = await asyncio.wait_for(
+                    asyncio.wrap_future(pending.futures[source]), timeout=remaining
+                )
+            except Exception as e:
+                outcome = e
+            self._notify(on_result, source, outcome)
+            return outcome
+
+        gathered = await asyncio.gather(
+            *(wait_source(source) for source in sources), return_exceptions=True
+        )
+        return self._fuse(dict(zip(sources, gathered)), top_k)
+
+    async def asearch(
+        self,
+        content: str,
+        sources: Optional[List[str]] = None,
+        filters: Dict = None,
+        top_k: int = FEDERATED_TOP_K,
+        per_source_k: int = 5,
+        hybrid_search: bool = True,
+        hybrid_search_alpha: float = 0.5,
+        on_result: Optional[SourceCallback] = None,
+    ) -> FederatedSearchResult:
+        """Async version of search."""
+        sources = self._sources(sources)
+
+        async def search_source(source: str) -> Any:
+            try:
+                outcome = await asyncio.wait_for(
+                    self.tools[source].asearch(
+                        content=content,
+                        filters=filters,
+                        top_k=per_source_k,
+                        hybrid_search=hybrid_search,
+                        hybrid_search_alpha=hybrid_search_alpha,
+                    ),
+                    timeout=self.timeouts.get(source, DEFAULT_SEARCH_TIMEOUT),
+                )
+            except Exception as e:
+                outcome = e
+            self._notify(on_result, source, outcome)
+            return outcome
+
+        gathered = await asyncio.gather(
+            *(search_source(source) for source in sources), return_exceptions=True
+        )
+        return self._fuse(dict(zip(sources, gathered)), top_k)
@@ -0,0 +1,69 @@
+"""Source and storage layout of each knowledge base."""
+
+# Source table and column layout of each knowledge base
+KB_LAYOUTS = {
+    "confluence_kb": {
+        "datasource": "confluence_datasource",
+        "table": "pages",
+        "metadata_columns": [
+            "id",
+            "status",
+            "title",
+            "spaceId",
+            "authorId",
+            "createdAt",
+        ],
+        "content_columns": ["body_storage_value"],
+        "id_column": "id",
+        "updated_column": "version_createdAt",
+        "storage_table": "pages",
+    },
+    "jira_kb": {
+        "datasource": "jira_datasource",
+        "table": "issues",
+        "metadata_columns": [
+            "id",
+            "key",
+            "project_id",
+            "project_key",
+            "project_name",
+            "priority",
+            "creator",
+            "assignee",
+            "status",
+        ],
+        "content_columns": ["summary", "description"],
+        "id_column": "id",
+        "updated_column": None,
+        "storage_table": "jira_content",
+    },
+    "zendesk_kb": {
+        "datasource": "zendesk_datasource",
+        "table": "tickets",
+        "metadata_columns": [
+            "id",
+            "status",
+            "priority",
+            "type",
+            "assignee_id",
+            "requester_id",
+            "tags",
+            "url",
+            "created_at",
+            "updated_at",
+        ],
+        "content_columns": ["subject", "description"],
+        "id_column": "id",
+        "updated_column": "updated_at",
+        "storage_table": "zendesk_tickets",
+    },
+}
+
+# Datasource holding the vectors of every knowledge base
+KB_STORAGE_DATASOURCE = "pgvector_datasource"
+
+# pgvector storage table of each knowledge base: kb_name -> (datasource, table)
+KB_STORAGE_TABLES = {
+    kb_name: (KB_STORAGE_DATASOURCE, layout["storage_table"])
+    for kb_name, layout in KB_LAYOUTS.items()
+}
@@ -0,0 +1,433 @@
+"""In-process mirror of a knowledge base's vectors for low-latency search."""
+
+import json
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from tools.connection import MindsDBConnectionPool, get_pool
+from tools.kb_layouts import KB_STORAGE_TABLES
+from tools.query_builder import pg_literal
+
+# Knowledge bases served from a local mirror (comma separated, e.g. confluence_kb)
+LOCAL_INDEX_KBS = [
+    kb.strip() for kb in os.getenv("LOCAL_INDEX_KBS", "").split(",") if kb.strip()
+]
+LOCAL_INDEX_DIR = os.getenv("LOCAL_INDEX_DIR", os.path.join(".cache", "local_index"))
+# Seconds after a sync before searches fall back to MindsDB (and a resync starts)
+LOCAL_INDEX_MAX_AGE = float(os.getenv("LOCAL_INDEX_MAX_AGE", "900"))
+# The mirror is meant for small KBs; larger storage tables are not mirrored
+LOCAL_INDEX_MAX_ROWS = int(os.getenv("LOCAL_INDEX_MAX_ROWS", "50000"))
+
+# Rows fetched per native query when syncing changed chunks
+SYNC_CHUNK_SIZE = 500
+
+_TOKEN = re.compile(r"\w+")
+
+
+def _parse_vector(value: Any) -> List[float]:
+    """pgvector values arrive as '[0.1,0.2]' text or as lists."""
+    if isinstance(value, str):
+        return json.loads(value)
+    return list(value)
+
+
+def storage_row(
+    chunk_id: str, content: str, metadata: Dict, relevance: float, distance: float
+) -> Dict[str, Any]:
+    """Shape a storage table chunk like a KB search result row."""
+    return {
+        "id": str(metadata.get("_original_doc_id", chunk_id)),
+        "chunk_id": chunk_id,
+        "chunk_content": content,
+        "metadata": metadata,
+        "relevance": relevance,
+        "distance": distance,
+    }
+
+
+def _like_regex(pattern: str) -> "re.Pattern":
+    parts = [".*" if c == "%" else "." if c == "_" else re.escape(c) for c in pattern]
+    return re.compile("^" + "".join(parts) + "$", re.IGNORECASE | re.DOTALL)
+
+
+@dataclass
+class _Snapshot:
+    """One synced state of the mirror; replaced as a whole after each sync."""
+
+    chunk_ids: List[str]
+    signatures: List[str]
+    contents: List[str]
+    metadata: List[Dict[str, Any]]
+    vectors: np.ndarray  # unit-normalized float32, one row per chunk
+    synced_at: float
+
+    def __post_init__(self):
+        self._columns: Dict[str, np.ndarray] = {}
+        self._tokens: Optional[List[set]] = None
+
+    def column(self, key: str) -> np.ndarray:
+        """Metadata values of key as strings (None when missing), built lazily."""
+        if key not in self._columns:
+            self._columns[key] = np.array(
+                [
+                    None if m.get(key) is None else str(m.get(key))
+                    for m in self.metadata
+                ],
+                dtype=object,
+            )
+        return self._columns[key]
+
+    def tokens(self) -> List[set]:
+        if self._tokens is None:
+            self._tokens = [set(_TOKEN.findall(c.lower())) for c in self.contents]
+        return self._tokens
+
+
+class LocalVectorIndex:
+    """
+    Local copy of a KB's pgvector storage table with vectorized search.
+
+    Chunk embeddings are kept as a unit-normalized float32 matrix in a .npy
+    file that is memory-mapped on load, next to the chunk ids, contents and
+    metadata. Syncs are incremental: a native query lists every chunk's md5
+    signature, and only new or changed chunks are fetched.
+
+    search() returns None whenever it cannot answer the way MindsDB would,
+    so the caller falls back to MindsDB: the mirror is missing or older than
+    max_age, or the filters use operators it doesn't evaluate. Results are
+    ranked by cosine similarity, blended with query-term overlap for hybrid
+    searches; the KB's reranking model is not applied.
+    """
+
+    def __init__(
+        self,
+        kb_name: str,
+        embed_fn: Optional[Callable[[str], List[float]]] = None,
+        pool: Optional[MindsDBConnectionPool] = None,
+        path: Optional[str] = None,
+        max_age: float = LOCAL_INDEX_MAX_AGE,
+        max_rows: int = LOCAL_INDEX_MAX_ROWS,
+    ):
+        """
+        Initialize the mirror (nothing is read until the first search).
+
+        Args:
+            kb_name: Knowledge base to mirror (a key of KB_STORAGE_TABLES)
+            embed_fn: Query embedding function (default: the shared, cached
+                query embedder)
+            pool: Connection pool used for syncing
+            path: Directory for the mirror files (default: LOCAL_INDEX_DIR/kb_name)
+            max_age: Seconds after a sync before the mirror counts as stale
+            max_rows: Tables with more chunks than this are not mirrored
+        """
+        self.kb_name = kb_name
+        self.datasource, self.table = KB_STORAGE_TABLES[kb_name]
+        self._embed_fn = embed_fn
+        self.pool = pool or get_pool()
+        self.path = path or os.path.join(LOCAL_INDEX_DIR, kb_name)
+        self.max_age = max_age
+        self.max_rows = max_rows
+        self.hits = 0
+        self.fallbacks = 0
+        self._snapshot: Optional[_Snapshot] = None
+        self._loaded = False
+        self._disabled = False
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._syncing = False
+
+    # -- persistence -----------------------------------------------------
+
+    def _load(self) -> None:
+        rows_path = os.path.join(self.path, "rows.json")
+        if not os.path.exists(rows_path):
+            return
+        try:
+            with open(rows_path, encoding="utf-8") as f:
+                rows = json.load(f)
+            vectors = np.load(os.path.join(self.path, "vectors.npy"), mmap_mode="r")
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable local index for {self.kb_name}: {e}")
+            return
+        self._snapshot = _Snapshot(vectors=vectors, **rows)
+
+    def _save(self, snapshot: _Snapshot) -> _Snapshot:
+        os.makedirs(self.path, exist_ok=True)
+        vectors_tmp = os.path.join(self.path, "vectors.tmp.npy")
+        np.save(vectors_tmp, snapshot.vectors)
+        rows_tmp = os.path.join(self.path, "rows.json.tmp")
+        with open(rows_tmp, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "chunk_ids": snapshot.chunk_ids,
+                    "signatures": snapshot.signatures,
+                    "contents": snapshot.contents,
+                    "metadata": snapshot.metadata,
+                    "synced_at": snapshot.synced_at,
+                },
+                f,
+                default=str,
+            )
+        os.replace(vectors_tmp, os.path.join(self.path, "vectors.npy"))
+        os.replace(rows_tmp, os.path.join(self.path, "rows.json"))
+        snapshot.vectors = np.load(
+            os.path.join(self.path, "vectors.npy"), mmap_mode="r"
+        )
+        return snapshot
+
+    # -- syncing ---------------------------------------------------------
+
+    def _native(self, sql: str):
+        with self.pool.connection() as server:
+            return server.query(f"SELECT * FROM {self.datasource} ({sql})").fetch()
+
+    def sync(self) -> int:
+        """
+        Bring the mirror up to date with the storage table.
+
+        Returns:
+            Number of chunks fetched (new or changed)
+        """
+        with self._sync_lock:
+            return self._sync()
+
+    def _sync(self) -> int:
+        signatures = self._native(
+            "SELECT id, md5(coalesce(content, '') || embeddings::text || "
+            f"coalesce(metadata::text, '')) AS signature FROM {self.table}"
+        )
+        if len(signatures) > self.max_rows:
+            self._disabled = True
+            print(
+                f"⚠️  {self.kb_name} has {len(signatures)} chunks "
+                f"(LOCAL_INDEX_MAX_ROWS={self.max_rows}); not mirroring it"
+            )
+            return 0
+        wanted = dict(zip(signatures["id"].astype(str), signatures["signature"]))
+
+        old = self._snapshot
+        kept = {}
+        if old is not None:
+            kept = {
+                chunk_id: i
+                for i, (chunk_id, signature) in enumerate(
+                    zip(old.chunk_ids, old.signatures)
+                )
+                if wanted.get(chunk_id) == signature
+            }
+        missing = [chunk_id for chunk_id in wanted if chunk_id not in kept]
+
+        fetched = {}
+        for i in range(0, len(missing), SYNC_CHUNK_SIZE):
+            ids = ", ".join(pg_literal(c) for c in missing[i : i + SYNC_CHUNK_SIZE])
+            df = self._native(
+                "SELECT id, content, embeddings::text AS embeddings, "
+                f"metadata::text AS metadata FROM {self.table} WHERE id IN ({ids})"
+            )
+            for row in df.to_dict(orient="records"):
+                fetched[str(row["id"])] = row
+
+        chunk_ids, sigs, contents, metadata, vectors = [], [], [], [], []
+        for chunk_id, signature in wanted.items():
+            if chunk_id in kept:
+                i = kept[chunk_id]
+                contents.append(old.contents[i])
+                metadata.append(old.metadata[i])
+                vectors.append(np.asarray(old.vectors[i]))
+            elif chunk_id in fetched:
+                row = fetched[chunk_id]
+                contents.append(row["content"] or "")
+                meta = row.get("metadata")
+                metadata.append(
+                    json.loads(meta) if isinstance(meta, str) else meta or {}
+                )
+                vector = np.asarray(_parse_vector(row["embeddings"]), dtype=np.float32)
+                vectors.append(vector / (np.linalg.norm(vector) or 1.0))
+            else:
+                # Deleted between the two queries
+                continue
+            chunk_ids.append(chunk_id)
+            sigs.append(signature)
+
+        matrix = (
+            np.vstack(vectors).astype(np.float32)
+            if vectors
+            else np.zeros((0, 0), dtype=np.float32)
+        )
+        snapshot = _Snapshot(chunk_ids, sigs, contents, metadata, matrix, time.time())
+        self._snapshot = self._save(snapshot)
+        print(
+            f"✓ Synced local index for {self.kb_name}: {len(chunk_ids)} chunks, "
+            f"{len(fetched)} fetched"
+        )
+        return len(fetched)
+
+    def _sync_in_background(self) -> None:
+        with self._lock:
+            if self._syncing or self._disabled:
+                return
+            self._syncing = True
+
+        def run():
+            try:
+                self.sync()
+            except Exception as e:
+                print(f"Local index sync for {self.kb_name} failed: {e}")
+            finally:
+                self._syncing = False
+
+        threading.Thread(
+            target=run, name=f"local-index-{self.kb_name}", daemon=True
+        ).start()
+
+    def is_fresh(self) -> bool:
+        """Whether the mirror can serve searches; starts a resync when stale."""
+        if not self._loaded:
+            self._loaded = True
+            self._load()
+        snapshot = self._snapshot
+        if snapshot is not None and time.time() - snapshot.synced_at <= self.max_age:
+            return True
+        self._sync_in_background()
+        return False
+
+    def mark_stale(self) -> None:
+        """Force the next search to fall back and resync (e.g. after a KB load)."""
+        if self._snapshot is not None:
+            self._snapshot.synced_at = 0.0
+
+    # -- searching -------------------------------------------------------
+
+    def _filter_mask(self, snapshot: _Snapshot, filters: Optional[Dict]):
+        """Boolean mask of chunks matching filters, or None if unsupported."""
+        mask = np.ones(len(snapshot.chunk_ids), dtype=bool)
+        for key, value in (filters or {}).items():
+            if key.startswith("$"):
+                return None
+            column = snapshot.column(key)
+            if not isinstance(value, dict):
+                mask &= column == (None if value is None else str(value))
+                continue
+            operator = str(value.get("operator", "")).upper()
+            if operator in ("=", "!="):
+                equal = column == str(value["value"])
+                # != never matches missing keys, as in SQL
+                mask &= equal if operator == "=" else ~equal & (column != None)  # noqa
+            elif operator == "IN":
+                mask &= np.isin(column, [str(v) for v in value["values"]])
+            elif operator == "NOT_NULL":
+                mask &= column != None  # noqa: E711 (elementwise)
+            elif operator == "LIKE":
+                regex = _like_regex(str(value["value"]))
+                mask &= np.array(
+                    [v is not None and bool(regex.match(v)) for v in column],
+                    dtype=bool,
+                )
+            else:
+                return None
+        return mask
+
+    @property
+    def embed_fn(self) -> Callable[[str], List[float]]:
+        if self._embed_fn is None:
+            from tools.embeddings import get_query_embedder
+
+            self._embed_fn = get_query_embedder().embed
+        return self._embed_fn
+
+    def search(
+        self,
+        content: Optional[str],
+        filters: Optional[Dict] = None,
+        top_k: int = 5,
+        hybrid_search: bool = True,
+        hybrid_search_alpha: float = 0.5,
+        columns: Optional[List[str]] = None,
+        query_vector: Optional[Sequence[float]] = None,
+    ) -> Optional[List[Dict]]:
+        """
+        Search the mirror (same arguments as SemanticSearchTool.search).
+
+        query_vector, when given, is used instead of embedding content.
+
+        Returns:
+            Rows shaped like KB search results, or None to fall back to MindsDB
+        """
+        if not content or self._disabled or not self.is_fresh():
+            self.fallbacks += 1
+            return None
+        snapshot = self._snapshot
+        mask = self._filter_mask(snapshot, filters)
+        if mask is None:
+            self.fallbacks += 1
+            return None
+
+        candidates = np.flatnonzero(mask)
+        if len(candidates) == 0:
+            self.hits += 1
+            return []
+        if query_vector is None:
+            query_vector = self.embed_fn(content)
+        query = np.asarray(query_vector, dtype=np.float32)
+        if query.shape[0] != snapshot.vectors.shape[1]:
+            # The KB was rebuilt with another embedding model since the sync
+            self.mark_stale()
+            self.fallbacks += 1
+            return None
+        query = query / (np.linalg.norm(query) or 1.0)
+
+        similarity = np.asarray(snapshot.vectors[candidates]) @ query
+        scores = similarity
+        if hybrid_search and hybrid_search_alpha < 1:
+            terms = set(_TOKEN.findall(content.lower()))
+            tokens = snapshot.tokens()
+            overlap = np.fromiter(
+                (len(terms & tokens[i]) / (len(terms) or 1) for i in candidates),
+                dtype=np.float32,
+                count=len(candidates),
+            )
+            alpha = float(hybrid_search_alpha)
+            scores = alpha * similarity + (1 - alpha) * overlap
+
+        k = min(int(top_k or len(candidates)), len(candidates))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        results = []
+        for position in top:
+            i = candidates[position]
+            row = storage_row(
+                snapshot.chunk_ids[i],
+                snapshot.contents[i],
+                snapshot.metadata[i],
+                float(scores[position]),
+                float(1 - similarity[position]),
+            )
+            if columns:
+                if any(column not in row for column in columns):
+                    self.fallbacks += 1
+                    return None
+                row = {column: row[column] for column in columns}
+            results.append(row)
+        self.hits += 1
+        return results
+
+
+_indexes: Dict[str, LocalVectorIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_local_index(kb_name: str) -> Optional[LocalVectorIndex]:
+    """Return the process-wide mirror of kb_name, or None if it isn't enabled."""
+    if kb_name not in LOCAL_INDEX_KBS or kb_name not in KB_STORAGE_TABLES:
+        return None
+    with _indexes_lock:
+        if kb_name not in _indexes:
+            _indexes[kb_name] = LocalVectorIndex(kb_name)
+        return _indexes[kb_name]
@@ -0,0 +1,377 @@
+"""Compile knowledge base and datasource queries into safely escaped SQL."""
+
+import math
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from mindsdb_sql_parser.ast import Identifier
+
+from tools.columns import render_columns
+
+# Filter key holding a list of filter dicts, any one of which may match
+OR_KEY = "$or"
+
+COMPARISON_OPERATORS = ("=", "!=", ">", ">=", "<", "<=")
+RANGE_BOUNDS = {"gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+
+# Metadata operators compile_vector_search can express on the jsonb column
+VECTOR_FILTER_OPERATORS = ("=", "!=", "IS NULL", "IN", "LIKE", "NOT_NULL")
+VECTOR_METADATA_COLUMN = "metadata"
+VECTOR_EMBEDDING_COLUMN = "embeddings"
+# pgvector indexes vector columns of up to 2000 dimensions; larger embeddings
+# are indexed, and so must be searched, cast to halfvec (up to 4000)
+MAX_VECTOR_INDEX_DIMENSIONS = 2000
+MAX_HALFVEC_INDEX_DIMENSIONS = 4000
+
+# Templates are cached per query shape; values never enter the cache
+TEMPLATE_CACHE_SIZE = 512
+
+# Marks a value slot while compiling (never valid in identifiers, unlike '?')
+_SLOT = "\x00"
+
+# A run of backslashes before a quote or the closing quote
+_BACKSLASHES_BEFORE_QUOTE = re.compile(r"(\\*)('|$)")
+
+
+def _escape_quote(match: "re.Match") -> str:
+    """
+    Escape a quote (or the end of the string) and the backslashes before it.
+
+    The MindSQL lexer pairs a backslash with the next character and the
+    parser turns \\' and '' into a quote, but keeps other backslashes as
+    they are. Quotes are doubled; a run of backslashes touching a quote is
+    padded so the lexer can't pair its last backslash with the quote.
+    """
+    backslashes, quote = len(match.group(1)), match.group(2)
+    if not backslashes:
+        return "''" if quote else ""
+    if backslashes % 2:
+        return "\\" * (backslashes + 1) + "''"
+    return "\\" * backslashes + "\\'"
+
+
+@dataclass(frozen=True)
+class CompiledQuery:
+    """SQL text plus the template and parameters it was rendered from."""
+
+    sql: str
+    template: str
+    params: Tuple[Any, ...]
+
+
+def quote_literal(value: Any) -> str:
+    """
+    Render a Python value as a MindsDB SQL literal.
+
+    Strings are single-quoted with quotes doubled, so content such as
+    "customer's invoice" can't break out of the literal; backslashes (e.g.
+    C:\\Users) reach MindsDB unchanged.
+    """
+    if hasattr(value, "item"):
+        # NumPy scalars from DataFrame rows
+        value = value.item()
+    if value is None:
+        return "NULL"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        if isinstance(value, float) and not math.isfinite(value):
+            raise ValueError(f"Cannot use non-finite number in a query: {value}")
+        return repr(value)
+    text = _BACKSLASHES_BEFORE_QUOTE.sub(_escape_quote, str(value))
+    return f"'{text}'"
+
+
+def _identifier(name: str) -> str:
+    return Identifier(name).to_string()
+
+
+def _filter_shape(filters: Optional[Dict]) -> Tuple:
+    """Describe the structure of filters (keys and operators) without values."""
+    shape = []
+    for key in sorted(filters or {}):
+        value = filters[key]
+        if key == OR_KEY:
+            if not value:
+                raise ValueError(f"{OR_KEY} needs at least one filter group")
+            shape.append((OR_KEY, tuple(_filter_shape(group) for group in value)))
+        elif isinstance(value, dict) and "operator" in value:
+            operator = str(value["operator"]).upper()
+            if operator == "IN":
+                if not value.get("values"):
+                    raise ValueError(f"IN filter on {key} needs at least one value")
+                shape.append((key, operator, len(value["values"])))
+            elif operator == "RANGE":
+                bounds = tuple(b for b in RANGE_BOUNDS if value.get(b) is not None)
+                if not bounds:
+                    raise ValueError(f"RANGE filter on {key} needs gt/gte/lt/lte")
+                shape.append((key, operator, bounds))
+            elif operator in ("LIKE", "BETWEEN", "NOT_NULL") + COMPARISON_OPERATORS:
+                shape.append((key, operator))
+            else:
+                raise ValueError(f"Unsupported filter operator for {key}: {operator}")
+        else:
+            shape.append((key, "IS NULL" if value is None else "="))
+    return tuple(shape)
+
+
+def _filter_params(filters: Optional[Dict]) -> List[Any]:
+    """Collect filter values in the order _filter_shape lays out placeholders."""
+    params = []
+    for key in sorted(filters or {}):
+        value = filters[key]
+        if key == OR_KEY:
+            for group in value:
+                params.extend(_filter_params(group))
+        elif isinstance(value, dict) and "operator" in value:
+            operator = str(value["operator"]).upper()
+            if operator == "IN":
+                params.extend(value["values"])
+            elif operator == "RANGE":
+                params.extend(
+                    value[b] for b in RANGE_BOUNDS if value.get(b) is not None
+                )
+            elif operator == "BETWEEN":
+                params.extend([value["start"], value["end"]])
+            elif operator != "NOT_NULL":
+                params.append(value["value"])
+        elif value is not None:
+            params.append(value)
+    return params
+
+
+def _compile_conditions(shape: Tuple) -> List[str]:
+    """Turn a filter shape into condition fragments with value slots."""
+    conditions = []
+    for entry in shape:
+        if entry[0] == OR_KEY:
+            groups = [" AND ".join(_compile_conditions(group)) for group in entry[1]]
+            conditions.append("(" + " OR ".join(f"({g})" for g in groups) + ")")
+            continue
+
+        column, operator = _identifier(entry[0]), entry[1]
+        if operator == "IN":
+            conditions.append(f"{column} IN ({', '.join(_SLOT * entry[2])})")
+        elif operator == "RANGE":
+            conditions.extend(f"{column} {RANGE_BOUNDS[b]} {_SLOT}" for b in entry[2])
+        elif operator == "BETWEEN":
+            conditions.append(f"{column} BETWEEN {_SLOT} AND {_SLOT}")
+        elif operator == "NOT_NULL":
+            conditions.append(f"{column} IS NOT NULL")
+        elif operator == "IS NULL":
+            conditions.append(f"{column} IS NULL")
+        else:
+            conditions.append(f"{column} {operator} {_SLOT}")
+    return conditions
+
+
+@lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def _compile_template(
+    table: Tuple[str, ...],
+    columns: Optional[Tuple[str, ...]],
+    has_content: bool,
+    shape: Tuple,
+    hybrid_search: bool,
+    has_limit: bool,
+    order_by: Optional[str] = None,
+    has_offset: bool = False,
+) -> Tuple[str, ...]:
+    """Build the SQL for one query shape, split around its value slots."""
+    query = f"SELECT {render_columns(columns)} FROM "
+    query += Identifier(parts=list(table)).to_string()
+
+    conditions = [f"content = {_SLOT}"] if has_content else []
+    conditions.extend(_compile_conditions(shape))
+    if hybrid_search:
+        conditions.extend(["hybrid_search = true", f"hybrid_search_alpha = {_SLOT}"])
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    if order_by:
+        query += f" ORDER BY {_identifier(order_by)}"
+    if has_limit:
+        query += f" LIMIT {_SLOT}"
+    if has_offset:
+        query += f" OFFSET {_SLOT}"
+    return tuple(query.split(_SLOT))
+
+
+def _render(fragments: Tuple[str, ...], params: Sequence[Any]) -> CompiledQuery:
+    sql = fragments[0] + "".join(
+        quote_literal(param) + fragment
+        for param, fragment in zip(params, fragments[1:])
+    )
+    return CompiledQuery(sql=sql, template="?".join(fragments), params=tuple(params))
+
+
+def compile_search(
+    kb_name: str,
+    content: Optional[str] = None,
+    filters: Optional[Dict] = None,
+    top_k: Optional[int] = None,
+    hybrid_search: bool = False,
+    hybrid_search_alpha: float = 0.5,
+    columns: Optional[Sequence[str]] = None,
+) -> CompiledQuery:
+    """
+    Compile a knowledge base search into escaped SQL.
+
+    Args:
+        kb_name: Knowledge base to search
+        content: Semantic search query
+        filters: Metadata filters. Values are either plain (equality, None for
+            IS NULL) or operator dicts: LIKE/=/!=/>/>=/</<= with 'value',
+            BETWEEN with 'start' and 'end', IN with 'values', RANGE with any of
+            'gt'/'gte'/'lt'/'lte', or NOT_NULL. A '$or' key takes a list of
+            filter dicts, any of which may match.
+        top_k: Maximum number of results (no LIMIT when falsy)
+        hybrid_search: Enable hybrid search (semantic + keyword)
+        hybrid_search_alpha: Balance between semantic (1.0) and keyword (0.0) relevance
+        columns: Columns to select (None for every column)
+
+    Returns:
+        CompiledQuery whose sql is canonical: equivalent filter dicts compile
+        to identical text
+    """
+    params: List[Any] = [content] if content else []
+    params.extend(_filter_params(filters))
+    if hybrid_search:
+        params.append(float(hybrid_search_alpha))
+    if top_k:
+        params.append(int(top_k))
+
+    fragments = _compile_template(
+        (kb_name,),
+        tuple(columns) if columns else None,
+        bool(content),
+        _filter_shape(filters),
+        hybrid_search,
+        bool(top_k),
+    )
+    return _render(fragments, params)
+
+
+def compile_select(
+    datasource: str,
+    table: str,
+    filters: Optional[Dict] = None,
+    columns: Optional[Sequence[str]] = None,
+    limit: Optional[int] = None,
+    order_by: Optional[str] = None,
+    offset: Optional[int] = None,
+) -> CompiledQuery:
+    """Compile a filtered SELECT against a datasource table (same filter syntax)."""
+    params = _filter_params(filters)
+    if limit:
+        params.append(int(limit))
+    if offset:
+        params.append(int(offset))
+
+    fragments = _compile_template(
+        (datasource, table),
+        tuple(columns) if columns else None,
+        False,
+        _filter_shape(filters),
+        False,
+        bool(limit),
+        order_by,
+        bool(offset),
+    )
+    return _render(fragments, params)
+
+
+def pg_literal(value: Any) -> str:
+    """Render a value as a Postgres text literal (quotes doubled, no escapes)."""
+    if hasattr(value, "item"):
+        value = value.item()
+    if isinstance(value, bool):
+        # jsonb ->> renders booleans in lower case
+        value = "true" if value else "false"
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _pg_metadata_conditions(filters: Optional[Dict]) -> List[str]:
+    """Conditions on the jsonb metadata column of a KB storage table."""
+    conditions = []
+    for entry, value in zip(_filter_shape(filters), _iter_filters(filters)):
+        key, operator = entry[0], entry[1]
+        if key == OR_KEY or operator not in VECTOR_FILTER_OPERATORS:
+            raise ValueError(f"Vector search can't evaluate {operator} on {key}")
+        column = f"({VECTOR_METADATA_COLUMN}->>{pg_literal(key)})"
+        if operator == "IS NULL":
+            conditions.append(f"{column} IS NULL")
+        elif operator == "NOT_NULL":
+            conditions.append(f"{column} IS NOT NULL")
+        elif operator == "IN":
+            values = ", ".join(pg_literal(v) for v in value["values"])
+            conditions.append(f"{column} IN ({values})")
+        elif operator == "LIKE":
+            conditions.append(f"{column} LIKE {pg_literal(value['value'])}")
+        else:
+            literal = pg_literal(value["value"] if isinstance(value, dict) else value)
+            conditions.append(f"{column} {operator} {literal}")
+    return conditions
+
+
+def vector_filters_supported(filters: Optional[Dict]) -> bool:
+    """Whether compile_vector_search can express filters."""
+    try:
+        _pg_metadata_conditions(filters)
+    except ValueError:
+        return False
+    return True
+
+
+def _iter_filters(filters: Optional[Dict]) -> List[Any]:
+    return [filters[key] for key in sorted(filters or {})]
+
+
+def vector_search_expression(dims: int) -> str:
+    """The embedding column as the ANN index stores it for dims dimensions."""
+    if dims > MAX_VECTOR_INDEX_DIMENSIONS:
+        return f"({VECTOR_EMBEDDING_COLUMN}::halfvec({dims}))"
+    return VECTOR_EMBEDDING_COLUMN
+
+
+def compile_vector_search(
+    table: str,
+    vector: Sequence[float],
+    filters: Optional[Dict] = None,
+    top_k: int = 5,
+) -> str:
+    """
+    Compile a nearest-neighbour query against a KB's pgvector storage table.
+
+    The SQL is Postgres, meant to run as a native query through the pgvector
+    datasource, so a query embedded once can search several tables. It
+    orders by cosine distance on the same expression the ANN index is built
+    on (halfvec for embeddings over MAX_VECTOR_INDEX_DIMENSIONS).
+
+    Args:
+        table: Storage table (e.g. 'pages')
+        vector: Query embedding
+        filters: Metadata filters; only equality, IS NULL, !=, IN, LIKE and
+            NOT_NULL are supported (ValueError otherwise)
+        top_k: Number of chunks to return
+
+    Returns:
+        SQL text
+    """
+    dims = len(vector)
+    literal = "'[" + ",".join(repr(float(x)) for x in vector) + "]'"
+    if dims > MAX_VECTOR_INDEX_DIMENSIONS:
+        literal += f"::halfvec({dims})"
+    query = (
+        f"SELECT id, content, {VECTOR_METADATA_COLUMN}::text AS metadata, "
+        f"{vector_search_expression(dims)} <=> {literal} AS distance FROM {table}"
+    )
+    conditions = _pg_metadata_conditions(filters)
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    return query + f" ORDER BY distance LIMIT {int(top_k)}"
+
+
+def template_cache_info():
+    """Hit/miss statistics for the compiled template cache."""
+    return _compile_template.cache_info()
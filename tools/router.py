@@ -0,0 +1,497 @@
+"""Local query router that decides which systems to search without an LLM call."""
+
+import json
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from tools.embeddings import normalize_query
+from tools.federated import SOURCE_KBS
+
+LOCAL_ROUTER_ENABLED = os.getenv("LOCAL_ROUTER_ENABLED", "true").lower() == "true"
+# Decisions below this confidence are left to the routing LLM
+ROUTER_CONFIDENCE = float(os.getenv("ROUTER_CONFIDENCE", "0.7"))
+# JSONL of LLM routing decisions the classifier learns from (empty: don't keep)
+ROUTING_LOG_PATH = os.getenv(
+    "ROUTING_LOG_PATH", os.path.join(".cache", "routing_log.jsonl")
+)
+# Logged decisions needed before the classifier is trusted
+ROUTER_MIN_EXAMPLES = int(os.getenv("ROUTER_MIN_EXAMPLES", "20"))
+ROUTER_MAX_EXAMPLES = 5000
+# Neighbours voting on a query, and how similar the closest must be
+ROUTER_NEIGHBOURS = 5
+ROUTER_MIN_SIMILARITY = 0.3
+# Confidence of a route derived only from topic words (e.g. 'bug', 'policy');
+# below the default ROUTER_CONFIDENCE, so on their own they don't skip the LLM
+TOPIC_CONFIDENCE = 0.5
+
+# Cache of LLM routing plans, so a question pattern is only routed once
+ROUTING_CACHE_ENABLED = os.getenv("ROUTING_CACHE_ENABLED", "true").lower() == "true"
+ROUTING_CACHE_MAX_ENTRIES = int(os.getenv("ROUTING_CACHE_MAX_ENTRIES", "1024"))
+ROUTING_CACHE_TTL = float(os.getenv("ROUTING_CACHE_TTL", "86400"))
+# Paraphrases at least this similar reuse a cached plan (0: exact matches only)
+ROUTING_CACHE_SIMILARITY = float(os.getenv("ROUTING_CACHE_SIMILARITY", "0.92"))
+
+SOURCES = tuple(SOURCE_KBS)
+
+# Naming a system routes to it directly
+SYSTEM_KEYWORDS = {
+    "jira": ["jira"],
+    "zendesk": ["zendesk"],
+    "confluence": ["confluence", "wiki"],
+}
+# Asking to compare or look everywhere searches every system
+ALL_SYSTEMS_KEYWORDS = [
+    "compare",
+    "comparison",
+    "all systems",
+    "everywhere",
+    "across systems",
+]
+# Topic words the routing prompt associates with each system
+TOPIC_KEYWORDS = {
+    "jira": [
+        "bug",
+        "bugs",
+        "defect",
+        "defects",
+        "engineering",
+        "regression",
+        "epic",
+        "sprint",
+        "stack trace",
+    ],
+    "zendesk": [
+        "ticket",
+        "tickets",
+        "customer",
+        "customers",
+        "support",
+        "complaint",
+        "complaints",
+        "user issue",
+        "user issues",
+    ],
+    "confluence": [
+        "doc",
+        "docs",
+        "documentation",
+        "guide",
+        "guides",
+        "policy",
+        "policies",
+        "how to",
+        "how-to",
+        "runbook",
+    ],
+}
+
+
+def _compile_keywords() -> Tuple["re.Pattern", Dict[str, Tuple[str, Optional[str]]]]:
+    """One alternation over every keyword, longest first, plus what each means."""
+    meaning: Dict[str, Tuple[str, Optional[str]]] = {}
+    for keyword in ALL_SYSTEMS_KEYWORDS:
+        meaning[keyword] = ("all", None)
+    for kind, table in (("system", SYSTEM_KEYWORDS), ("topic", TOPIC_KEYWORDS)):
+        for source, keywords in table.items():
+            for keyword in keywords:
+                meaning.setdefault(keyword, (kind, source))
+    alternation = "|".join(
+        re.escape(keyword) for keyword in sorted(meaning, key=len, reverse=True)
+    )
+    return re.compile(rf"\b(?:{alternation})\b", re.I), meaning
+
+
+_KEYWORD_PATTERN, _KEYWORD_MEANING = _compile_keywords()
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+@dataclass
+class RoutingDecision:
+    """A routing plan and how sure the local router is about it."""
+
+    plan: Dict[str, Any]
+    confidence: float
+    method: str
+
+
+def _plan(sources, reasoning: str) -> Dict[str, Any]:
+    plan = {source: source in sources for source in SOURCES}
+    plan["reasoning"] = reasoning
+    return plan
+
+
+def keyword_route(query: str) -> Optional[RoutingDecision]:
+    """
+    Route on keywords: named systems and 'compare' are certain, topic words
+    (bug, customer, policy...) are a strong hint. None when nothing matches.
+    """
+    found = {}
+    for match in _KEYWORD_PATTERN.finditer(query):
+        keyword = match.group(0).lower()
+        found[keyword] = _KEYWORD_MEANING[keyword]
+    if not found:
+        return None
+
+    kinds = {kind for kind, _ in found.values()}
+    if "all" in kinds:
+        return RoutingDecision(
+            _plan(SOURCES, "Keywords: compare or all systems requested"),
+            1.0,
+            "keywords",
+        )
+    named = {source for kind, source in found.values() if kind == "system"}
+    if named:
+        return RoutingDecision(
+            _plan(named, f"Keywords: {', '.join(sorted(named))} named in the query"),
+            1.0,
+            "keywords",
+        )
+    topics = {source for _, source in found.values()}
+    return RoutingDecision(
+        _plan(topics, f"Keywords: {', '.join(sorted(found))}"),
+        TOPIC_CONFIDENCE,
+        "keywords",
+    )
+
+
+def _terms(text: str) -> List[str]:
+    words = _WORD.findall(text.lower())
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+class RoutingClassifier:
+    """
+    TF-IDF nearest-neighbour classifier over past routing decisions.
+
+    Each source is a separate yes/no vote of the most similar logged
+    queries, weighted by cosine similarity. Confidence is how unanimous the
+    least certain source's vote is, and zero when no logged query is
+    similar enough to go by.
+    """
+
+    def __init__(
+        self,
+        neighbours: int = ROUTER_NEIGHBOURS,
+        min_similarity: float = ROUTER_MIN_SIMILARITY,
+    ):
+        self.neighbours = neighbours
+        self.min_similarity = min_similarity
+        self._queries: List[str] = []
+        self._labels: List[List[float]] = []
+        self._idf: Dict[str, float] = {}
+        # term -> (rows containing it, their normalized TF-IDF weights)
+        self._postings: Optional[Dict[str, Tuple[np.ndarray, np.ndarray]]] = None
+
+    def __len__(self) -> int:
+        return len(self._queries)
+
+    def add(self, query: str, plan: Dict[str, Any]) -> None:
+        self._queries.append(query)
+        self._labels.append([1.0 if plan.get(source) else 0.0 for source in SOURCES])
+        self._postings = None
+
+    def trim(self, max_examples: int) -> None:
+        """Keep only the most recent decisions."""
+        if len(self._queries) > max_examples:
+            self._queries = self._queries[-max_examples:]
+            self._labels = self._labels[-max_examples:]
+            self._postings = None
+
+    def _weights(self, counts: Counter) -> Dict[str, float]:
+        """L2-normalized TF-IDF weights of the known terms."""
+        weights = {
+            term: count * self._idf[term]
+            for term, count in counts.items()
+            if term in self._idf
+        }
+        norm = math.sqrt(sum(weight * weight for weight in weights.values()))
+        return {term: weight / norm for term, weight in weights.items()} if norm else {}
+
+    def _fit(self) -> None:
+        # An inverted index keeps memory proportional to the terms actually used
+        documents = [Counter(_terms(query)) for query in self._queries]
+        document_frequency = Counter(term for doc in documents for term in doc)
+        total = len(documents)
+        self._idf = {
+            term: math.log((1 + total) / (1 + count)) + 1
+            for term, count in document_frequency.items()
+        }
+        postings: Dict[str, Tuple[List[int], List[float]]] = {}
+        for row, doc in enumerate(documents):
+            for term, weight in self._weights(doc).items():
+                rows, weights = postings.setdefault(term, ([], []))
+                rows.append(row)
+                weights.append(weight)
+        self._postings = {
+            term: (np.array(rows), np.array(weights, dtype=np.float32))
+            for term, (rows, weights) in postings.items()
+        }
+
+    def predict(self, query: str) -> Optional[RoutingDecision]:
+        """Vote on a query; None when there is nothing to learn from."""
+        if not self._queries:
+            return None
+        if self._postings is None:
+            self._fit()
+
+        # Cosine similarity to every logged query
+        similarities = np.zeros(len(self._queries), dtype=np.float32)
+        for term, weight in self._weights(Counter(_terms(query))).items():
+            rows, weights = self._postings[term]
+            similarities[rows] += weight * weights
+
+        nearest = np.argsort(-similarities)[: self.neighbours]
+        nearest = nearest[similarities[nearest] > 0]
+        if len(nearest) == 0:
+            return None
+
+        weights = similarities[nearest]
+        labels = np.asarray(self._labels, dtype=np.float32)[nearest]
+        votes = weights @ labels / weights.sum()
+        best = float(weights[0])
+        confidence = float(np.min(np.abs(2 * votes - 1)))
+        if best < self.min_similarity:
+            confidence = 0.0
+
+        chosen = [source for source, vote in zip(SOURCES, votes) if vote >= 0.5]
+        reasoning = (
+            f"Classifier: {len(nearest)} similar past queries "
+            f"(closest {best:.2f} similar)"
+        )
+        return RoutingDecision(_plan(chosen, reasoning), confidence, "classifier")
+
+
+class LocalRouter:
+    """
+    Route queries locally and only defer to the routing LLM when unsure.
+
+    Named systems and 'compare' are matched by keyword; otherwise a
+    classifier trained on the LLM's earlier decisions votes, and topic
+    keywords are the last resort. Every LLM decision passed to record() is
+    logged so the classifier takes over more queries as the log grows.
+    """
+
+    def __init__(
+        self,
+        log_path: Optional[str] = ROUTING_LOG_PATH,
+        threshold: float = ROUTER_CONFIDENCE,
+        min_examples: int = ROUTER_MIN_EXAMPLES,
+        max_examples: int = ROUTER_MAX_EXAMPLES,
+    ):
+        """
+        Initialize the router.
+
+        Args:
+            log_path: JSONL file of logged decisions (None or '' to keep none)
+            threshold: Minimum confidence to route without the LLM
+            min_examples: Logged decisions needed before the classifier is used
+            max_examples: Most recent decisions the classifier learns from
+        """
+        self.log_path = log_path or None
+        self.threshold = threshold
+        self.min_examples = min_examples
+        self.max_examples = max_examples
+        self.classifier = RoutingClassifier()
+        self.counts: Counter = Counter()
+        self._lock = threading.Lock()
+        if self.log_path:
+            self._load()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.log_path):
+            return
+        with open(self.log_path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    self.classifier.add(entry["query"], entry["plan"])
+                except (json.JSONDecodeError, KeyError, TypeError):
+                    continue
+        self.classifier.trim(self.max_examples)
+
+    def decide(self, query: str) -> Optional[RoutingDecision]:
+        """Best local decision for a query, however confident."""
+        keywords = keyword_route(query)
+        if keywords is not None and keywords.confidence >= 1.0:
+            return keywords
+
+        learned = None
+        with self._lock:
+            if len(self.classifier) >= self.min_examples:
+                learned = self.classifier.predict(query)
+        candidates = [d for d in (learned, keywords) if d is not None]
+        if not candidates:
+            return None
+        return max(candidates, key=lambda decision: decision.confidence)
+
+    def route(self, query: str) -> Optional[RoutingDecision]:
+        """
+        Route a query without the LLM when confident enough.
+
+        Args:
+            query: User query
+
+        Returns:
+            RoutingDecision, or None when the routing LLM should be consulted
+        """
+        decision = self.decide(query)
+        if decision is None or decision.confidence < self.threshold:
+            self.counts["llm"] += 1
+            return None
+        self.counts[decision.method] += 1
+        return decision
+
+    def record(self, query: str, plan: Dict[str, Any]) -> None:
+        """Learn from (and log) a routing decision made by the LLM."""
+        with self._lock:
+            self.classifier.add(query, plan)
+            self.classifier.trim(self.max_examples)
+            if not self.log_path:
+                return
+            try:
+                os.makedirs(os.path.dirname(self.log_path) or ".", exist_ok=True)
+                entry = {
+                    "query": query,
+                    "plan": {source: bool(plan.get(source)) for source in SOURCES},
+                }
+                with open(self.log_path, "a") as f:
+                    f.write(json.dumps(entry) + "\n")
+            except OSError as e:
+                print(f"Could not log routing decision: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        """Queries routed by keywords, the classifier and the LLM."""
+        return {**self.counts, "examples": len(self.classifier)}
+
+
+class RoutingPlanCache:
+    """
+    LRU cache of routing plans with TTL expiry.
+
+    Plans are found by the normalized query first and, when an embedding
+    function is given, by the most similar cached query above a cosine
+    similarity threshold, so paraphrases reuse a plan too.
+    """
+
+    def __init__(
+        self,
+        embed_fn: Optional[Callable[[str], List[float]]] = None,
+        max_entries: int = ROUTING_CACHE_MAX_ENTRIES,
+        ttl: float = ROUTING_CACHE_TTL,
+        similarity: float = ROUTING_CACHE_SIMILARITY,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            embed_fn: Function returning the embedding of a query (None: exact only)
+            max_entries: Maximum number of cached plans
+            ttl: Seconds a plan is reused
+            similarity: Minimum cosine similarity for a paraphrase hit
+        """
+        self.embed_fn = embed_fn if similarity > 0 else None
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.similarity = similarity
+        self.hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # normalized query -> (expires_at, plan, unit vector or None)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._keys: List[str] = []
+        self._matrix: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+
+    def _embed(self, query: str) -> Optional[np.ndarray]:
+        if self.embed_fn is None:
+            return None
+        try:
+            vector = np.asarray(self.embed_fn(query), dtype=np.float32)
+        except Exception as e:
+            print(f"Routing cache embedding failed: {e}")
+            return None
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else None
+
+    def _nearest(self, vector: np.ndarray, now: float) -> Optional[str]:
+        if self._matrix is None:
+            self._keys = [
+                key for key, entry in self._entries.items() if entry[2] is not None
+            ]
+            if not self._keys:
+                return None
+            self._matrix = np.vstack([self._entries[key][2] for key in self._keys])
+
+        similarities = self._matrix @ vector
+        for index in np.argsort(-similarities):
+            if similarities[index] < self.similarity:
+                break
+            key = self._keys[index]
+            if self._entries[key][0] > now:
+                return key
+        return None
+
+    def get(self, query: str) -> Optional[Dict[str, Any]]:
+        """Return the cached plan for query or a close paraphrase, else None."""
+        key = normalize_query(query)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return dict(entry[1])
+            if self.embed_fn is None or not self._entries:
+                self.misses += 1
+                return None
+
+        # Embed outside the lock; the query embedder caches the vector anyway
+        vector = self._embed(query)
+        with self._lock:
+            nearest = self._nearest(vector, now) if vector is not None else None
+            if nearest is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(nearest)
+            self.similar_hits += 1
+            return dict(self._entries[nearest][1])
+
+    def set(self, query: str, plan: Dict[str, Any]) -> None:
+        """Cache the plan chosen for query."""
+        key = normalize_query(query)
+        vector = self._embed(query)
+        now = time.time()
+        with self._lock:
+            self._entries[key] = (now + self.ttl, dict(plan), vector)
+            self._entries.move_to_end(key)
+            for stale in [k for k, v in self._entries.items() if v[0] <= now]:
+                del self._entries[stale]
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            self._matrix = None
+
+    def clear(self) -> None:
+        """Drop every cached plan (e.g. after changing the routing prompt)."""
+        with self._lock:
+            self._entries.clear()
+            self._matrix = None
+
+    def stats(self) -> Dict[str, int]:
+        """Return exact/similar hit, miss and eviction counters and the size."""
+        return {
+            "hits": self.hits,
+            "similar_hits": self.similar_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+        }
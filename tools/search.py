@@ -1,22 +1,99 @@
 """Tools for semantic search and analysis."""
 
-from typing import Dict, List, Optional
-
-import mindsdb_sdk
+import asyncio
+import json
+import os
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from tools.cache import (
+    DEFAULT_CACHE_TTL,
+    KB_CACHE_TTLS,
+    ResultCache,
+    get_result_cache,
+    make_cache_key,
+)
+from tools.columns import DATASOURCE_COLUMNS, KB_COLUMNS, Columns, resolve_columns
+from tools.connection import MindsDBConnectionPool, get_pool
+from tools.executor import get_executor, run_blocking
+from tools.embeddings import QueryEmbeddingCache, get_query_embedder
+from tools.kb_layouts import KB_STORAGE_TABLES
+from tools.local_index import LocalVectorIndex, get_local_index, storage_row
+from tools.query_builder import (
+    VECTOR_EMBEDDING_COLUMN,
+    compile_search,
+    compile_select,
+    compile_vector_search,
+    vector_filters_supported,
+)
+from tools.semantic_cache import invalidate_answers
+
+# Rows fetched per round-trip by the iter_* datasource readers
+RAW_DATA_PAGE_SIZE = int(os.getenv("RAW_DATA_PAGE_SIZE", "1000"))
+
+# Knowledge bases whose semantic-only searches use locally embedded (cached)
+# query vectors directly against their pgvector table instead of the KB
+VECTOR_SEARCH_KBS = [
+    kb.strip() for kb in os.getenv("VECTOR_SEARCH_KBS", "").split(",") if kb.strip()
+]
+
+# Prefix of cache keys for results ranked by the vector search path, which
+# differ from the KB's (reranked) results for the same arguments
+VECTOR_CACHE_PREFIX = "vector:"
 
 
 class SemanticSearchTool:
     """Generic search tool for MindsDB knowledge bases with hybrid search support."""
 
-    def __init__(self, kb_name: str = "confluence_kb"):
+    def __init__(
+        self,
+        kb_name: str = "confluence_kb",
+        pool: Optional[MindsDBConnectionPool] = None,
+        cache: Optional[ResultCache] = None,
+        cache_ttl: Optional[float] = None,
+        local_index: Optional[LocalVectorIndex] = None,
+        vector_search: Optional[bool] = None,
+        embedder: Optional[QueryEmbeddingCache] = None,
+        direct: bool = False,
+    ):
         """
         Initialize the search tool.
 
         Args:
             kb_name: Name of the knowledge base to search
+            pool: Connection pool to draw from (default: shared process pool)
+            cache: Result cache (default: shared cache from SEARCH_CACHE_BACKEND)
+            cache_ttl: Seconds to keep cached results (default: KB refresh cadence)
+            local_index: In-process mirror to search first (default: the shared
+                mirror when kb_name is listed in LOCAL_INDEX_KBS)
+            vector_search: Run semantic-only searches against the pgvector
+                table with a cached query embedding (default: kb_name is
+                listed in VECTOR_SEARCH_KBS)
+            embedder: Query embedding cache (default: the shared one)
+            direct: Always query the KB itself, without the result cache, the
+                local mirror or the vector search path (e.g. to evaluate it)
         """
-        self.server = mindsdb_sdk.connect()
+        self.pool = pool or get_pool()
         self.kb_name = kb_name
+        self.cache = cache if cache is not None else get_result_cache()
+        self.cache_ttl = cache_ttl or KB_CACHE_TTLS.get(kb_name, DEFAULT_CACHE_TTL)
+        self.local_index = (
+            local_index if local_index is not None else get_local_index(kb_name)
+        )
+        self.vector_search = (
+            vector_search if vector_search is not None else kb_name in VECTOR_SEARCH_KBS
+        )
+        if direct:
+            self.cache = self.local_index = None
+            self.vector_search = False
+        self._embedder = embedder
+        # Dimension of the storage table's embeddings, probed on first use
+        self._vector_dims: Optional[int] = None
+
+    @property
+    def embedder(self) -> QueryEmbeddingCache:
+        if self._embedder is None:
+            self._embedder = get_query_embedder()
+        return self._embedder
 
     def search(
         self,
@@ -25,66 +102,279 @@ class SemanticSearchTool:
         top_k: int = 5,
         hybrid_search: bool = True,
         hybrid_search_alpha: float = 0.5,
+        columns: Columns = None,
+        query_vector: Optional[Sequence[float]] = None,
     ) -> List[Dict]:
         """
         Search knowledge base with hybrid search (semantic + metadata filtering).
 
         Args:
             content: Search content query for semantic search
-            filters: Metadata filters (e.g., {'status': 'current'})
+            filters: Metadata filters (e.g., {'status': 'current'}); see
+                tools.query_builder.compile_search for operators and OR groups
             top_k: Maximum number of results to return
             hybrid_search: Enable hybrid search (semantic + keyword)
             hybrid_search_alpha: Balance between semantic (1.0) and keyword (0.0) relevance
+            columns: Columns to return (default: KB_COLUMNS, 'full' for all)
+            query_vector: Precomputed embedding of content, used by the local
+                mirror and the vector search path instead of embedding again
 
         Returns:
             List of matching documents
         """
-        query = f"SELECT * FROM {self.kb_name}"
-        conditions = []
-
-        if content:
-            conditions.append(f"content='{content}'")
-
-        if filters:
-            for key, value in filters.items():
-                if isinstance(value, dict) and "operator" in value:
-                    # Handle advanced operators like LIKE, BETWEEN
-                    operator = value["operator"]
-                    if operator == "LIKE":
-                        conditions.append(f"{key} LIKE '{value['value']}'")
-                    elif operator == "BETWEEN":
-                        conditions.append(
-                            f"{key} BETWEEN '{value['start']}' AND '{value['end']}'"
-                        )
-                    elif operator == "IN":
-                        values = "', '".join(value["values"])
-                        conditions.append(f"{key} IN ('{values}')")
-                    elif operator == "NOT_NULL":
-                        conditions.append(f"{key} IS NOT NULL")
-                else:
-                    # Simple equality filter
-                    conditions.append(f"{key}='{value}'")
-
-        if hybrid_search:
-            conditions.append("hybrid_search=true")
-            conditions.append(f"hybrid_search_alpha={hybrid_search_alpha}")
-
-        if conditions:
-            query += " WHERE " + " AND ".join(conditions)
-
-        if top_k:
-            query += f" LIMIT {top_k}"
-
-        results = self.server.query(query).fetch()
+        columns = resolve_columns(columns, KB_COLUMNS)
+        # Hybrid searches need the KB's keyword blending and reranking
+        vector_path = (
+            bool(content)
+            and not hybrid_search
+            and self._vector_searchable(filters, columns)
+        )
 
+        # Results are cached under the path that produced them
+        cache_key = vector_key = None
+        if self.cache is not None:
+            cache_key = make_cache_key(
+                self.kb_name,
+                content,
+                filters,
+                top_k,
+                hybrid_search,
+                hybrid_search_alpha,
+                columns,
+            )
+            if vector_path:
+                vector_key = VECTOR_CACHE_PREFIX + cache_key
+            for key in (vector_key, cache_key):
+                cached = self.cache.get(key) if key is not None else None
+                if cached is not None:
+                    return cached
+
+        if self.local_index is not None:
+            local_results = self.local_index.search(
+                content,
+                filters,
+                top_k,
+                hybrid_search,
+                hybrid_search_alpha,
+                columns,
+                query_vector,
+            )
+            if local_results is not None:
+                if cache_key is not None:
+                    self.cache.set(
+                        cache_key, self.kb_name, local_results, self.cache_ttl
+                    )
+                return local_results
+
+        if vector_path:
+            try:
+                vector_results = self._vector_search(
+                    content, filters, top_k, columns, query_vector
+                )
+            except Exception as e:
+                print(f"Vector search on {self.kb_name} failed, using the KB: {e}")
+            else:
+                if vector_key is not None:
+                    self.cache.set(
+                        vector_key, self.kb_name, vector_results, self.cache_ttl
+                    )
+                return vector_results
+
+        query = compile_search(
+            self.kb_name,
+            content=content,
+            filters=filters,
+            top_k=top_k,
+            hybrid_search=hybrid_search,
+            hybrid_search_alpha=hybrid_search_alpha,
+            columns=columns,
+        ).sql
+
+        with self.pool.connection() as server:
+            results = server.query(query).fetch()
+
+        results_list = []
         if results is not None and len(results) > 0:
             results_list = (
                 results.to_dict(orient="records")
                 if hasattr(results, "to_dict")
                 else results
             )
-            return results_list
-        return []
+
+        if cache_key is not None:
+            self.cache.set(cache_key, self.kb_name, results_list, self.cache_ttl)
+        return results_list
+
+    async def asearch(
+        self,
+        content: str = None,
+        filters: Dict = None,
+        top_k: int = 5,
+        hybrid_search: bool = True,
+        hybrid_search_alpha: float = 0.5,
+        columns: Columns = None,
+        query_vector: Optional[Sequence[float]] = None,
+    ) -> List[Dict]:
+        """Async version of search, run on the shared search executor."""
+        return await run_blocking(
+            self.search,
+            content=content,
+            filters=filters,
+            top_k=top_k,
+            hybrid_search=hybrid_search,
+            hybrid_search_alpha=hybrid_search_alpha,
+            columns=columns,
+            query_vector=query_vector,
+        )
+
+    def _vector_searchable(
+        self, filters: Optional[Dict], columns: Optional[List[str]]
+    ) -> bool:
+        """Whether a search can take the vector path instead of the KB."""
+        if not self.vector_search or self.kb_name not in KB_STORAGE_TABLES:
+            return False
+        if columns and any(column not in KB_COLUMNS for column in columns):
+            return False
+        return vector_filters_supported(filters)
+
+    def _vector_search(
+        self,
+        content: str,
+        filters: Optional[Dict],
+        top_k: int,
+        columns: Optional[List[str]],
+        query_vector: Optional[Sequence[float]] = None,
+    ) -> List[Dict]:
+        """
+        Nearest chunks from the KB's pgvector table for a locally embedded query.
+
+        The query embedding comes from the shared cache, so fanning a query
+        out to several KBs embeds it once. Ranking is by cosine distance only
+        (no keyword blending or reranking). Callers check _vector_searchable
+        first and fall back to the KB when this raises.
+
+        Returns:
+            Rows shaped like KB results
+
+        Raises:
+            ValueError: If the local embedding model doesn't produce vectors
+                of the storage table's dimension (the path is then disabled)
+        """
+        if query_vector is None:
+            query_vector = self.embedder.embed(content)
+
+        datasource, table = KB_STORAGE_TABLES[self.kb_name]
+        with self.pool.connection() as server:
+            if self._vector_dims is None:
+                dims = server.query(
+                    f"SELECT * FROM {datasource} (SELECT vector_dims("
+                    f"{VECTOR_EMBEDDING_COLUMN}) FROM {table} LIMIT 1)"
+                ).fetch()
+                if not len(dims):
+                    return []
+                self._vector_dims = int(dims.iloc[0, 0])
+            if len(query_vector) != self._vector_dims:
+                self.vector_search = False
+                raise ValueError(
+                    f"query embeddings have {len(query_vector)} dimensions, "
+                    f"{table} stores {self._vector_dims}; disabling vector search"
+                )
+            sql = compile_vector_search(table, query_vector, filters, top_k or 5)
+            df = server.query(f"SELECT * FROM {datasource} ({sql})").fetch()
+
+        results = []
+        for row in df.to_dict(orient="records") if len(df) else []:
+            metadata = row.get("metadata")
+            if isinstance(metadata, str):
+                metadata = json.loads(metadata)
+            distance = float(row["distance"])
+            result = storage_row(
+                str(row["id"]), row["content"], metadata or {}, 1 - distance, distance
+            )
+            if columns:
+                result = {column: result[column] for column in columns}
+            results.append(result)
+        return results
+
+    def search_many(
+        self,
+        queries: List[str],
+        filters: Dict = None,
+        top_k: int = 5,
+        hybrid_search: bool = True,
+        hybrid_search_alpha: float = 0.5,
+        columns: Columns = None,
+    ) -> List[List[Dict]]:
+        """
+        Run many searches against the knowledge base in one batch.
+
+        Distinct queries are submitted concurrently on the shared search
+        executor (each on its own pooled connection, cached results are served
+        without a round-trip) and the results are returned per query.
+
+        Args:
+            queries: Search content queries
+            filters: Metadata filters applied to every query
+            top_k: Maximum number of results per query
+            hybrid_search: Enable hybrid search (semantic + keyword)
+            hybrid_search_alpha: Balance between semantic (1.0) and keyword (0.0) relevance
+            columns: Columns to return (default: KB_COLUMNS, 'full' for all)
+
+        Returns:
+            One list of matching documents per query, in the order of queries
+
+        Raises:
+            Exception: The error of the first failing query, in query order
+        """
+        executor = get_executor()
+        futures = {
+            query: executor.submit(
+                self.search,
+                content=query,
+                filters=filters,
+                top_k=top_k,
+                hybrid_search=hybrid_search,
+                hybrid_search_alpha=hybrid_search_alpha,
+                columns=columns,
+            )
+            for query in dict.fromkeys(queries)
+        }
+        return [list(futures[query].result()) for query in queries]
+
+    async def asearch_many(
+        self,
+        queries: List[str],
+        filters: Dict = None,
+        top_k: int = 5,
+        hybrid_search: bool = True,
+        hybrid_search_alpha: float = 0.5,
+        columns: Columns = None,
+    ) -> List[List[Dict]]:
+        """Async version of search_many."""
+        unique_queries = list(dict.fromkeys(queries))
+        gathered = await asyncio.gather(
+            *(
+                self.asearch(
+                    content=query,
+                    filters=filters,
+                    top_k=top_k,
+                    hybrid_search=hybrid_search,
+                    hybrid_search_alpha=hybrid_search_alpha,
+                    columns=columns,
+                )
+                for query in unique_queries
+            )
+        )
+        by_query = dict(zip(unique_queries, gathered))
+        return [list(by_query[query]) for query in queries]
+
+    def invalidate_cache(self) -> None:
+        """Drop cached search results for this knowledge base (and answers)."""
+        if self.cache is not None:
+            self.cache.invalidate(self.kb_name)
+        invalidate_answers()
+        if self.local_index is not None:
+            self.local_index.mark_stale()
 
     def search_by_meta(self, filters: Dict, top_k: int = 5) -> List[Dict]:
         """
@@ -162,7 +452,11 @@ class SemanticSearchTool:
         return self.search(content=content, filters=filters, top_k=top_k)
 
     def query_raw_data(
-        self, datasource: str, table: str, filters: Optional[Dict] = None
+        self,
+        datasource: str,
+        table: str,
+        filters: Optional[Dict] = None,
+        columns: Columns = None,
     ) -> List[Dict]:
         """
         Query raw data from a datasource (not from KB).
@@ -170,22 +464,109 @@ class SemanticSearchTool:
         Args:
             datasource: Datasource name (e.g., 'confluence_datasource')
             table: Table name (e.g., 'pages')
-            filters: Filters to apply
+            filters: Filters to apply (same syntax as search filters)
+            columns: Columns to return (default: lean projection from
+                DATASOURCE_COLUMNS, 'full' for all)
 
         Returns:
             List of matching records
         """
-        # Access databases using dot notation
-        db_obj = getattr(self.server.databases, datasource)
-        table_obj = getattr(db_obj.tables, table)
+        columns = resolve_columns(columns, DATASOURCE_COLUMNS.get((datasource, table)))
+        query = compile_select(datasource, table, filters=filters, columns=columns).sql
 
-        if filters:
-            df = table_obj.filter(**filters).fetch()
-        else:
-            df = table_obj.fetch()
+        with self.pool.connection() as server:
+            df = server.query(query).fetch()
 
         return df.to_dict(orient="records") if hasattr(df, "to_dict") else df
 
+    async def aquery_raw_data(
+        self,
+        datasource: str,
+        table: str,
+        filters: Optional[Dict] = None,
+        columns: Columns = None,
+    ) -> List[Dict]:
+        """Async version of query_raw_data, run on the shared search executor."""
+        return await run_blocking(
+            self.query_raw_data, datasource, table, filters, columns
+        )
+
+    def iter_raw_data(
+        self,
+        datasource: str,
+        table: str,
+        filters: Optional[Dict] = None,
+        columns: Columns = None,
+        page_size: int = RAW_DATA_PAGE_SIZE,
+        key: Optional[str] = "id",
+        start_after: Optional[object] = None,
+    ) -> Iterator[List[Dict]]:
+        """
+        Page through raw datasource rows without loading the whole table.
+
+        Pages are read with keyset pagination on key (WHERE key > last ORDER BY
+        key), or with LIMIT/OFFSET when key is None or already filtered on.
+        Each page is fetched on its own pooled connection, so abandoning the
+        iterator early never holds a connection.
+
+        Args:
+            datasource: Datasource name (e.g., 'zendesk_datasource')
+            table: Table name (e.g., 'tickets')
+            filters: Filters to apply (same syntax as search filters)
+            columns: Columns to return (default: lean projection from
+                DATASOURCE_COLUMNS, 'full' for all)
+            page_size: Rows per page
+            key: Unique, sortable column for keyset pagination
+            start_after: Resume keyset pagination after this key value
+
+        Yields:
+            Lists of up to page_size records
+        """
+        if page_size < 1:
+            raise ValueError("page_size must be at least 1")
+        columns = resolve_columns(columns, DATASOURCE_COLUMNS.get((datasource, table)))
+        filters = dict(filters or {})
+        if key is not None and key in filters:
+            key = None
+        if start_after is not None and key is None:
+            raise ValueError("start_after needs keyset pagination (key)")
+        if key is not None and columns is not None and key not in columns:
+            columns = columns + [key]
+
+        last_key = start_after
+        offset = 0
+        while True:
+            page_filters = filters
+            if key is not None and last_key is not None:
+                page_filters = {**filters, key: {"operator": ">", "value": last_key}}
+            query = compile_select(
+                datasource,
+                table,
+                filters=page_filters,
+                columns=columns,
+                limit=page_size,
+                order_by=key,
+                offset=None if key is not None else offset,
+            ).sql
+
+            with self.pool.connection() as server:
+                df = server.query(query).fetch()
+            page = df.to_dict(orient="records") if hasattr(df, "to_dict") else df
+            if not page:
+                return
+
+            yield page
+            if len(page) < page_size:
+                return
+            offset += len(page)
+            if key is not None:
+                last_key = page[-1].get(key)
+                if last_key is None or last_key != last_key:
+                    raise ValueError(
+                        f"Cannot page {datasource}.{table} by {key}: "
+                        "row without a key (pass key=None to use OFFSET)"
+                    )
+
     def refresh_kb(self, datasource: str, table: str) -> None:
         """
         Refresh datasource and update knowledge base.
@@ -194,15 +575,18 @@ class SemanticSearchTool:
             datasource: Datasource name to refresh
             table: Table name to insert into KB
         """
-        # Refresh the datasource
-        query = f"REFRESH {datasource}"
-        self.server.query(query)
-        print(f"✓ Refreshed {datasource}")
-
-        # Update KB
-        try:
-            kb = self.server.knowledge_bases.get(self.kb_name)
-            kb.insert_query(self.server.databases[datasource].tables[table])
-            print(f"✓ Updated {self.kb_name}")
-        except Exception as e:
-            print(f"Error updating KB: {e}")
+        with self.pool.connection() as server:
+            # Refresh the datasource
+            query = f"REFRESH {datasource}"
+            server.query(query)
+            print(f"✓ Refreshed {datasource}")
+
+            # Update KB
+            try:
+                kb = server.knowledge_bases.get(self.kb_name)
+                kb.insert_query(server.databases[datasource].tables[table])
+                print(f"✓ Updated {self.kb_name}")
+            except Exception as e:
+                print(f"Error updating KB: {e}")
+
+        self.invalidate_cache()
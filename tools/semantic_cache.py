@@ -0,0 +1,176 @@
+"""Semantic cache of agent answers keyed by query embeddings."""
+
+import os
+import re
+import threading
+import time
+import weakref
+from typing import Any, Callable, Dict, FrozenSet, List, Optional
+
+import numpy as np
+
+from tools.cache import KB_CACHE_TTLS
+
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "500"))
+# Answers never outlive the fastest KB refresh cadence
+SEMANTIC_CACHE_MAX_AGE = float(
+    os.getenv("SEMANTIC_CACHE_MAX_AGE", min(3600, *KB_CACHE_TTLS.values()))
+)
+
+# Tokens with a digit (ticket numbers, keys like PAY-123, versions, codes)
+_IDENTIFIER = re.compile(r"[\w.-]*\d[\w.-]*")
+
+# Every live cache, so KB updates can drop the answers built on old data
+_caches: "weakref.WeakSet[SemanticCache]" = weakref.WeakSet()
+
+
+def query_identifiers(query: str) -> FrozenSet[str]:
+    """
+    Identifiers and numbers in a query, which must match exactly for a hit.
+
+    'status of ticket 123' and 'status of ticket 124' embed almost
+    identically but ask about different records.
+    """
+    return frozenset(token.strip(".-") for token in _IDENTIFIER.findall(query.lower()))
+
+
+def invalidate_answers() -> None:
+    """Drop the cached answers of every semantic cache in this process."""
+    for cache in list(_caches):
+        cache.clear()
+
+
+class SemanticCache:
+    """
+    Answer cache that matches new queries against previously answered ones.
+
+    Queries are embedded and compared by cosine similarity against a NumPy
+    matrix of cached query vectors (brute force, which is fast for a few
+    thousand entries). A lookup hits when the best match with the same
+    identifiers (see query_identifiers) is at least ``threshold`` similar
+    and younger than ``max_age`` seconds.
+    """
+
+    def __init__(
+        self,
+        embed_fn: Callable[[str], List[float]],
+        threshold: float = SEMANTIC_CACHE_THRESHOLD,
+        max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES,
+        max_age: float = SEMANTIC_CACHE_MAX_AGE,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            embed_fn: Function returning the embedding of a query string
+                (e.g. the shared QueryEmbeddingCache, so the lookup and add
+                for one query embed it once)
+            threshold: Minimum cosine similarity for a hit
+            max_entries: Maximum number of cached answers
+            max_age: Seconds after which a cached answer is no longer served
+        """
+        self.embed_fn = embed_fn
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self._entries: List[Dict[str, Any]] = []
+        self._matrix: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+        _caches.add(self)
+
+    def _embed(self, query: str) -> np.ndarray:
+        vector = np.asarray(self.embed_fn(query), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def _expire(self) -> None:
+        cutoff = time.time() - self.max_age
+        live = [entry for entry in self._entries if entry["cached_at"] > cutoff]
+        live = live[-self.max_entries :]
+        if len(live) != len(self._entries):
+            self._entries = live
+            self._matrix = None
+
+    def lookup(self, query: str) -> Optional[Dict[str, Any]]:
+        """
+        Find a cached answer for a semantically equivalent query.
+
+        Args:
+            query: User query
+
+        Returns:
+            Dict with 'output', 'results', 'routing_plan' and 'provenance', or None
+        """
+        vector = self._embed(query)
+
+        with self._lock:
+            self._expire()
+            if not self._entries:
+                self.misses += 1
+                return None
+            if self._matrix is None:
+                self._matrix = np.vstack([entry["vector"] for entry in self._entries])
+
+            similarities = self._matrix @ vector
+            identifiers = query_identifiers(query)
+            for i, entry in enumerate(self._entries):
+                if entry["identifiers"] != identifiers:
+                    similarities[i] = -1.0
+            best = int(np.argmax(similarities))
+            similarity = float(similarities[best])
+            if similarity < self.threshold:
+                self.misses += 1
+                return None
+
+            entry = self._entries[best]
+            self.hits += 1
+            return {
+                "output": entry["output"],
+                "results": list(entry["results"]),
+                "routing_plan": dict(entry["routing_plan"]),
+                "provenance": {
+                    "source": "semantic_cache",
+                    "matched_query": entry["query"],
+                    "similarity": round(similarity, 4),
+                    "cached_at": entry["cached_at"],
+                    "age_seconds": round(time.time() - entry["cached_at"], 1),
+                },
+            }
+
+    def add(
+        self,
+        query: str,
+        output: str,
+        results: List[Dict[str, Any]],
+        routing_plan: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """Cache the answer produced for a query."""
+        vector = self._embed(query)
+
+        with self._lock:
+            self._entries.append(
+                {
+                    "query": query,
+                    "identifiers": query_identifiers(query),
+                    "vector": vector,
+                    "output": output,
+                    "results": list(results),
+                    "routing_plan": dict(routing_plan or {}),
+                    "cached_at": time.time(),
+                }
+            )
+            self._matrix = None
+            self._expire()
+
+    def clear(self) -> None:
+        """Drop every cached answer."""
+        with self._lock:
+            self._entries = []
+            self._matrix = None
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and the current size."""
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
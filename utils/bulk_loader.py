@@ -0,0 +1,295 @@
+"""Rate-limited, adaptively batched bulk loading into knowledge bases."""
+
+import os
+import queue
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+# Embedding inputs (rows) per second; matches rate_limit in create_*_kb
+EMBEDDING_RATE_LIMIT = int(os.getenv("EMBEDDING_RATE_LIMIT", "20"))
+KB_INSERT_MAX_BATCH = int(os.getenv("KB_INSERT_MAX_BATCH", "200"))
+# Batches slower than this shrink, faster ones grow
+KB_INSERT_TARGET_LATENCY = float(os.getenv("KB_INSERT_TARGET_LATENCY", "5"))
+KB_INSERT_MAX_RETRIES = int(os.getenv("KB_INSERT_MAX_RETRIES", "5"))
+# Source pages read ahead of the embedding inserts
+KB_READ_PREFETCH_PAGES = int(os.getenv("KB_READ_PREFETCH_PAGES", "2"))
+MAX_BACKOFF = 60.0
+
+_DONE = object()
+
+
+def is_rate_limited(error: Exception) -> bool:
+    """Whether an insert failed because the embedding provider returned 429."""
+    response = getattr(error, "response", None)
+    if getattr(response, "status_code", None) == 429:
+        return True
+    message = str(error).lower()
+    return "429" in message or "rate limit" in message or "too many requests" in message
+
+
+class TokenBucket:
+    """Thread-safe token bucket; one token per row sent for embedding."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        Initialize the bucket.
+
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum burst (default: one second worth of tokens)
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1) -> float:
+        """
+        Block until tokens are available and take them.
+
+        Requests larger than the capacity wait for a full bucket and then run
+        the bucket into debt, so big batches are paced rather than refused.
+
+        Returns:
+            Seconds spent waiting
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                needed = min(tokens, self.capacity)
+                if self._tokens >= needed:
+                    self._tokens -= tokens
+                    return waited
+                wait = (needed - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+
+def prefetch(
+    pages: Iterable[Any], depth: int = KB_READ_PREFETCH_PAGES
+) -> Iterator[Any]:
+    """
+    Read pages on a background thread into a bounded queue.
+
+    The reader stays at most depth pages ahead of the consumer, so memory is
+    bounded by depth pages while source reads overlap with inserts. Errors
+    from the reader are re-raised in the consumer; closing the iterator
+    early stops the reader.
+
+    Args:
+        pages: Page iterable, e.g. SemanticSearchTool.iter_raw_data(...)
+        depth: Maximum pages buffered ahead of the consumer
+
+    Yields:
+        The pages, in order
+    """
+    buffer: "queue.Queue" = queue.Queue(maxsize=max(1, depth))
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def read() -> None:
+        try:
+            for page in pages:
+                if not put(page):
+                    return
+        except BaseException as e:
+            put(e)
+            return
+        put(_DONE)
+
+    reader = threading.Thread(target=read, name="kb-source-reader", daemon=True)
+    reader.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is _DONE:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        reader.join(timeout=1)
+
+
+_limiters: Dict[float, TokenBucket] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(rate: Optional[float] = EMBEDDING_RATE_LIMIT):
+    """
+    Return the process-wide limiter for a rate, shared by every KB loader.
+
+    Args:
+        rate: Rows per second, or None/0 for no limit
+
+    Returns:
+        TokenBucket, or None when unlimited
+    """
+    if not rate:
+        return None
+    with _limiters_lock:
+        if rate not in _limiters:
+            _limiters[rate] = TokenBucket(rate)
+        return _limiters[rate]
+
+
+@dataclass
+class LoadStats:
+    """Outcome of a bulk load."""
+
+    rows: int = 0
+    failed: int = 0
+    batches: int = 0
+    retries: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+class BulkLoader:
+    """
+    Insert items in batches that adapt to latency and rate limiting.
+
+    Batches grow by half while inserts finish under the target latency and
+    halve when they are slow or the provider answers 429. Failed batches are
+    retried with exponential backoff; after max_retries the batch is given up.
+    """
+
+    def __init__(
+        self,
+        insert: Callable[[List[Any]], Any],
+        name: str = "kb",
+        limiter: Optional[TokenBucket] = None,
+        batch_size: int = 5,
+        max_batch_size: int = KB_INSERT_MAX_BATCH,
+        target_latency: float = KB_INSERT_TARGET_LATENCY,
+        max_retries: int = KB_INSERT_MAX_RETRIES,
+    ):
+        """
+        Initialize the loader.
+
+        Args:
+            insert: Called with each batch of items, e.g. KnowledgeBase.insert
+            name: Label used in progress output
+            limiter: Shared rate limiter (None for no limit)
+            batch_size: Initial batch size
+            max_batch_size: Upper bound for adaptive growth
+            target_latency: Seconds per insert the batch size steers towards
+            max_retries: Attempts per batch before it is counted as failed
+        """
+        self.insert = insert
+        self.name = name
+        self.limiter = limiter
+        self.batch_size = max(1, batch_size)
+        self.max_batch_size = max(self.batch_size, max_batch_size)
+        self.target_latency = target_latency
+        self.max_retries = max_retries
+
+    def _adapt(self, latency: float, rate_limited: bool = False) -> None:
+        if rate_limited or latency > 2 * self.target_latency:
+            self.batch_size = max(1, self.batch_size // 2)
+        elif latency < self.target_latency:
+            self.batch_size = min(
+                self.max_batch_size, self.batch_size + max(1, self.batch_size // 2)
+            )
+
+    def load(
+        self,
+        items: Iterable[Any],
+        on_success: Optional[Callable[[List[Any]], None]] = None,
+    ) -> LoadStats:
+        """
+        Insert every item, pulling from items lazily.
+
+        Args:
+            items: Items to insert (any iterable, including generators)
+            on_success: Called with each batch once it has been inserted
+
+        Returns:
+            LoadStats with row counts, retries and elapsed time
+        """
+        stats = LoadStats()
+        started = time.monotonic()
+        source = iter(items)
+        buffer: deque = deque()
+        exhausted = False
+        attempts = 0
+
+        while True:
+            while not exhausted and len(buffer) < self.batch_size:
+                try:
+                    buffer.append(next(source))
+                except StopIteration:
+                    exhausted = True
+            if not buffer:
+                break
+
+            batch = [buffer[i] for i in range(min(self.batch_size, len(buffer)))]
+            if self.limiter is not None:
+                self.limiter.acquire(len(batch))
+
+            t0 = time.monotonic()
+            try:
+                self.insert(batch)
+            except Exception as e:
+                rate_limited = is_rate_limited(e)
+                self._adapt(time.monotonic() - t0, rate_limited=rate_limited)
+                attempts += 1
+                if attempts > self.max_retries:
+                    print(f"Giving up on {len(batch)} rows for {self.name}: {e}")
+                    for _ in batch:
+                        buffer.popleft()
+                    stats.failed += len(batch)
+                    attempts = 0
+                    continue
+                stats.retries += 1
+                backoff = min(MAX_BACKOFF, 2 ** (attempts - 1))
+                backoff *= 0.5 + random.random() / 2
+                reason = "rate limited" if rate_limited else f"failed ({e})"
+                print(
+                    f"Insert into {self.name} {reason}; retrying in {backoff:.1f}s "
+                    f"with batch size {self.batch_size}"
+                )
+                time.sleep(backoff)
+                continue
+
+            self._adapt(time.monotonic() - t0)
+            attempts = 0
+            for _ in batch:
+                buffer.popleft()
+            stats.rows += len(batch)
+            stats.batches += 1
+            if on_success is not None:
+                on_success(batch)
+
+            stats.seconds = time.monotonic() - started
+            print(
+                f"Inserted {stats.rows} rows into {self.name} "
+                f"({stats.rows_per_second:.1f} rows/s, next batch {self.batch_size})"
+            )
+
+        stats.seconds = time.monotonic() - started
+        return stats
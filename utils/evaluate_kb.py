@@ -12,6 +12,8 @@ from typing import Dict, Optional
 import mindsdb_sdk
 from dotenv import load_dotenv
 
+from tools.search import SemanticSearchTool
+
 # Load environment variables
 root_env = os.path.join(os.path.dirname(__file__), "..", ".env")
 if os.path.exists(root_env):
@@ -210,11 +212,13 @@ class KBEvaluator:
             total_found = 0
             retrieved_top_10 = 0
 
-            for query in test_queries:
-                results = self.server.query(
-                    f"SELECT * FROM {kb_name} WHERE content='{query}' LIMIT 10"
-                ).fetch()
+            # One batch instead of a round-trip per query, measuring the KB
+            # itself rather than cached results or the local vector path
+            batch_results = SemanticSearchTool(
+                kb_name=kb_name, direct=True
+            ).search_many(test_queries, top_k=10, hybrid_search=False)
 
+            for results in batch_results:
                 if results is not None and len(results) > 0:
                     total_found += 1
                     if len(results) >= 1:
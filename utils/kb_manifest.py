@@ -0,0 +1,180 @@
+"""Local manifest of the rows each knowledge base already holds."""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+KB_MANIFEST_PATH = os.getenv(
+    "KB_MANIFEST_PATH", os.path.join(".cache", "kb_manifest.sqlite")
+)
+
+
+def row_hash(row: Dict, columns: Sequence[str]) -> str:
+    """
+    Hash the columns of a source row that end up in the knowledge base.
+
+    Args:
+        row: Source row
+        columns: Columns that are embedded or stored as metadata
+
+    Returns:
+        Hex digest that changes whenever any of those columns change
+    """
+    values = []
+    for column in columns:
+        value = row.get(column)
+        # NaN != NaN; treat missing DataFrame values like None
+        values.append(None if value != value else value)
+    payload = json.dumps(values, default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class KBManifest:
+    """(id, content hash, updated_at) of every row ingested into each KB."""
+
+    def __init__(self, path: str = KB_MANIFEST_PATH):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS kb_manifest (
+                kb_name TEXT NOT NULL,
+                row_id TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                updated_at TEXT,
+                PRIMARY KEY (kb_name, row_id)
+            )
+            """
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS kb_checkpoints (
+                kb_name TEXT PRIMARY KEY,
+                last_key TEXT,
+                rows INTEGER NOT NULL DEFAULT 0,
+                completed INTEGER NOT NULL DEFAULT 0,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+    def hashes(self, kb_name: str) -> Dict[str, str]:
+        """Return {row id: content hash} for everything ingested into kb_name."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT row_id, content_hash FROM kb_manifest WHERE kb_name = ?",
+                (kb_name,),
+            ).fetchall()
+        return dict(rows)
+
+    def record(
+        self, kb_name: str, entries: Iterable[Tuple[str, str, Optional[str]]]
+    ) -> None:
+        """Mark (row id, content hash, updated_at) entries as ingested."""
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO kb_manifest VALUES (?, ?, ?, ?)",
+                [(kb_name, row_id, h, updated) for row_id, h, updated in entries],
+            )
+            self._conn.commit()
+
+    def forget(self, kb_name: str, row_ids: List[str]) -> None:
+        """Drop rows that were deleted from the knowledge base."""
+        with self._lock:
+            self._conn.executemany(
+                "DELETE FROM kb_manifest WHERE kb_name = ? AND row_id = ?",
+                [(kb_name, row_id) for row_id in row_ids],
+            )
+            self._conn.commit()
+
+    def clear(self, kb_name: Optional[str] = None) -> None:
+        """Forget one knowledge base (e.g. after it was dropped), or all of them."""
+        with self._lock:
+            for table in ("kb_manifest", "kb_checkpoints"):
+                if kb_name is None:
+                    self._conn.execute(f"DELETE FROM {table}")
+                else:
+                    self._conn.execute(
+                        f"DELETE FROM {table} WHERE kb_name = ?", (kb_name,)
+                    )
+            self._conn.commit()
+
+    def start_load(self, kb_name: str) -> None:
+        """Reset the load checkpoint of kb_name before a load from the start."""
+        self._save_checkpoint(kb_name, None, 0, False)
+
+    def advance(self, kb_name: str, last_key: Any, rows: int) -> None:
+        """Record that every row up to last_key (in key order) is committed."""
+        self._save_checkpoint(kb_name, last_key, rows, False)
+
+    def finish_load(self, kb_name: str, rows: int) -> None:
+        """Mark the load of kb_name as complete."""
+        self._save_checkpoint(kb_name, None, rows, True)
+
+    def checkpoint(self, kb_name: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the load checkpoint of kb_name.
+
+        Returns:
+            {'last_key', 'rows', 'completed', 'updated_at'}, or None if no
+            load has started since the KB was created
+        """
+        with self._lock:
+            row = self._conn.execute(
+                """
+                SELECT last_key, rows, completed, updated_at
+                FROM kb_checkpoints WHERE kb_name = ?
+                """,
+                (kb_name,),
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "last_key": json.loads(row[0]) if row[0] is not None else None,
+            "rows": row[1],
+            "completed": bool(row[2]),
+            "updated_at": row[3],
+        }
+
+    def _save_checkpoint(
+        self, kb_name: str, last_key: Any, rows: int, completed: bool
+    ) -> None:
+        if hasattr(last_key, "item"):
+            last_key = last_key.item()
+        # JSON keeps the key type, so numeric ids resume with numeric comparisons
+        encoded = json.dumps(last_key, default=str) if last_key is not None else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO kb_checkpoints VALUES (?, ?, ?, ?, ?)",
+                (kb_name, encoded, rows, int(completed), time.time()),
+            )
+            self._conn.commit()
+
+    def count(self, kb_name: str) -> int:
+        """Number of rows recorded for kb_name."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM kb_manifest WHERE kb_name = ?", (kb_name,)
+            ).fetchone()[0]
+
+
+_manifest: Optional[KBManifest] = None
+_manifest_lock = threading.Lock()
+
+
+def get_manifest() -> KBManifest:
+    """Return the process-wide manifest stored at KB_MANIFEST_PATH."""
+    global _manifest
+    if _manifest is None:
+        with _manifest_lock:
+            if _manifest is None:
+                _manifest = KBManifest()
+    return _manifest
@@ -0,0 +1,269 @@
+"""ANN and metadata indexes on the pgvector tables that store KB vectors."""
+
+import argparse
+import math
+import os
+from typing import List, Optional
+
+import mindsdb_sdk
+
+from tools.query_builder import (
+    MAX_HALFVEC_INDEX_DIMENSIONS,
+    MAX_VECTOR_INDEX_DIMENSIONS,
+    vector_search_expression,
+)
+from utils.setup_datasource import pgvector_connection
+from utils.setup_kb import KB_LAYOUTS, KB_STORAGE_DATASOURCE
+
+# Columns of the tables MindsDB creates for KB storage
+EMBEDDING_COLUMN = "embeddings"
+METADATA_COLUMN = "metadata"
+
+# hnsw (better recall/latency, slower build), ivfflat or none
+PGVECTOR_INDEX_TYPE = os.getenv("PGVECTOR_INDEX_TYPE", "hnsw")
+# Must match the distance the KB searches with (cosine by default)
+PGVECTOR_DISTANCE_OPS = os.getenv("PGVECTOR_DISTANCE_OPS", "vector_cosine_ops")
+PGVECTOR_HNSW_M = int(os.getenv("PGVECTOR_HNSW_M", "16"))
+PGVECTOR_HNSW_EF_CONSTRUCTION = int(os.getenv("PGVECTOR_HNSW_EF_CONSTRUCTION", "64"))
+# 0 derives lists from the row count (see ivfflat_lists)
+PGVECTOR_IVFFLAT_LISTS = int(os.getenv("PGVECTOR_IVFFLAT_LISTS", "0"))
+# Database-wide query-time recall defaults; unset keeps the server ones (40, 1)
+PGVECTOR_EF_SEARCH = os.getenv("PGVECTOR_EF_SEARCH")
+PGVECTOR_PROBES = os.getenv("PGVECTOR_PROBES")
+
+# halfvec (and so indexes on embeddings over 2000 dimensions) needs pgvector 0.7
+HALFVEC_MIN_VERSION = (0, 7)
+
+# Metadata filters used by the clients' search_*_by_* helpers
+METADATA_INDEXES = {
+    "confluence_kb": ["spaceId", "authorId", "title"],
+    "jira_kb": ["status", "priority", "assignee", "project_key", "creator"],
+    "zendesk_kb": [
+        "status",
+        "priority",
+        "assignee_id",
+        "type",
+        "requester_id",
+        "tags",
+    ],
+}
+# Filtered with LIKE; pattern ops let prefix patterns use the index
+PATTERN_COLUMNS = {"title"}
+
+INDEX_TYPES = ("hnsw", "ivfflat")
+
+
+def ivfflat_lists(rows: int) -> int:
+    """pgvector's suggested list count: rows / 1000, sqrt(rows) beyond 1M rows."""
+    if rows > 1_000_000:
+        return int(math.sqrt(rows))
+    return max(1, rows // 1000)
+
+
+def ann_index_name(table: str, index_type: str) -> str:
+    return f"{table}_{EMBEDDING_COLUMN}_{index_type}_idx"
+
+
+def ann_index_sql(table: str, index_type: str, rows: int = 0, dims: int = 0) -> str:
+    """
+    Build the CREATE INDEX statement for the vector column of a storage table.
+
+    Embeddings with more than MAX_VECTOR_INDEX_DIMENSIONS dimensions (e.g.
+    3072 for text-embedding-3-large) are indexed as a halfvec expression,
+    which compile_vector_search orders by.
+
+    Args:
+        table: Storage table (e.g. 'pages')
+        index_type: 'hnsw' or 'ivfflat'
+        rows: Current row count, used to size IVFFlat lists
+        dims: Embedding dimensions
+
+    Returns:
+        SQL for Postgres
+    """
+    if index_type == "hnsw":
+        options = (
+            f"m = {PGVECTOR_HNSW_M}, "
+            f"ef_construction = {PGVECTOR_HNSW_EF_CONSTRUCTION}"
+        )
+    elif index_type == "ivfflat":
+        options = f"lists = {PGVECTOR_IVFFLAT_LISTS or ivfflat_lists(rows)}"
+    else:
+        raise ValueError(f"Unsupported index type: {index_type}")
+    column, ops = EMBEDDING_COLUMN, PGVECTOR_DISTANCE_OPS
+    if dims > MAX_VECTOR_INDEX_DIMENSIONS:
+        column = vector_search_expression(dims)
+        ops = ops.replace("vector_", "halfvec_", 1)
+    return (
+        f"CREATE INDEX IF NOT EXISTS {ann_index_name(table, index_type)} "
+        f"ON {table} USING {index_type} ({column} {ops}) "
+        f"WITH ({options})"
+    )
+
+
+def metadata_index_sql(table: str, column: str) -> str:
+    """Build a btree index on one metadata key, as KB filters compare it."""
+    ops = " text_pattern_ops" if column in PATTERN_COLUMNS else ""
+    return (
+        f"CREATE INDEX IF NOT EXISTS {table}_{column.lower()}_idx "
+        f"ON {table} (({METADATA_COLUMN}->>'{column}'){ops})"
+    )
+
+
+def _native(server, sql: str):
+    """Run SQL on Postgres itself through the pgvector datasource."""
+    return server.query(f"SELECT * FROM {KB_STORAGE_DATASOURCE} ({sql})").fetch()
+
+
+def _version(value) -> tuple:
+    """'0.8.0' -> (0, 8, 0); unknown versions sort lowest."""
+    try:
+        return tuple(int(part) for part in str(value).split("."))
+    except ValueError:
+        return ()
+
+
+def _scalar(server, sql: str):
+    df = _native(server, sql)
+    if len(df) == 0:
+        return None
+    value = df.iloc[0, 0]
+    return None if value != value else value
+
+
+def ensure_kb_indexes(
+    kb_name: str, index_type: str = PGVECTOR_INDEX_TYPE, rebuild: bool = False
+) -> None:
+    """
+    Create the ANN and metadata indexes of a knowledge base's storage table.
+
+    Run after loading: IVFFlat needs rows to size its lists, and building
+    either index once is much faster than maintaining it during a bulk load.
+    Existing indexes are kept unless rebuild=True (e.g. after changing m or
+    lists).
+
+    Args:
+        kb_name: Knowledge base (a key of KB_LAYOUTS)
+        index_type: 'hnsw', 'ivfflat' or 'none' (metadata indexes only)
+        rebuild: Drop and recreate the ANN index
+    """
+    table = KB_LAYOUTS[kb_name]["storage_table"]
+    server = mindsdb_sdk.connect()
+
+    for column in METADATA_INDEXES[kb_name]:
+        _native(server, metadata_index_sql(table, column))
+    print(f"✓ Metadata indexes on {table}: {', '.join(METADATA_INDEXES[kb_name])}")
+
+    if index_type == "none":
+        return
+
+    dims = _scalar(
+        server, f"SELECT vector_dims({EMBEDDING_COLUMN}) FROM {table} LIMIT 1"
+    )
+    if dims is None:
+        print(f"⚠️  {table} is empty; load {kb_name} before creating its ANN index")
+        return
+    dims = int(dims)
+    if dims > MAX_HALFVEC_INDEX_DIMENSIONS:
+        print(
+            f"⚠️  {table} stores {dims}-dimension vectors; pgvector indexes at most "
+            f"{MAX_HALFVEC_INDEX_DIMENSIONS} (as halfvec), so searches stay "
+            "sequential scans"
+        )
+        return
+    if dims > MAX_VECTOR_INDEX_DIMENSIONS:
+        version = _scalar(
+            server, "SELECT extversion FROM pg_extension WHERE extname = 'vector'"
+        )
+        if _version(version) < HALFVEC_MIN_VERSION:
+            print(
+                f"⚠️  {table} stores {dims}-dimension vectors, which need halfvec "
+                f"indexes (pgvector 0.7+); installed pgvector is {version}"
+            )
+            return
+
+    # Indexes need a fixed dimension; MindsDB may create a bare vector column
+    column_type = _scalar(
+        server,
+        "SELECT format_type(atttypid, atttypmod) FROM pg_attribute "
+        f"WHERE attrelid = '{table}'::regclass AND attname = '{EMBEDDING_COLUMN}'",
+    )
+    if column_type == "vector":
+        _native(
+            server,
+            f"ALTER TABLE {table} ALTER COLUMN {EMBEDDING_COLUMN} "
+            f"TYPE vector({dims})",
+        )
+
+    for other in INDEX_TYPES:
+        if other != index_type or rebuild:
+            _native(server, f"DROP INDEX IF EXISTS {ann_index_name(table, other)}")
+
+    rows = int(_scalar(server, f"SELECT count(*) FROM {table}") or 0)
+    _native(server, ann_index_sql(table, index_type, rows, dims))
+    print(f"✓ {index_type} index on {table} ({rows} rows, {dims} dimensions)")
+
+
+def set_default_search_params(
+    ef_search: Optional[int] = None, probes: Optional[int] = None
+) -> List[str]:
+    """
+    Set the database-wide default ANN recall/latency trade-off.
+
+    This is not a per-query setting: KB searches go through MindsDB, which
+    can't SET a session variable per query, so the values are applied with
+    ALTER DATABASE and affect every new connection to the pgvector database
+    (existing connections keep their values). Higher ef_search (HNSW) or
+    probes (IVFFlat) means better recall and slower queries.
+
+    Args:
+        ef_search: hnsw.ef_search (default: PGVECTOR_EF_SEARCH)
+        probes: ivfflat.probes (default: PGVECTOR_PROBES)
+
+    Returns:
+        The settings that were applied
+    """
+    ef_search = ef_search or PGVECTOR_EF_SEARCH
+    probes = probes or PGVECTOR_PROBES
+    database = pgvector_connection()[1]["database"]
+    server = mindsdb_sdk.connect()
+
+    applied = []
+    for setting, value in (("hnsw.ef_search", ef_search), ("ivfflat.probes", probes)):
+        if value:
+            _native(server, f'ALTER DATABASE "{database}" SET {setting} = {int(value)}')
+            applied.append(f"{setting}={int(value)}")
+    if applied:
+        print(f"✓ pgvector default search params: {', '.join(applied)}")
+    return applied
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage pgvector KB indexes")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    create = subparsers.add_parser("create", help="Create ANN and metadata indexes")
+    create.add_argument("--kb", choices=list(KB_LAYOUTS), help="Only this KB")
+    create.add_argument(
+        "--type", choices=INDEX_TYPES + ("none",), default=PGVECTOR_INDEX_TYPE
+    )
+    create.add_argument(
+        "--rebuild", action="store_true", help="Drop and rebuild the ANN indexes"
+    )
+
+    tune = subparsers.add_parser(
+        "tune", help="Set database-wide ef_search / probes defaults"
+    )
+    tune.add_argument("--ef-search", type=int)
+    tune.add_argument("--probes", type=int)
+
+    args = parser.parse_args()
+    if args.command == "tune":
+        set_default_search_params(args.ef_search, args.probes)
+        return
+    for kb_name in [args.kb] if args.kb else KB_LAYOUTS:
+        ensure_kb_indexes(kb_name, args.type, args.rebuild)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 """Setup and refresh Confluence KB with pgvector storage."""
 
+import json
 import os
+from typing import Callable, Dict, List, Tuple
 
 import mindsdb_sdk
 from dotenv import load_dotenv
@@ -12,50 +14,29 @@ root_env = os.path.join(os.path.dirname(__file__), "..", "..", ".env")
 if os.path.exists(root_env):
     load_dotenv(root_env)
 
+# Connection args MindsDB masks when it lists datasources
+SECRET_ARGS = {"password", "api_token", "api_key"}
+
 def drop_all_datasources() -> None:
     server = mindsdb_sdk.connect()
     for db in server.databases.list():
         if db.name in ["pgvector_datasource"] :
             server.databases.drop(db.name)
 
-def setup_pgvector_datasource() -> None:
-    """Create pgvector datasource in MindsDB."""
-    server = mindsdb_sdk.connect()
-
+def pgvector_connection() -> Tuple[str, Dict]:
+    """Engine and connection args of pgvector_datasource."""
     # Get credentials from environment
-    host = os.getenv("PGVECTOR_HOST", "host.docker.internal")
-    port = os.getenv("PGVECTOR_PORT", "5432")
-    database = os.getenv("PGVECTOR_DATABASE", "mindsdb")
-    user = os.getenv("PGVECTOR_USER", "mindsdb")
-    password = os.getenv("PGVECTOR_PASSWORD", "mindsdb")
+    return "pgvector", {
+        "host": os.getenv("PGVECTOR_HOST", "host.docker.internal"),
+        "port": os.getenv("PGVECTOR_PORT", "5432"),
+        "database": os.getenv("PGVECTOR_DATABASE", "mindsdb"),
+        "user": os.getenv("PGVECTOR_USER", "mindsdb"),
+        "password": os.getenv("PGVECTOR_PASSWORD", "mindsdb"),
+    }
 
-    # Drop existing datasource if needed
-    try:
-        server.databases.drop("pgvector_datasource")
-        print("✓ Dropped existing pgvector_datasource")
-    except Exception:
-        pass
-
-    # Create pgvector datasource using SDK
-    server.databases.create(
-        name="pgvector_datasource",
-        engine="pgvector",
-        connection_args={
-            "host": host,
-            "port": port,
-            "database": database,
-            "user": user,
-            "password": password,
-        },
-    )
-    print("✓ Created pgvector_datasource")
-
-
-def setup_confluence_datasource() -> None:
-    """Create Confluence datasource in MindsDB."""
-    server = mindsdb_sdk.connect()
 
-    # Get credentials from environment
+def confluence_connection() -> Tuple[str, Dict]:
+    """Engine and connection args of confluence_datasource."""
     api_base = os.getenv("CONFLUENCE_API_BASE")
     username = os.getenv("CONFLUENCE_USERNAME")
     password = os.getenv("CONFLUENCE_PASSWORD")
@@ -66,29 +47,15 @@ def setup_confluence_datasource() -> None:
             "CONFLUENCE_USERNAME, and CONFLUENCE_PASSWORD environment variables"
         )
 
-    # Drop existing datasource if needed
-    try:
-        server.databases.drop("confluence_datasource")
-        print("✓ Dropped existing confluence_datasource")
-    except Exception:
-        pass
-
-    # Create Confluence datasource
-    server.databases.create(
-        name="confluence_datasource",
-        engine="confluence",
-        connection_args={
-            "api_base": api_base,
-            "username": username,
-            "password": password,
-        },
-    )
-    print("✓ Created confluence_datasource")
+    return "confluence", {
+        "api_base": api_base,
+        "username": username,
+        "password": password,
+    }
 
-def setup_jira_datasource() -> None:
-    """Create Jira datasource in MindsDB."""
-    server = mindsdb_sdk.connect()
 
+def jira_connection() -> Tuple[str, Dict]:
+    """Engine and connection args of jira_datasource."""
     api_base = os.getenv("JIRA_API_BASE")
     username = os.getenv("JIRA_USERNAME")
     password = os.getenv("JIRA_API_TOKEN")
@@ -98,28 +65,15 @@ def setup_jira_datasource() -> None:
             "Missing Jira credentials. Set JIRA_API_BASE, JIRA_USERNAME, JIRA_PASSWORD"
         )
 
-    try:
-        server.databases.drop("jira_datasource")
-        print("✓ Dropped existing jira_datasource")
-    except Exception:
-        pass
-
-    server.databases.create(
-        name="jira_datasource",
-        engine="jira",
-        connection_args={
-            "url": api_base,
-            "username": username,
-            "api_token": password,
-        },
-    )
-    print("✓ Created jira_datasource")
-
+    return "jira", {
+        "url": api_base,
+        "username": username,
+        "api_token": password,
+    }
 
-def setup_zendesk_datasource() -> None:
-    """Create Zendesk datasource in MindsDB."""
-    server = mindsdb_sdk.connect()
 
+def zendesk_connection() -> Tuple[str, Dict]:
+    """Engine and connection args of zendesk_datasource."""
     api_base = os.getenv("ZENDESK_SUBDOMAIN")
     username = os.getenv("ZENDESK_EMAIL")
     password = os.getenv("ZENDESK_API_TOKEN")
@@ -129,19 +83,117 @@ def setup_zendesk_datasource() -> None:
             "Missing Zendesk credentials. Set ZENDESK_API_BASE, ZENDESK_USERNAME, ZENDESK_PASSWORD"
         )
 
+    return "zendesk", {
+        "sub_domain": api_base,
+        "email": username,
+        "api_key": password,
+    }
+
+
+# Desired (engine, connection args) of each datasource
+DATASOURCE_CONNECTIONS: Dict[str, Callable[[], Tuple[str, Dict]]] = {
+    "pgvector_datasource": pgvector_connection,
+    "confluence_datasource": confluence_connection,
+    "jira_datasource": jira_connection,
+    "zendesk_datasource": zendesk_connection,
+}
+
+
+def create_datasource(name: str) -> None:
+    """Drop a datasource if it exists and create it from DATASOURCE_CONNECTIONS."""
+    engine, connection_args = DATASOURCE_CONNECTIONS[name]()
+    server = mindsdb_sdk.connect()
+
+    # Drop existing datasource if needed
     try:
-        server.databases.drop("zendesk_datasource")
-        print("✓ Dropped existing zendesk_datasource")
+        server.databases.drop(name)
+        print(f"✓ Dropped existing {name}")
     except Exception:
         pass
 
-    server.databases.create(
-        name="zendesk_datasource",
-        engine="zendesk",
-        connection_args={
-            "sub_domain": api_base,
-            "email": username,
-            "api_key": password,
-        },
-    )
-    print("✓ Created zendesk_datasource")
+    server.databases.create(name=name, engine=engine, connection_args=connection_args)
+    print(f"✓ Created {name}")
+
+
+def setup_pgvector_datasource() -> None:
+    """Create pgvector datasource in MindsDB."""
+    create_datasource("pgvector_datasource")
+
+
+def setup_confluence_datasource() -> None:
+    """Create Confluence datasource in MindsDB."""
+    create_datasource("confluence_datasource")
+
+
+def setup_jira_datasource() -> None:
+    """Create Jira datasource in MindsDB."""
+    create_datasource("jira_datasource")
+
+
+def setup_zendesk_datasource() -> None:
+    """Create Zendesk datasource in MindsDB."""
+    create_datasource("zendesk_datasource")
+
+
+def datasource_config_diff(db, engine: str, connection_args: Dict) -> List[str]:
+    """
+    List the differences between an existing datasource and its desired config.
+
+    Secrets are only compared when MindsDB returns them unmasked, so a rotated
+    password alone is not detected; use --mode setup to force recreation.
+
+    Args:
+        db: Existing mindsdb_sdk Database
+        engine: Desired engine
+        connection_args: Desired connection args
+
+    Returns:
+        Human readable differences; empty when the datasource can be kept
+    """
+    changes = []
+    if db.engine != engine:
+        changes.append(f"engine: {db.engine!r} -> {engine!r}")
+
+    params = db.params or {}
+    if isinstance(params, str):
+        try:
+            params = json.loads(params)
+        except json.JSONDecodeError:
+            params = {}
+    for key, value in connection_args.items():
+        have = params.get(key)
+        if key in SECRET_ARGS:
+            if have is None or set(str(have)) == {"*"}:
+                continue
+            if str(have) != str(value):
+                changes.append(f"{key}: changed")
+        elif have is None or str(have) != str(value):
+            # Ports come back as numbers or strings depending on the engine
+            changes.append(f"{key}: {have!r} -> {value!r}")
+    return changes
+
+
+def reconcile_datasource(name: str) -> str:
+    """
+    Create a datasource, or recreate it only if its config changed.
+
+    Returns:
+        'created', 'recreated' or 'kept'
+    """
+    engine, connection_args = DATASOURCE_CONNECTIONS[name]()
+    server = mindsdb_sdk.connect()
+
+    try:
+        db = server.databases.get(name)
+    except AttributeError:
+        create_datasource(name)
+        return "created"
+
+    changes = datasource_config_diff(db, engine, connection_args)
+    if not changes:
+        print(f"✓ Keeping {name} (unchanged)")
+        return "kept"
+
+    print(f"{name} changed: {'; '.join(changes)}")
+    create_datasource(name)
+    return "recreated"
@@ -0,0 +1,108 @@
+"""Dependency-aware runner for setup and refresh steps."""
+
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+
+@dataclass
+class Step:
+    """One unit of setup work and the steps it has to wait for."""
+
+    name: str
+    func: Callable[[], object]
+    deps: List[str] = field(default_factory=list)
+
+
+@dataclass
+class StepResult:
+    """Outcome of a step: 'ok', 'failed' or 'skipped'."""
+
+    status: str
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+
+def run_steps(steps: List[Step], max_workers: int = 1) -> Dict[str, StepResult]:
+    """
+    Run steps as soon as their dependencies have succeeded.
+
+    Independent steps (e.g. loading the three knowledge bases) run
+    concurrently up to max_workers. A failing step only skips the steps that
+    depend on it; unrelated steps keep going. With max_workers=1 steps run
+    one at a time in the order given.
+
+    Args:
+        steps: Steps to run; deps name other steps in the list
+        max_workers: Maximum steps running at once
+
+    Returns:
+        StepResult per step name
+    """
+    by_name = {step.name: step for step in steps}
+    for step in steps:
+        unknown = [dep for dep in step.deps if dep not in by_name]
+        if unknown:
+            raise ValueError(f"Step {step.name} depends on unknown steps {unknown}")
+
+    results: Dict[str, StepResult] = {}
+    pending = list(steps)
+    running = {}
+
+    def timed(step: Step) -> float:
+        started = time.monotonic()
+        step.func()
+        return time.monotonic() - started
+
+    def schedule(executor: ThreadPoolExecutor) -> None:
+        changed = True
+        while changed:
+            changed = False
+            for step in list(pending):
+                statuses = [
+                    results[dep].status if dep in results else None for dep in step.deps
+                ]
+                if any(status in ("failed", "skipped") for status in statuses):
+                    pending.remove(step)
+                    results[step.name] = StepResult("skipped")
+                    print(f"- Skipped {step.name} (a dependency failed)")
+                    changed = True
+                elif all(status == "ok" for status in statuses) and (
+                    len(running) < max_workers
+                ):
+                    pending.remove(step)
+                    print(f"▶ {step.name}")
+                    running[executor.submit(timed, step)] = step
+                    changed = True
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while True:
+            schedule(executor)
+            if not running:
+                if pending:
+                    cycle = ", ".join(step.name for step in pending)
+                    raise ValueError(f"Dependency cycle between steps: {cycle}")
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                step = running.pop(future)
+                try:
+                    seconds = future.result()
+                    results[step.name] = StepResult("ok", seconds)
+                    print(f"✓ {step.name} ({seconds:.1f}s)")
+                except Exception as e:
+                    results[step.name] = StepResult("failed", error=str(e))
+                    print(f"✗ {step.name}: {e}")
+
+    return results
+
+
+def print_summary(results: Dict[str, StepResult]) -> None:
+    """Print one line per step with its status and duration."""
+    print("=" * 60)
+    for name, result in results.items():
+        detail = f"{result.seconds:.1f}s" if result.status == "ok" else result.error
+        print(f"{result.status:>8}  {name}" + (f"  ({detail})" if detail else ""))
+    print("=" * 60)
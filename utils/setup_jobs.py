@@ -1,45 +1,140 @@
+"""Incremental MindsDB refresh jobs for the knowledge bases, plus job status."""
+
+import argparse
+from datetime import datetime, timezone
+
 import mindsdb_sdk
 
+from tools.cache import REFRESH_CADENCES
+from utils.setup_kb import KB_LAYOUTS, kb_columns
 
-def add_refresh_kb_jobs():
-    server = mindsdb_sdk.connect()
 
-    jira_job_query = """
-    CREATE JOB jira_refresh_job (
-        insert into jira_kb
-        select * from jira_datasource.issues;
-    ) EVERY 30 minutes;
+def job_name(kb_name: str) -> str:
+    return f"{kb_name.replace('_kb', '')}_refresh_job"
+
+
+def refresh_job_query(kb_name: str, cadence: str = None) -> str:
     """
+    Build the CREATE JOB statement that refreshes one knowledge base.
 
-    zendesk_job_query = """
-    CREATE JOB zendesk_refresh_job (
-        insert into zendesk_kb
-        select * from zendesk_datasource.tickets;
-    ) EVERY 30 minutes;
+    When the KB layout names an updated column, the job only selects rows
+    changed since its previous run: MindsDB stores the highest value seen
+    for LAST between runs. Sources without such a column fall back to a
+    full re-insert.
     """
+    layout = KB_LAYOUTS[kb_name]
+    updated_column = layout["updated_column"]
+    columns = kb_columns(kb_name)
+    if updated_column and updated_column not in columns:
+        columns.append(updated_column)
 
-    confluence_job_query = """
-    CREATE JOB confluence_refresh_job (
-        insert into confluence_kb
-        select * from confluence_datasource.pages;
-    ) EVERY 1 day;
+    select = (
+        f"select {', '.join(columns)} " f"from {layout['datasource']}.{layout['table']}"
+    )
+    if updated_column:
+        select += f" where {updated_column} > LAST"
+
+    return f"""
+    CREATE JOB {job_name(kb_name)} (
+        insert into {kb_name}
+        {select};
+    ) EVERY {cadence or REFRESH_CADENCES[kb_name]};
     """
 
-    try:
-        server.query(jira_job_query).fetch()
-    except Exception as e:
-        print(f"jira KB refresh job exception {e}")
-    try:
-        server.query(zendesk_job_query).fetch()
-    except Exception as e:
-        print(f"zendesk KB refresh job exception {e}")
-    try:
-        server.query(confluence_job_query).fetch()
-    except Exception as e:
-        print(f"confluence KB refresh job exception {e}")
+
+def add_refresh_kb_jobs():
+    server = mindsdb_sdk.connect()
+
+    for kb_name in KB_LAYOUTS:
+        name = job_name(kb_name)
+        try:
+            # Recreate so changed cadences or columns take effect
+            server.query(f"DROP JOB IF EXISTS {name}").fetch()
+            server.query(refresh_job_query(kb_name)).fetch()
+            if not KB_LAYOUTS[kb_name]["updated_column"]:
+                print(f"⚠️  {name} re-inserts every row (no updated column)")
+        except Exception as e:
+            print(f"{kb_name.replace('_kb', '')} KB refresh job exception {e}")
 
     print("Jobs to create KBs are created")
 
 
+def _age(value) -> str:
+    """Human readable time since a timestamp ('-' when unknown)."""
+    if value is None or value != value:
+        return "-"
+    try:
+        moment = datetime.fromisoformat(str(value))
+    except ValueError:
+        return str(value)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    seconds = int((datetime.now(timezone.utc) - moment).total_seconds())
+    hours, remainder = divmod(max(seconds, 0), 3600)
+    return f"{hours}h{remainder // 60:02d}m ago"
+
+
+def job_status(history: int = 5) -> None:
+    """
+    Print each refresh job's schedule, recent runs and lag.
+
+    Lag is the time since the last run that finished without an error; a
+    job whose lag exceeds its cadence is falling behind.
+    """
+    server = mindsdb_sdk.connect()
+
+    for kb_name in KB_LAYOUTS:
+        name = job_name(kb_name)
+        print("=" * 60)
+        print(f"{name} (every {REFRESH_CADENCES[kb_name]})")
+        try:
+            jobs = server.query(
+                f"SELECT * FROM mindsdb.jobs WHERE name = '{name}'"
+            ).fetch()
+            runs = server.query(
+                f"SELECT * FROM mindsdb.jobs_history WHERE name = '{name}' "
+                f"ORDER BY run_start DESC LIMIT {int(history)}"
+            ).fetch()
+        except Exception as e:
+            print(f"  could not read job status: {e}")
+            continue
+
+        if len(jobs) == 0:
+            print("  not scheduled")
+            continue
+        job = jobs.iloc[0].to_dict()
+        print(f"  next run: {job.get('next_run_at', '-')}")
+
+        last_ok = None
+        for run in runs.to_dict(orient="records"):
+            error = run.get("error")
+            failed = error is not None and error == error and str(error).strip()
+            if not failed and last_ok is None:
+                last_ok = run.get("run_end")
+            status = f"error: {error}" if failed else "ok"
+            print(f"  {run.get('run_start')} -> {run.get('run_end')}  {status}")
+        print(f"  lag: {_age(last_ok)} since last successful run")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage KB refresh jobs")
+    parser.add_argument(
+        "command",
+        nargs="?",
+        choices=["create", "status"],
+        default="create",
+        help="create: (re)create the refresh jobs; status: show history and lag",
+    )
+    parser.add_argument(
+        "--history", type=int, default=5, help="Runs to show per job (status)"
+    )
+    args = parser.parse_args()
+
+    if args.command == "status":
+        job_status(args.history)
+    else:
+        add_refresh_kb_jobs()
+
+
 if __name__ == "__main__":
-    add_refresh_kb_jobs()
+    main()
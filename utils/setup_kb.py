@@ -1,11 +1,24 @@
 """Setup and refresh Confluence KB with pgvector storage."""
 
+import json
 import os
-import time
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 
 import mindsdb_sdk
 from dotenv import load_dotenv
+from mindsdb_sql_parser.ast import Identifier
+
+from tools.cache import get_result_cache
+from tools.kb_layouts import KB_LAYOUTS, KB_STORAGE_DATASOURCE
+from tools.query_builder import quote_literal
+from tools.search import SemanticSearchTool
+from utils.bulk_loader import (
+    EMBEDDING_RATE_LIMIT,
+    BulkLoader,
+    get_rate_limiter,
+    prefetch,
+)
+from utils.kb_manifest import get_manifest, row_hash
 
 # Load environment variables from .env files
 # Try root .env first, then fall back to utils/confluence/.env
@@ -15,27 +28,37 @@ if os.path.exists(root_env):
     load_dotenv(root_env)
 
 
+# Embedding model settings that change the vectors (keys and limits don't)
+EMBEDDING_IDENTITY_KEYS = ("provider", "model_name", "deployment")
+
+# Rows per DELETE statement when removing rows that left the source
+DELETE_CHUNK_SIZE = 500
+
+
+def kb_columns(kb_name: str) -> List[str]:
+    """Source columns a knowledge base ingests: id, metadata and content."""
+    layout = KB_LAYOUTS[kb_name]
+    columns = [layout["id_column"]]
+    columns += layout["metadata_columns"] + layout["content_columns"]
+    return list(dict.fromkeys(columns))
+
+
+def kb_exists(kb_name: str) -> bool:
+    """Whether a knowledge base exists in MindsDB."""
+    server = mindsdb_sdk.connect()
+    return any(kb.name == kb_name for kb in server.knowledge_bases.list())
+
+
 def drop_all_kbs() -> None:
     server = mindsdb_sdk.connect()
 
     for kb in server.knowledge_bases.list():
         server.knowledge_bases.drop(kb.name)
+    get_manifest().clear()
 
 
-def create_confluence_kb(
-    api_key: str, azure_config: dict = None, use_pgvector: bool = True
-) -> None:
-    """Create Confluence knowledge base with pgvector storage."""
-    server = mindsdb_sdk.connect()
-
-    # Drop existing KB if it exists
-    try:
-        server.knowledge_bases.drop("confluence_kb")
-        print("✓ Dropped existing confluence_kb")
-    except Exception:
-        pass
-
-    # Configure embedding model
+def kb_models(api_key: str, azure_config: dict = None) -> Tuple[Dict, Dict]:
+    """Embedding and reranking model parameters shared by the knowledge bases."""
     if azure_config:
         embedding_model = {
             "provider": "azure_openai",
@@ -44,7 +67,7 @@ def create_confluence_kb(
             "base_url": azure_config.get("endpoint"),
             "api_version": azure_config.get("api_version", "2024-02-01"),
             "deployment": azure_config.get("deployment", "text-embedding-3-large"),
-            "rate_limit": 20,
+            "rate_limit": EMBEDDING_RATE_LIMIT,
         }
         reranking_model = {
             "provider": "azure_openai",
@@ -53,7 +76,7 @@ def create_confluence_kb(
             "base_url": azure_config.get("endpoint"),
             "api_version": azure_config.get("api_version", "2024-02-01"),
             "deployment": azure_config.get("inference_deployment", "gpt-4.1"),
-            "rate_limit": 20,
+            "rate_limit": EMBEDDING_RATE_LIMIT,
         }
     else:
         embedding_model = {
@@ -66,205 +89,337 @@ def create_confluence_kb(
             "model_name": "gpt-4o",
             "api_key": api_key,
         }
+    return embedding_model, reranking_model
+
 
-    # Create knowledge base with pgvector storage
-    kb_params = {
-        "name": "confluence_kb",
+def desired_kb_params(kb_name: str, api_key: str, azure_config: dict = None) -> Dict:
+    """Parameters a knowledge base is created with, except its storage."""
+    layout = KB_LAYOUTS[kb_name]
+    embedding_model, reranking_model = kb_models(api_key, azure_config)
+    return {
+        "name": kb_name,
         "embedding_model": embedding_model,
         "reranking_model": reranking_model,
-        "metadata_columns": [
-            "id",
-            "status",
-            "title",
-            "spaceId",
-            "authorId",
-            "createdAt",
-        ],
-        "content_columns": ["body_storage_value"],
-        "id_column": "id",
+        "metadata_columns": layout["metadata_columns"],
+        "content_columns": layout["content_columns"],
+        "id_column": layout["id_column"],
     }
 
-    if use_pgvector:
-        # Use pgvector storage
-        kb_params["storage"] = server.databases.pgvector_datasource.tables.pages
-        print("Creating KB with pgvector storage...")
-    else:
-        print("Creating KB without storage...")
-
-    server.knowledge_bases.create(**kb_params)
-    print("✓ Created confluence_kb")
-
 
-def create_jira_kb(
-    api_key: str, azure_config: dict = None, use_pgvector: bool = True
+def create_kb(
+    kb_name: str, api_key: str, azure_config: dict = None, use_pgvector: bool = True
 ) -> None:
-    """Create Jira knowledge base."""
+    """Drop a knowledge base if it exists and create it from KB_LAYOUTS."""
     server = mindsdb_sdk.connect()
 
+    # Drop existing KB if it exists
     try:
-        server.knowledge_bases.drop("jira_kb")
-        print("✓ Dropped existing jira_kb")
+        server.knowledge_bases.drop(kb_name)
+        print(f"✓ Dropped existing {kb_name}")
     except Exception:
         pass
+    get_manifest().clear(kb_name)
 
-    embedding_model = {
-        "provider": "azure_openai" if azure_config else "openai",
-        "model_name": azure_config.get("deployment", "text-embedding-3-large")
-        if azure_config
-        else "text-embedding-3-small",
-        "api_key": azure_config.get("api_key") if azure_config else api_key,
-        "base_url": azure_config.get("endpoint") if azure_config else None,
-        "api_version": azure_config.get("api_version", "2024-02-01")
-        if azure_config
-        else None,
-        "deployment": azure_config.get("deployment") if azure_config else None,
-        "rate_limit": 20 if azure_config else None,
-    }
-
-    reranking_model = {
-        "provider": "azure_openai" if azure_config else "openai",
-        "model_name": azure_config.get("inference_deployment", "gpt-4.1")
-        if azure_config
-        else "gpt-4o",
-        "api_key": azure_config.get("api_key") if azure_config else api_key,
-        "base_url": azure_config.get("endpoint") if azure_config else None,
-        "api_version": azure_config.get("api_version", "2024-02-01")
-        if azure_config
-        else None,
-        "deployment": azure_config.get("inference_deployment")
-        if azure_config
-        else None,
-        "rate_limit": 20 if azure_config else None,
-    }
-
-    kb_params = {
-        "name": "jira_kb",
-        "embedding_model": embedding_model,
-        "reranking_model": reranking_model,
-        "metadata_columns": [
-            "id",
-            "key",
-            "project_id",
-            "project_key",
-            "project_name",
-            "priority",
-            "creator",
-            "assignee",
-            "status",
-        ],
-        "content_columns": ["summary", "description"],
-        "id_column": "id",
-    }
-
+    kb_params = desired_kb_params(kb_name, api_key, azure_config)
     if use_pgvector:
-        kb_params["storage"] = server.databases.pgvector_datasource.tables.jira_content
-        print("Creating Jira KB with pgvector storage...")
+        storage = server.databases.get(KB_STORAGE_DATASOURCE)
+        kb_params["storage"] = storage.tables.get(KB_LAYOUTS[kb_name]["storage_table"])
+        print(f"Creating {kb_name} with pgvector storage...")
     else:
-        print("Creating Jira KB without storage...")
+        print(f"Creating {kb_name} without storage...")
 
     server.knowledge_bases.create(**kb_params)
-    print("✓ Created jira_kb")
+    print(f"✓ Created {kb_name}")
+
+
+def create_confluence_kb(
+    api_key: str, azure_config: dict = None, use_pgvector: bool = True
+) -> None:
+    """Create Confluence knowledge base with pgvector storage."""
+    create_kb("confluence_kb", api_key, azure_config, use_pgvector)
+
+
+def create_jira_kb(
+    api_key: str, azure_config: dict = None, use_pgvector: bool = True
+) -> None:
+    """Create Jira knowledge base."""
+    create_kb("jira_kb", api_key, azure_config, use_pgvector)
 
 
 def create_zendesk_kb(
     api_key: str, azure_config: dict = None, use_pgvector: bool = True
 ) -> None:
     """Create Zendesk knowledge base."""
-    server = mindsdb_sdk.connect()
+    create_kb("zendesk_kb", api_key, azure_config, use_pgvector)
 
-    try:
-        server.knowledge_bases.drop("zendesk_kb")
-        print("✓ Dropped existing zendesk_kb")
-    except Exception:
-        pass
 
-    embedding_model = {
-        "provider": "azure_openai" if azure_config else "openai",
-        "model_name": azure_config.get("deployment", "text-embedding-3-large")
-        if azure_config
-        else "text-embedding-3-small",
-        "api_key": azure_config.get("api_key") if azure_config else api_key,
-        "base_url": azure_config.get("endpoint") if azure_config else None,
-        "api_version": azure_config.get("api_version", "2024-02-01")
-        if azure_config
-        else None,
-        "deployment": azure_config.get("deployment") if azure_config else None,
-        "rate_limit": 20 if azure_config else None,
-    }
+def _as_dict(value) -> Dict:
+    """Model config as MindsDB returns it (a dict or a JSON string)."""
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except json.JSONDecodeError:
+            return {}
+    return value if isinstance(value, dict) else {}
 
-    reranking_model = {
-        "provider": "azure_openai" if azure_config else "openai",
-        "model_name": azure_config.get("inference_deployment", "gpt-4.1")
-        if azure_config
-        else "gpt-4o",
-        "api_key": azure_config.get("api_key") if azure_config else api_key,
-        "base_url": azure_config.get("endpoint") if azure_config else None,
-        "api_version": azure_config.get("api_version", "2024-02-01")
-        if azure_config
-        else None,
-        "deployment": azure_config.get("inference_deployment")
-        if azure_config
-        else None,
-        "rate_limit": 20 if azure_config else None,
-    }
 
-    kb_params = {
-        "name": "zendesk_kb",
-        "embedding_model": embedding_model,
-        "reranking_model": reranking_model,
-        "metadata_columns": [
-            "id",
-            "status",
-            "priority",
-            "type",
-            "assignee_id",
-            "requester_id",
-            "tags",
-            "url",
-            "created_at",
-            "updated_at",
-        ],
-        "content_columns": ["subject", "description"],
-        "id_column": "id",
-    }
+def kb_config_diff(kb, desired: Dict, storage_table: Optional[str]) -> List[str]:
+    """
+    List the differences that require recreating, and so re-embedding, a KB.
 
-    if use_pgvector:
-        kb_params["storage"] = (
-            server.databases.pgvector_datasource.tables.zendesk_tickets
-        )
-        print("Creating Zendesk KB with pgvector storage...")
-    else:
-        print("Creating Zendesk KB without storage...")
+    API keys, endpoints and rate limits don't change the vectors and are
+    ignored; so is the reranking model (see reranking_diff).
 
-    server.knowledge_bases.create(**kb_params)
+    Args:
+        kb: Existing mindsdb_sdk KnowledgeBase
+        desired: Parameters from desired_kb_params
+        storage_table: Expected table in KB_STORAGE_DATASOURCE (None for none)
+
+    Returns:
+        Human readable differences; empty when the KB can be kept
+    """
+    changes = []
+    existing_model = _as_dict(kb.embedding_model)
+    for key in EMBEDDING_IDENTITY_KEYS:
+        have, want = existing_model.get(key), desired["embedding_model"].get(key)
+        if have != want:
+            changes.append(f"embedding_model.{key}: {have!r} -> {want!r}")
+
+    for key in ("metadata_columns", "content_columns"):
+        have, want = list(getattr(kb, key) or []), list(desired[key])
+        if have != want:
+            changes.append(f"{key}: {have} -> {want}")
+
+    # Older servers don't report the id column
+    if kb.id_column is not None and kb.id_column != desired["id_column"]:
+        changes.append(f"id_column: {kb.id_column!r} -> {desired['id_column']!r}")
+
+    storage = kb.storage
+    have = f"{storage.db.name}.{storage.name}" if storage is not None else None
+    want = f"{KB_STORAGE_DATASOURCE}.{storage_table}" if storage_table else None
+    if have != want:
+        changes.append(f"storage: {have} -> {want}")
+    return changes
+
+
+def reranking_diff(kb, desired: Dict) -> List[str]:
+    """Reranking model differences (applied only when the KB is recreated)."""
+    existing_model = _as_dict(kb.reranking_model)
+    return [
+        f"reranking_model.{key}: {existing_model.get(key)!r} -> "
+        f"{desired['reranking_model'].get(key)!r}"
+        for key in EMBEDDING_IDENTITY_KEYS
+        if existing_model.get(key) != desired["reranking_model"].get(key)
+    ]
+
+
+def reconcile_kb(
+    kb_name: str,
+    api_key: str,
+    azure_config: dict = None,
+    use_pgvector: bool = True,
+    force: bool = False,
+) -> str:
+    """
+    Create a knowledge base, or recreate it only if its config changed.
+
+    A kept KB keeps its embeddings and manifest, so the following
+    incremental insert_kb_data only embeds new or changed rows.
+
+    Args:
+        kb_name: Knowledge base (a key of KB_LAYOUTS)
+        api_key: OpenAI API key
+        azure_config: Azure OpenAI config (optional)
+        use_pgvector: Store vectors in KB_STORAGE_DATASOURCE
+        force: Recreate even if unchanged (e.g. the storage datasource moved)
+
+    Returns:
+        'created', 'recreated' or 'kept'
+    """
+    if not kb_exists(kb_name):
+        create_kb(kb_name, api_key, azure_config, use_pgvector)
+        return "created"
+
+    server = mindsdb_sdk.connect()
+    kb = server.knowledge_bases.get(kb_name)
+    desired = desired_kb_params(kb_name, api_key, azure_config)
+    storage_table = KB_LAYOUTS[kb_name]["storage_table"] if use_pgvector else None
+
+    changes = kb_config_diff(kb, desired, storage_table)
+    if force:
+        changes.append(f"{KB_STORAGE_DATASOURCE} was recreated")
+    if changes:
+        print(f"{kb_name} changed: {'; '.join(changes)}")
+        create_kb(kb_name, api_key, azure_config, use_pgvector)
+        return "recreated"
+
+    for change in reranking_diff(kb, desired):
+        print(f"⚠️  {kb_name} {change} not applied; use --mode setup to recreate")
+    print(f"✓ Keeping {kb_name} (unchanged)")
+    return "kept"
 
 
 def insert_kb_data(
-    kb_name: str, source_datasource=None, source_table=None, batch_size=5, delay=1
+    kb_name: str,
+    source_datasource=None,
+    source_table=None,
+    batch_size=5,
+    rate_limit: Optional[float] = None,
+    incremental: bool = True,
+    resume: bool = False,
 ) -> None:
+    """
+    Load source rows into a knowledge base.
+
+    With incremental=True only rows whose content hash differs from the local
+    manifest (new or changed rows) are embedded, and rows that disappeared
+    from the source are deleted from the KB. Inserts are paced by a token
+    bucket shared by all loaders in the process, and the batch size adapts
+    to insert latency and 429 responses.
+
+    Source rows are streamed in id-ordered pages on a reader thread that
+    stays a few pages ahead of the inserts (KB_READ_PREFETCH_PAGES), so
+    memory stays flat and embedding starts with the first page.
+
+    Progress is checkpointed after every committed batch (rows are read in
+    id order), so resume=True continues an interrupted load after the last
+    committed id instead of rescanning the source.
+
+    Args:
+        kb_name: Knowledge base to load (a key of KB_LAYOUTS)
+        source_datasource: Source datasource (default: from KB_LAYOUTS)
+        source_table: Source table (default: from KB_LAYOUTS)
+        batch_size: Initial rows per insert
+        rate_limit: Rows per second (default: the KB embedding model's
+            rate_limit, else EMBEDDING_RATE_LIMIT; 0 for no limit)
+        incremental: Skip rows the manifest says are already ingested
+        resume: Continue from the last checkpoint of an unfinished load
+    """
+    layout = KB_LAYOUTS[kb_name]
+    source_datasource = source_datasource or layout["datasource"]
+    source_table = source_table or layout["table"]
+    id_column = layout["id_column"]
+    updated_column = layout["updated_column"]
+    hash_columns = kb_columns(kb_name)
+
     server = mindsdb_sdk.connect()
     kb = server.knowledge_bases.get(kb_name)
+    tool = SemanticSearchTool(kb_name=kb_name)
+    manifest = get_manifest()
+
+    known = manifest.hashes(kb_name) if incremental else {}
+    if not incremental:
+        manifest.clear(kb_name)
+
+    checkpoint = manifest.checkpoint(kb_name) if resume else None
+    if checkpoint and checkpoint["completed"]:
+        print(f"✓ {kb_name} already loaded ({checkpoint['rows']} rows), skipping")
+        return
+    start_after = checkpoint["last_key"] if checkpoint else None
+    committed = checkpoint["rows"] if checkpoint else 0
+    if start_after is None:
+        manifest.start_load(kb_name)
+    else:
+        print(
+            f"Resuming {kb_name} after {id_column}={start_after!r} "
+            f"({committed} rows already loaded)"
+        )
 
-    # Fetch rows from datasource
-    rows = server.query(f"SELECT * FROM {source_datasource}.{source_table}").fetch()
-
-    for i in range(0, len(rows), batch_size):
+    if rate_limit is None:
+        embedding_model = getattr(kb, "embedding_model", None)
+        configured = (
+            embedding_model.get("rate_limit")
+            if isinstance(embedding_model, dict)
+            else None
+        )
+        rate_limit = float(configured) if configured else EMBEDDING_RATE_LIMIT
+    loader = BulkLoader(
+        insert=lambda batch: kb.insert([row for row, _ in batch]),
+        name=kb_name,
+        limiter=get_rate_limiter(rate_limit),
+        batch_size=batch_size,
+    )
+
+    def record(batch) -> None:
+        nonlocal committed
+        manifest.record(
+            kb_name,
+            [
+                (
+                    str(row[id_column]),
+                    digest,
+                    str(row.get(updated_column)) if updated_column else None,
+                )
+                for row, digest in batch
+            ],
+        )
+        committed += len(batch)
+        manifest.advance(kb_name, batch[-1][0][id_column], committed)
+
+    seen = set()
+
+    def changed_rows():
+        columns = hash_columns + ([updated_column] if updated_column else [])
+        pages = tool.iter_raw_data(
+            source_datasource,
+            source_table,
+            columns=list(dict.fromkeys(columns)),
+            key=id_column,
+            start_after=start_after,
+        )
+        for page in prefetch(pages):
+            for row in page:
+                row_id = str(row[id_column])
+                seen.add(row_id)
+                digest = row_hash(row, hash_columns)
+                if known.get(row_id) != digest:
+                    yield row, digest
+
+    stats = loader.load(changed_rows(), on_success=record)
+    inserted, failed = stats.rows, stats.failed
+
+    # A resumed scan only saw part of the source, so it can't detect deletions
+    removed = []
+    if start_after is None:
+        removed = [row_id for row_id in known if row_id not in seen]
+    if removed and not seen:
+        print(f"⚠️  {source_datasource}.{source_table} is empty; not deleting rows")
+        removed = []
+    for i in range(0, len(removed), DELETE_CHUNK_SIZE):
+        chunk = removed[i : i + DELETE_CHUNK_SIZE]
+        ids = ", ".join(quote_literal(row_id) for row_id in chunk)
         try:
-            batch = rows[i : i + batch_size]
-            kb.insert(batch)
-            print(f"Inserted {i + len(batch)} / {len(rows)} into {kb_name}")
-            time.sleep(delay)
+            server.query(
+                f"DELETE FROM {Identifier(kb_name).to_string()} WHERE id IN ({ids})"
+            ).fetch()
+            manifest.forget(kb_name, chunk)
         except Exception as e:
-            print(f"Error inserting batch {i} into {kb_name}: {e}")
+            print(f"Error deleting {len(chunk)} rows from {kb_name}: {e}")
+
+    print(
+        f"✓ {kb_name}: {inserted} new or changed, {len(removed)} removed, "
+        f"{len(seen) - inserted - failed} unchanged, {failed} failed "
+        f"({stats.rows_per_second:.1f} rows/s, {stats.retries} retries)"
+    )
+    manifest.finish_load(kb_name, committed)
+
+    # Cached searches may now be stale
+    cache = get_result_cache()
+    if cache is not None:
+        cache.invalidate(kb_name)
 
 
 def refresh_kb(
-    kb_name: str, source_datasource: str = None, source_table: str = None
+    kb_name: str,
+    source_datasource: str = None,
+    source_table: str = None,
+    resume: bool = False,
 ) -> None:
     server = mindsdb_sdk.connect()
-    server.query(f"REFRESH {kb_name.replace('_kb', '_datasource')}")
-    print(f"✓ Refreshed {kb_name.replace('_kb', '_datasource')}")
-    insert_kb_data(kb_name, source_datasource, source_table)
+    if not resume:
+        server.query(f"REFRESH {kb_name.replace('_kb', '_datasource')}")
+        print(f"✓ Refreshed {kb_name.replace('_kb', '_datasource')}")
+    insert_kb_data(kb_name, source_datasource, source_table, resume=resume)
     print(f"✓ Updated {kb_name}")
 
 
@@ -288,24 +443,24 @@ def create_mindsdb_agent(azure_config: dict = None):
 
     # Build model config based on whether Azure is available
     if azure_config and azure_config.get("api_key"):
-        model_config = f'''{{
+        model_config = f"""{{
             "provider": "azure_openai",
             "model_name": "{azure_config.get("inference_deployment", "gpt-4.1")}",
             "api_key": "{azure_config["api_key"]}",
             "base_url": "{azure_config.get("endpoint", "https://tx-dev.openai.azure.com/")}",
             "api_version": "{azure_config.get("api_version", "2024-02-01")}"
-        }}'''
+        }}"""
         print("✓ Creating agent with Azure OpenAI")
     else:
         # Fallback to OpenAI
         import os
 
         api_key = os.getenv("OPENAI_API_KEY", "")
-        model_config = f'''{{
+        model_config = f"""{{
             "provider": "openai",
             "model_name": "gpt-4.1",
             "api_key": "{api_key}"
-        }}'''
+        }}"""
         print("✓ Creating agent with OpenAI")
 
     query = f"""    